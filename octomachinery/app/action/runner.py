@@ -15,9 +15,11 @@ from ...github.models.action_outcomes import (
     ActionFailure, ActionNeutral, ActionSuccess,
 )
 # pylint: disable=relative-beyond-top-level
-from ..config import BotAppConfig
+from ...routing.manifest import get_default_event_routers
+# pylint: disable=relative-beyond-top-level
+from ...utils.asynctools import configure_sync_thread_pool
 # pylint: disable=relative-beyond-top-level
-from ..routing import WEBHOOK_EVENTS_ROUTER
+from ..config import BotAppConfig
 # pylint: disable=relative-beyond-top-level
 from ..routing.abc import OctomachineryRouterBase
 # pylint: disable=relative-beyond-top-level
@@ -30,6 +32,7 @@ logger = logging.getLogger(__name__)
 async def process_github_action(config, event_routers):
     """Schedule GitHub Action event for processing."""
     logger.info('Processing GitHub Action event...')
+    configure_sync_thread_pool(config.runtime.sync_handler_threads or None)
 
     async with ClientSession() as http_client_session:
         github_action = GitHubAction(
@@ -53,9 +56,6 @@ def run(
         event_routers: Optional[Iterable[OctomachineryRouterBase]] = None,
 ) -> None:
     """Start up a server using CLI args for host and port."""
-    if event_routers is None:
-        event_routers = {WEBHOOK_EVENTS_ROUTER}
-
     if config is None:
         config = BotAppConfig.from_dotenv()
 
@@ -65,6 +65,13 @@ def run(
         else logging.INFO,
     )
 
+    if event_routers is None:
+        runtime_config = config.runtime  # pylint: disable=no-member
+        event_routers = get_default_event_routers(
+            runtime_config.route_manifest_path,
+            use_entry_points=runtime_config.route_entry_points,
+        )
+
     try:
         processing_outcome = asyncio.run(
             process_github_action(config, event_routers),
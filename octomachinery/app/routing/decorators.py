@@ -1,4 +1,6 @@
 """Webhook event processing helper decorators proxy."""
 
 # pylint: disable=unused-import
-from ...routing.decorators import process_webhook_payload  # noqa: F401
+from ...routing.decorators import (  # noqa: F401
+    extract_payload_args, process_webhook_payload,
+)
@@ -0,0 +1,265 @@
+"""Redelivered webhook events deduplication helpers."""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import time
+from abc import ABCMeta, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional, Union
+
+import attr
+
+
+if TYPE_CHECKING:
+    # pylint: disable=relative-beyond-top-level
+    from ...github.models.events import GitHubWebhookEvent
+    # pylint: disable=relative-beyond-top-level
+    from ..server.config import WebServerConfig
+
+
+__all__ = (
+    'FileSystemDedupStore',
+    'InMemoryDedupStore',
+    'WebhookEventDeduplicator',
+    'make_event_deduplicator',
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+class DedupStoreBase(metaclass=ABCMeta):
+    """Seen keys storage interface."""
+
+    # pylint: disable=unused-argument
+    @abstractmethod
+    def remember(self, key: str) -> bool:
+        """Record the key and tell whether it's been seen recently.
+
+        :param str key: a unique identifier of the seen object
+
+        :returns: whether the key has been recorded within the TTL
+        """
+
+    @abstractmethod
+    def forget(self, key: str) -> None:
+        """Drop the key so that it's not deemed seen anymore.
+
+        :param str key: a unique identifier of the seen object
+        """
+
+
+@attr.dataclass
+class InMemoryDedupStore(DedupStoreBase):
+    """Process-local TTL-bound seen keys storage.
+
+    Once it's full, the keys recorded first are evicted first, no
+    matter how often they've been seen since. This keeps the order
+    of the keys matching the order of their expiration.
+    """
+
+    ttl: float = 3600
+    """Seconds for which a recorded key is considered fresh."""
+    max_size: int = 10_000
+    """Maximum number of the keys to hold."""
+    _seen_at: OrderedDict[str, float] = attr.ib(
+        init=False, factory=OrderedDict,
+    )
+    """Keys mapped to the moment when they were recorded, oldest first."""
+
+    def _evict_stale(self, now: float) -> None:
+        """Drop expired keys and the ones exceeding the size limit."""
+        while self._seen_at:
+            oldest_key, oldest_seen_at = next(iter(self._seen_at.items()))
+            if (
+                    now - oldest_seen_at < self.ttl
+                    and len(self._seen_at) <= self.max_size
+            ):
+                break
+            del self._seen_at[oldest_key]
+
+    def remember(self, key: str) -> bool:
+        """Record the key and tell whether it's been seen recently."""
+        now = time.monotonic()
+        self._evict_stale(now)
+
+        if key in self._seen_at:
+            return True
+
+        self._seen_at[key] = now
+        self._evict_stale(now)
+        return False
+
+    def forget(self, key: str) -> None:
+        """Drop the key so that it's not deemed seen anymore."""
+        self._seen_at.pop(key, None)
+
+
+@attr.dataclass
+class FileSystemDedupStore(DedupStoreBase):
+    """Seen keys storage shared by the workers via a local directory.
+
+    Each key is represented by a marker file which is created
+    atomically so that only one of the competing workers wins.
+    """
+
+    path: Path = attr.ib(converter=Path)
+    """Directory holding the marker files."""
+    ttl: float = 3600
+    """Seconds for which a recorded key is considered fresh."""
+    max_size: int = 10_000
+    """Soft limit of the marker files number kept on disk."""
+    _inserts_since_pruning: int = attr.ib(init=False, default=0)
+
+    def __attrs_post_init__(self) -> None:
+        """Make sure that the storage directory exists."""
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def _marker_path(self, key: str) -> Path:
+        return self.path / hashlib.sha256(key.encode()).hexdigest()
+
+    def _try_claiming(self, marker_path: Path) -> bool:
+        """Create the marker file unless it's present."""
+        try:
+            os.close(
+                os.open(marker_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY),
+            )
+        except FileExistsError:
+            return False
+        return True
+
+    def remember(self, key: str) -> bool:
+        """Record the key and tell whether it's been seen recently.
+
+        This code path is synchronous. It only does a couple of tiny
+        metadata syscalls so it's not worth offloading to a thread.
+        """
+        marker_path = self._marker_path(key)
+
+        if not self._try_claiming(marker_path):
+            try:
+                seen_at = marker_path.stat().st_mtime
+            except FileNotFoundError:
+                seen_at = float('-inf')  # pruned by another worker
+
+            if time.time() - seen_at < self.ttl:
+                return True
+
+            # NOTE: The expired marker is re-created rather than touched
+            # NOTE: so that concurrent workers race on the exclusive
+            # NOTE: creation and only one of them gets to dispatch.
+            with contextlib.suppress(FileNotFoundError):
+                marker_path.unlink()
+            if not self._try_claiming(marker_path):
+                return True
+
+        self._inserts_since_pruning += 1
+        if self._inserts_since_pruning >= max(1, self.max_size // 10):
+            self.prune()
+        return False
+
+    def forget(self, key: str) -> None:
+        """Drop the key so that it's not deemed seen anymore."""
+        with contextlib.suppress(FileNotFoundError):
+            self._marker_path(key).unlink()
+
+    def prune(self) -> None:
+        """Remove expired markers and the oldest ones over the limit."""
+        self._inserts_since_pruning = 0
+        now = time.time()
+
+        markers: List[os.DirEntry[str]] = []
+        with os.scandir(self.path) as dir_entries:
+            for marker in dir_entries:
+                with contextlib.suppress(FileNotFoundError):
+                    if now - marker.stat().st_mtime >= self.ttl:
+                        os.unlink(marker.path)
+                    else:
+                        markers.append(marker)
+
+        excessive_markers_num = len(markers) - self.max_size
+        if excessive_markers_num <= 0:
+            return
+
+        markers.sort(key=lambda m: m.stat().st_mtime)
+        for marker in markers[:excessive_markers_num]:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(marker.path)
+
+
+def _hash_event_payload(github_event: GitHubWebhookEvent) -> str:
+    """Compute a stable digest of the event name and payload."""
+    canonical_payload = json.dumps(
+        github_event.payload, sort_keys=True, separators=(',', ':'),
+    )
+    return hashlib.sha256(
+        f'{github_event.name}\n{canonical_payload}'.encode(),
+    ).hexdigest()
+
+
+@attr.dataclass
+class WebhookEventDeduplicator:
+    """Redelivered webhook events detector."""
+
+    store: DedupStoreBase
+    """Storage of the keys of the events seen before."""
+    match_payload_content: bool = False
+    """Whether to treat same payloads with new delivery IDs as copies."""
+
+    def _get_event_keys(self, github_event: GitHubWebhookEvent) -> List[str]:
+        event_keys = [f'delivery:{github_event.delivery_id!s}']
+        if self.match_payload_content:
+            event_keys.append(f'payload:{_hash_event_payload(github_event)}')
+        return event_keys
+
+    def is_duplicate(self, github_event: GitHubWebhookEvent) -> bool:
+        """Record the event and tell whether it's been seen before."""
+        # NOTE: Not short-circuiting so that all of the keys get recorded
+        return any([
+            self.store.remember(key)
+            for key in self._get_event_keys(github_event)
+        ])
+
+    def forget(self, github_event: GitHubWebhookEvent) -> None:
+        """Drop the event records so that its redelivery gets through.
+
+        Call this when the event is not going to be handled after all.
+        """
+        for key in self._get_event_keys(github_event):
+            self.store.forget(key)
+
+
+def make_event_deduplicator(
+        server_config: WebServerConfig,
+) -> Optional[WebhookEventDeduplicator]:
+    """Construct a deduplicator as set up by the web-server config."""
+    if server_config.dedup_ttl <= 0:
+        return None
+
+    store: Union[FileSystemDedupStore, InMemoryDedupStore]
+    if server_config.dedup_store_path:
+        store = FileSystemDedupStore(
+            server_config.dedup_store_path,
+            ttl=server_config.dedup_ttl,
+            max_size=server_config.dedup_max_size,
+        )
+    else:
+        store = InMemoryDedupStore(
+            ttl=server_config.dedup_ttl,
+            max_size=server_config.dedup_max_size,
+        )
+
+    logger.info(
+        'Webhook deliveries seen within %s seconds will be skipped '
+        '(storage: %r, payload matching: %s)',
+        server_config.dedup_ttl, store, server_config.dedup_by_content,
+    )
+    return WebhookEventDeduplicator(
+        store, match_payload_content=server_config.dedup_by_content,
+    )
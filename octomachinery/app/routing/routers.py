@@ -2,5 +2,6 @@
 
 # pylint: disable=unused-import
 from ...routing.routers import (  # noqa: F401
-    ConcurrentRouter, GidgetHubRouterBase, NonBlockingConcurrentRouter,
+    ConcurrentRouter, GidgetHubRouterBase, KeyedSerialRouter,
+    NonBlockingConcurrentRouter, ProcessPoolRouter,
 )
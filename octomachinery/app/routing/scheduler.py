@@ -0,0 +1,534 @@
+"""Webhook events dispatch scheduling."""
+
+from __future__ import annotations
+
+import asyncio
+import enum
+import logging
+import time
+from collections import deque
+from functools import partial
+from typing import (
+    TYPE_CHECKING, Any, Awaitable, Callable, Deque, Dict, FrozenSet, List,
+    Mapping, Optional, Tuple,
+)
+
+import attr
+
+# pylint: disable=relative-beyond-top-level
+from ...routing.event_keys import installation_key
+
+
+if TYPE_CHECKING:
+    # pylint: disable=relative-beyond-top-level
+    from ...github.models.events import GitHubEvent
+    # pylint: disable=relative-beyond-top-level
+    from ..server.config import WebServerConfig
+
+
+__all__ = (
+    'DrainReport',
+    'EventDispatchScheduler',
+    'EventPriority',
+    'make_dispatch_scheduler',
+    'parse_event_priorities',
+    'parse_installation_weights',
+    'parse_priority_classes',
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+class EventPriority(enum.IntEnum):
+    """Priority classes of the events, the lower the more urgent."""
+
+    HIGH = 0
+    NORMAL = 1
+    LOW = 2
+
+
+def _to_priority(priority_name: str) -> EventPriority:
+    """Return a priority class by its case-insensitive name."""
+    try:
+        return EventPriority[priority_name.strip().upper()]
+    except KeyError:
+        raise ValueError(
+            f'{priority_name!r} is not one of the priority classes: '
+            f'{", ".join(p.name.lower() for p in EventPriority)!s}',
+        ) from None
+
+
+def parse_event_priorities(
+        raw_priorities: str,
+) -> Mapping[str, EventPriority]:
+    """Parse a map of event types to priority classes.
+
+    The input is a comma-separated list of ``event=priority`` pairs
+    where the event is either a bare name or a name with an action
+    joined by a dot.
+
+    >>> from octomachinery.app.routing.scheduler import (
+    ...     parse_event_priorities
+    ... )
+    >>> parse_event_priorities('check_run.rerequested=high, push=low')
+    {'check_run.rerequested': <EventPriority.HIGH: 0>, \
+'push': <EventPriority.LOW: 2>}
+    """
+    event_priorities = {}
+    for priority_pair in filter(None, raw_priorities.split(',')):
+        event_type, _sep, priority_name = priority_pair.partition('=')
+        event_priorities[event_type.strip()] = _to_priority(priority_name)
+    return event_priorities
+
+
+def parse_installation_weights(raw_weights: str) -> Mapping[int, float]:
+    """Parse a map of installation IDs to their fair share weights.
+
+    >>> from octomachinery.app.routing.scheduler import (
+    ...     parse_installation_weights
+    ... )
+    >>> parse_installation_weights('1234=4, 5678=0.5')
+    {1234: 4.0, 5678: 0.5}
+    """
+    installation_weights = {}
+    for weight_pair in filter(None, raw_weights.split(',')):
+        installation_id, _sep, weight = weight_pair.partition('=')
+        installation_weights[int(installation_id)] = float(weight)
+    return installation_weights
+
+
+def parse_priority_classes(raw_classes: str) -> FrozenSet[EventPriority]:
+    """Parse a comma-separated list of priority classes."""
+    return frozenset(map(_to_priority, filter(None, raw_classes.split(','))))
+
+
+@attr.dataclass
+class PriorityClassMetrics:
+    """Counters of the events going through a priority class."""
+
+    enqueued: int = 0
+    """Number of the events submitted to the scheduler."""
+    dispatched: int = 0
+    """Number of the events that have left the queue for dispatching."""
+    shed: int = 0
+    """Number of the events dropped because of the overload."""
+    total_queue_time: float = 0
+    """Sum of seconds that the dispatched events have spent in queue."""
+    max_queue_time: float = 0
+    """The longest time an event has spent in queue, in seconds."""
+
+    @property
+    def mean_queue_time(self) -> float:
+        """Return the average time the events have spent in queue."""
+        if not self.dispatched:
+            return 0
+        return self.total_queue_time / self.dispatched
+
+    def record_queue_time(self, queue_time: float) -> None:
+        """Account for an event that is leaving the queue."""
+        self.dispatched += 1
+        self.total_queue_time += queue_time
+        self.max_queue_time = max(self.max_queue_time, queue_time)
+
+
+@attr.dataclass
+class _QueuedDispatch:
+    """An event waiting to be dispatched."""
+
+    github_event: GitHubEvent
+    dispatch: Callable[[], Awaitable[Any]]
+    priority: EventPriority
+    installation_id: Optional[int]
+    enqueued_at: float = attr.ib(factory=time.monotonic)
+
+
+@attr.dataclass
+class _InstallationState:
+    """Fair share accounting of an installation."""
+
+    weight: float
+    """Relative share of the dispatch capacity."""
+    virtual_time: float = 0
+    """Number of the dispatched events scaled down by the weight."""
+    queued_events: int = 0
+    running_events: int = 0
+
+
+@attr.dataclass(frozen=True)
+class DrainReport:
+    """Outcome of draining the dispatch scheduler."""
+
+    duration: float
+    """Seconds it took to drain the scheduler."""
+    completed_count: int
+    """Number of the events that have been handled during the drain."""
+    abandoned_events: Tuple[GitHubEvent, ...]
+    """Events that haven't been handled completely by the deadline."""
+
+
+@attr.dataclass
+class EventDispatchScheduler:
+    """Dispatcher of the events by priority classes.
+
+    It limits the number of events being handled concurrently. The
+    rest of them wait in the queue and then get dispatched starting
+    from the most urgent priority class. When the queue is full, the
+    events of sheddable classes get dropped, starting from the least
+    urgent ones.
+
+    Within one class, the installations get their turns according to
+    weighted fair queuing: the next event comes from the installation
+    that has been served the least relative to its weight. This way,
+    a flood of events from one installation doesn't starve the others.
+    """
+
+    max_concurrency: int = 0
+    """Number of events dispatched simultaneously; 0 means unlimited."""
+    max_queue_size: int = 10_000
+    """Number of queued events at which the shedding kicks in."""
+    event_priorities: Mapping[str, EventPriority] = attr.ib(factory=dict)
+    """Priority classes by ``event`` or ``event.action`` names."""
+    sheddable_priorities: FrozenSet[EventPriority] = attr.ib(
+        default=frozenset({EventPriority.LOW}),
+        converter=frozenset,
+    )
+    """Priority classes of events that may be dropped under overload."""
+    max_concurrency_per_installation: int = 0
+    """Events of one installation dispatched simultaneously; 0 is no cap."""
+    installation_weights: Mapping[int, float] = attr.ib(factory=dict)
+    """Fair share weights by installation ID, 1 by default."""
+    metrics: Dict[EventPriority, PriorityClassMetrics] = attr.ib(
+        init=False,
+        factory=lambda: {p: PriorityClassMetrics() for p in EventPriority},
+    )
+    """Queueing stats per priority class."""
+    _queues: Dict[
+        EventPriority, Dict[Optional[int], Deque[_QueuedDispatch]],
+    ] = attr.ib(
+        init=False,
+        factory=lambda: {p: {} for p in EventPriority},
+    )
+    _installations: Dict[Optional[int], _InstallationState] = attr.ib(
+        init=False, factory=dict,
+    )
+    _queued_count: int = attr.ib(init=False, default=0)
+    _running_tasks: Dict[asyncio.Task[Any], _QueuedDispatch] = attr.ib(
+        init=False, factory=dict,
+    )
+    _is_closed: bool = attr.ib(init=False, default=False)
+
+    @property
+    def queued_count(self) -> int:
+        """Return the number of events waiting to be dispatched."""
+        return self._queued_count
+
+    @property
+    def running_count(self) -> int:
+        """Return the number of events being dispatched."""
+        return len(self._running_tasks)
+
+    def classify(self, github_event: GitHubEvent) -> EventPriority:
+        """Pick a priority class for the event."""
+        event_action = github_event.payload.get('action')
+        if event_action is not None:
+            with_action = f'{github_event.name!s}.{event_action!s}'
+            if with_action in self.event_priorities:
+                return self.event_priorities[with_action]
+
+        return self.event_priorities.get(
+            github_event.name, EventPriority.NORMAL,
+        )
+
+    def submit(
+            self, github_event: GitHubEvent,
+            dispatch: Callable[[], Awaitable[Any]],
+    ) -> bool:
+        """Schedule dispatching the event.
+
+        :param github_event: the event to be dispatched
+        :param dispatch: a callable returning the dispatch coroutine
+
+        :returns: whether the event has been accepted rather than shed
+        """
+        queued_dispatch = _QueuedDispatch(
+            github_event, dispatch,
+            self.classify(github_event), installation_key(github_event),
+        )
+        self.metrics[queued_dispatch.priority].enqueued += 1
+
+        if self._is_closed:
+            logger.warning(
+                'Rejecting event "%s" since the scheduler is shutting down',
+                github_event.name,
+            )
+            return False
+
+        if (
+                self.queued_count >= self.max_queue_size
+                and not self._shed_for(queued_dispatch)
+        ):
+            return False
+
+        self._enqueue(queued_dispatch)
+        self._fill_running_slots()
+        return True
+
+    def _get_installation_state(
+            self, installation_id: Optional[int],
+    ) -> _InstallationState:
+        try:
+            return self._installations[installation_id]
+        except KeyError:
+            pass
+
+        # NOTE: A returning installation starts on par with the busy
+        # NOTE: ones rather than with the credit for the idle time.
+        system_virtual_time = min(
+            (i.virtual_time for i in self._installations.values()),
+            default=0,
+        )
+        installation_state = _InstallationState(
+            weight=self.installation_weights.get(
+                installation_id, 1,  # type: ignore[arg-type]
+            ),
+            virtual_time=system_virtual_time,
+        )
+        self._installations[installation_id] = installation_state
+        return installation_state
+
+    def _forget_idle_installation(
+            self, installation_id: Optional[int],
+    ) -> None:
+        installation_state = self._installations[installation_id]
+        if (
+                not installation_state.queued_events
+                and not installation_state.running_events
+        ):
+            del self._installations[installation_id]
+
+    def _enqueue(self, queued_dispatch: _QueuedDispatch) -> None:
+        installation_id = queued_dispatch.installation_id
+        self._get_installation_state(installation_id).queued_events += 1
+        self._queues[queued_dispatch.priority].setdefault(
+            installation_id, deque(),
+        ).append(queued_dispatch)
+        self._queued_count += 1
+
+    def _dequeue(
+            self, priority: EventPriority, installation_id: Optional[int],
+            *, newest: bool = False,
+    ) -> _QueuedDispatch:
+        installation_queue = self._queues[priority][installation_id]
+        queued_dispatch = (
+            installation_queue.pop() if newest
+            else installation_queue.popleft()
+        )
+        if not installation_queue:
+            del self._queues[priority][installation_id]
+        self._installations[installation_id].queued_events -= 1
+        self._queued_count -= 1
+        return queued_dispatch
+
+    def _record_shed(self, queued_dispatch: _QueuedDispatch) -> None:
+        self.metrics[queued_dispatch.priority].shed += 1
+        logger.warning(
+            'Shedding event "%s" of %s priority from installation %s: '
+            '%s events are queued',
+            queued_dispatch.github_event.name,
+            queued_dispatch.priority.name,
+            queued_dispatch.installation_id,
+            self.queued_count,
+        )
+
+    def _shed_for(self, queued_dispatch: _QueuedDispatch) -> bool:
+        """Drop an event to fit the new one into the queue.
+
+        The victim is the newest event of the installation having the
+        most of the queued events in the least urgent sheddable class.
+
+        :returns: whether the new event may be enqueued
+        """
+        for victim_priority in sorted(self.sheddable_priorities, reverse=True):
+            if victim_priority <= queued_dispatch.priority:
+                break
+            class_queues = self._queues[victim_priority]
+            if not class_queues:
+                continue
+
+            victim_installation_id = max(
+                class_queues, key=lambda i: len(class_queues[i]),
+            )
+            self._record_shed(
+                self._dequeue(
+                    victim_priority, victim_installation_id, newest=True,
+                ),
+            )
+            self._forget_idle_installation(victim_installation_id)
+            return True
+
+        if queued_dispatch.priority in self.sheddable_priorities:
+            self._record_shed(queued_dispatch)
+            return False
+
+        # The non-sheddable classes are allowed to exceed the limit
+        return True
+
+    def _has_installation_capacity(
+            self, installation_id: Optional[int],
+    ) -> bool:
+        return (
+            not self.max_concurrency_per_installation
+            or self._installations[installation_id].running_events
+            < self.max_concurrency_per_installation
+        )
+
+    def _pop_next(self) -> Optional[_QueuedDispatch]:
+        """Return the most urgent and the fairest queued event, if any."""
+        for priority in sorted(self._queues):
+            eligible_installations = [
+                installation_id
+                for installation_id in self._queues[priority]
+                if self._has_installation_capacity(installation_id)
+            ]
+            if not eligible_installations:
+                continue
+
+            installation_id = min(
+                eligible_installations,
+                key=lambda i: self._installations[i].virtual_time,
+            )
+            return self._dequeue(priority, installation_id)
+        return None
+
+    def _has_free_slots(self) -> bool:
+        return (
+            not self.max_concurrency
+            or len(self._running_tasks) < self.max_concurrency
+        )
+
+    def _fill_running_slots(self) -> None:
+        """Start dispatching the queued events while there's capacity."""
+        while self._has_free_slots():
+            queued_dispatch = self._pop_next()
+            if queued_dispatch is None:
+                return
+
+            installation_state = self._installations[
+                queued_dispatch.installation_id
+            ]
+            installation_state.running_events += 1
+            installation_state.virtual_time += 1 / installation_state.weight
+
+            dispatch_task = asyncio.create_task(
+                self._run_dispatch(queued_dispatch),
+            )
+            self._running_tasks[dispatch_task] = queued_dispatch
+            dispatch_task.add_done_callback(
+                partial(
+                    self._on_dispatch_done, queued_dispatch.installation_id,
+                ),
+            )
+
+    async def _run_dispatch(self, queued_dispatch: _QueuedDispatch) -> Any:
+        queue_time = time.monotonic() - queued_dispatch.enqueued_at
+        self.metrics[queued_dispatch.priority].record_queue_time(queue_time)
+        logger.debug(
+            'Event "%s" of %s priority from installation %s '
+            'has spent %.3fs in queue',
+            queued_dispatch.github_event.name,
+            queued_dispatch.priority.name,
+            queued_dispatch.installation_id,
+            queue_time,
+        )
+        return await queued_dispatch.dispatch()
+
+    def _on_dispatch_done(
+            self, installation_id: Optional[int],
+            dispatch_task: asyncio.Task[Any],
+    ) -> None:
+        self._running_tasks.pop(dispatch_task, None)
+        self._installations[installation_id].running_events -= 1
+        self._forget_idle_installation(installation_id)
+        if not dispatch_task.cancelled() and dispatch_task.exception():
+            logger.error(
+                'Event dispatch has failed unexpectedly',
+                exc_info=dispatch_task.exception(),
+            )
+        self._fill_running_slots()
+
+    async def drain(self, grace_period: float) -> DrainReport:
+        """Stop accepting events and finish handling the submitted ones.
+
+        The queued events keep being dispatched as usual until the grace
+        period is over. After that, the unfinished handlers get
+        cancelled and the rest of the queue is dropped.
+
+        :param float grace_period: seconds to wait for the handlers
+        """
+        self._is_closed = True
+        drain_started_at = time.monotonic()
+        drain_deadline = drain_started_at + grace_period
+        completed_count = 0
+
+        while self._running_tasks:
+            running_tasks = set(self._running_tasks)
+            done_tasks, _pending_tasks = await asyncio.wait(
+                running_tasks,
+                timeout=max(drain_deadline - time.monotonic(), 0),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if not done_tasks:
+                break  # The grace period is over
+            completed_count += len(done_tasks)
+
+        abandoned_events: List[GitHubEvent] = []
+        for priority, class_queues in self._queues.items():
+            for installation_id in list(class_queues):
+                while installation_id in class_queues:
+                    abandoned_events.append(
+                        self._dequeue(priority, installation_id).github_event,
+                    )
+
+        for installation_id in list(self._installations):
+            self._forget_idle_installation(installation_id)
+
+        cancelled_tasks = list(self._running_tasks.items())
+        for dispatch_task, queued_dispatch in cancelled_tasks:
+            abandoned_events.append(queued_dispatch.github_event)
+            dispatch_task.cancel()
+        if cancelled_tasks:
+            await asyncio.wait([task for task, _dispatch in cancelled_tasks])
+
+        return DrainReport(
+            duration=time.monotonic() - drain_started_at,
+            completed_count=completed_count,
+            abandoned_events=tuple(abandoned_events),
+        )
+
+    def metrics_snapshot(self) -> Mapping[str, Mapping[str, float]]:
+        """Return the queueing stats per priority class name."""
+        return {
+            priority.name.lower(): {
+                **attr.asdict(class_metrics),
+                'mean_queue_time': class_metrics.mean_queue_time,
+                'queued': sum(map(len, self._queues[priority].values())),
+            }
+            for priority, class_metrics in self.metrics.items()
+        }
+
+
+def make_dispatch_scheduler(
+        server_config: WebServerConfig,
+) -> EventDispatchScheduler:
+    """Construct a dispatch scheduler as set up by the web-server config."""
+    return EventDispatchScheduler(
+        max_concurrency=server_config.dispatch_concurrency,
+        max_queue_size=server_config.dispatch_max_queue_size,
+        event_priorities=server_config.dispatch_event_priorities,
+        sheddable_priorities=server_config.dispatch_sheddable_priorities,
+        max_concurrency_per_installation=(
+            server_config.dispatch_installation_concurrency
+        ),
+        installation_weights=server_config.dispatch_installation_weights,
+    )
@@ -3,7 +3,7 @@
 import asyncio
 import logging
 import typing
-from functools import wraps
+from functools import partial, wraps
 from http import HTTPStatus
 
 from aiohttp import web
@@ -14,6 +14,8 @@ from gidgethub.sansio import validate_event as validate_webhook_payload
 from ...github.models.events import GidgetHubWebhookEvent
 # pylint: disable=relative-beyond-top-level,import-error
 from ...routing.webhooks_dispatcher import route_github_event
+from .dedup import WebhookEventDeduplicator
+from .scheduler import EventDispatchScheduler
 
 
 __all__ = ('route_github_webhook_event',)
@@ -104,7 +106,10 @@ def validate_allowed_http_methods(*allowed_methods: str):
 
     def decorator(wrapped_function):
         @wraps(wrapped_function)
-        async def wrapper(request, *, github_app, webhook_secret=None):
+        async def wrapper(
+                request, *, github_app, webhook_secret=None,
+                **dispatch_kwargs,
+        ):
             if request.method not in _allowed_methods:
                 raise web.HTTPMethodNotAllowed(
                     method=request.method,
@@ -114,6 +119,7 @@ def validate_allowed_http_methods(*allowed_methods: str):
                 request,
                 github_app=github_app,
                 webhook_secret=webhook_secret,
+                **dispatch_kwargs,
             )
         return wrapper
     return decorator
@@ -122,24 +128,68 @@ def validate_allowed_http_methods(*allowed_methods: str):
 def webhook_request_to_event(wrapped_function):
     """Pass event extracted from request into the wrapped function."""
     @wraps(wrapped_function)
-    async def wrapper(request, *, github_app, webhook_secret=None):
+    async def wrapper(
+            request, *, github_app, webhook_secret=None,
+            **dispatch_kwargs,
+    ):
         event = await get_event_from_request(request, webhook_secret)
         return await wrapped_function(
             github_event=event, github_app=github_app,
+            **dispatch_kwargs,
         )
     return wrapper
 
 
 @validate_allowed_http_methods('POST')
 @webhook_request_to_event
-async def route_github_webhook_event(*, github_event, github_app):
-    """Dispatch incoming webhook events to corresponding handlers."""
-    asyncio.create_task(
-        route_github_event(
-            github_event=github_event,
-            github_app=github_app,
-        ),
+async def route_github_webhook_event(
+        *, github_event, github_app,
+        event_deduplicator: typing.Optional[WebhookEventDeduplicator] = None,
+        dispatch_scheduler: typing.Optional[EventDispatchScheduler] = None,
+        dispatch_deadline: typing.Optional[float] = None,
+):
+    """Dispatch incoming webhook events to corresponding handlers.
+
+    Acknowledge the redelivered events without dispatching them again
+    if an ``event_deduplicator`` is supplied. Queue the events by their
+    priority if a ``dispatch_scheduler`` is supplied and reject the ones
+    it sheds or gets while shutting down. Cancel the handlers running
+    longer than ``dispatch_deadline`` seconds.
+    """
+    if (
+            event_deduplicator is not None
+            and event_deduplicator.is_duplicate(github_event)
+    ):
+        logger.info(
+            'Skipping X-GitHub-Event=%s with X-GitHub-Delivery=%s '
+            'since it has already been received',
+            github_event.name,
+            github_event.delivery_id,
+        )
+        return web.Response(
+            text='OK: GitHub event has already been received before, '
+            f'skipping it. It is {github_event!r}',
+        )
+
+    dispatch_event = partial(
+        route_github_event,
+        github_event=github_event,
+        github_app=github_app,
+        deadline=dispatch_deadline,
     )
+    if dispatch_scheduler is None:
+        asyncio.create_task(dispatch_event())
+    elif not dispatch_scheduler.submit(github_event, dispatch_event):
+        # NOTE: Failing the delivery lets one redeliver it from the
+        # NOTE: GitHub UI once the overload is over. The redelivery
+        # NOTE: has the same ID so it must not be deemed a duplicate.
+        if event_deduplicator is not None:
+            event_deduplicator.forget(github_event)
+        raise web.HTTPServiceUnavailable(
+            text='GitHub event has been rejected due to the overload '
+            f'or shutdown. It is {github_event!r}',
+        )
+
     event_ack_msg = (
         'GitHub event received and scheduled for processing. '
         f'It is {github_event!r}'
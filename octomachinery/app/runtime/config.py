@@ -19,3 +19,43 @@ class RuntimeConfig:  # pylint: disable=too-few-public-methods
         converter=lambda val: detect_env_mode() if val == 'auto' else val,
         validator=attr.validators.in_(('app', 'action')),
     )
+    sync_handler_threads = environ.var(
+        0, name='OCTOMACHINERY_SYNC_HANDLER_THREADS', converter=int,
+    )
+    """Threads for blocking event handlers; 0 picks a default."""
+    config_cache_size = environ.var(
+        16 * 1024 * 1024, name='OCTOMACHINERY_CONFIG_CACHE_SIZE',
+        converter=int,
+    )
+    """Bytes of installation config files to keep; 0 disables caching."""
+    repo_snapshots_dir = environ.var(
+        None, name='OCTOMACHINERY_REPO_SNAPSHOTS_DIR',
+    )
+    """Where to keep repository tarballs; a temporary dir if unset."""
+    repo_snapshots_size = environ.var(
+        1024 * 1024 * 1024, name='OCTOMACHINERY_REPO_SNAPSHOTS_SIZE',
+        converter=int,
+    )
+    """Bytes of decompressed repository tarballs to keep on disk."""
+    immutable_cache_size = environ.var(
+        64 * 1024 * 1024, name='OCTOMACHINERY_IMMUTABLE_CACHE_SIZE',
+        converter=int,
+    )
+    """Bytes of SHA-addressed API responses to keep in memory."""
+    immutable_cache_dir = environ.var(
+        None, name='OCTOMACHINERY_IMMUTABLE_CACHE_DIR',
+    )
+    """Where to persist SHA-addressed API responses across restarts."""
+    immutable_cache_disk_size = environ.var(
+        1024 * 1024 * 1024, name='OCTOMACHINERY_IMMUTABLE_CACHE_DISK_SIZE',
+        converter=int,
+    )
+    """Bytes of SHA-addressed API responses to keep on disk."""
+    route_manifest_path = environ.var(
+        None, name='OCTOMACHINERY_ROUTE_MANIFEST',
+    )
+    """A YAML/JSON file mapping events to lazily imported handlers."""
+    route_entry_points = environ.bool_var(
+        False, name='OCTOMACHINERY_ROUTE_ENTRY_POINTS',
+    )
+    """Whether to route events to the handlers listed in entry points."""
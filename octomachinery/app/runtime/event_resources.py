@@ -0,0 +1,87 @@
+"""Common resources the event handlers may declare.
+
+They are meant to be used with
+:py:func:`~octomachinery.runtime.resources.inject_resources`.
+"""
+
+from __future__ import annotations
+
+import typing
+
+# pylint: disable=relative-beyond-top-level
+from ...routing.event_keys import pull_request_key
+# pylint: disable=relative-beyond-top-level
+from ...runtime.context import RUNTIME_CONTEXT
+# pylint: disable=relative-beyond-top-level
+from ...runtime.resources import EventResource
+from .installation_utils import get_installation_config
+from .pull_requests import get_pull_request_files_index
+
+
+if typing.TYPE_CHECKING:
+    # pylint: disable=relative-beyond-top-level
+    from ...github.models.events import GitHubEvent
+
+
+__all__ = (
+    'INSTALLATION_CLIENT',
+    'PULL_REQUEST',
+    'PULL_REQUEST_FILES',
+    'installation_config',
+)
+
+
+def _get_pull_request_url(event: GitHubEvent) -> str:
+    """Return the API URL of the PR the event is about.
+
+    :raises LookupError: if the event isn't about a PR
+    """
+    repo_slug, pr_number = pull_request_key(event)
+    if repo_slug is None or pr_number is None:
+        raise LookupError(f'Event {event.name!s} is not about a pull request')
+    return f'/repos/{repo_slug!s}/pulls/{pr_number!s}'
+
+
+async def _get_installation_client(event: GitHubEvent) -> typing.Any:
+    return RUNTIME_CONTEXT.app_installation_client
+
+
+async def _get_pull_request(event: GitHubEvent) -> typing.Any:
+    return await RUNTIME_CONTEXT.app_installation_client.getitem(
+        _get_pull_request_url(event),
+    )
+
+
+async def _get_pull_request_files(event: GitHubEvent) -> typing.Any:
+    _repo_slug, pr_number = pull_request_key(event)
+    pr_files_index = await get_pull_request_files_index(pr_number)
+    return list(pr_files_index.files)
+
+
+INSTALLATION_CLIENT = EventResource(
+    name='installation_client', fetch=_get_installation_client,
+)
+"""The GitHub API client of the current installation."""
+
+PULL_REQUEST = EventResource(name='pull_request', fetch=_get_pull_request)
+"""The up-to-date pull request object the event is about."""
+
+PULL_REQUEST_FILES = EventResource(
+    name='pull_request_files', fetch=_get_pull_request_files,
+)
+"""The list of files changed in the pull request the event is about."""
+
+
+def installation_config(
+        *,
+        config_name: str = 'config.yml',
+        ref: typing.Optional[str] = None,
+) -> EventResource:
+    """Declare the config of the current installation as a resource."""
+    async def get_config(event: GitHubEvent) -> typing.Any:
+        return await get_installation_config(config_name=config_name, ref=ref)
+
+    return EventResource(
+        name=f'installation_config:{config_name!s}@{ref or ""!s}',
+        fetch=get_config,
+    )
@@ -1,17 +1,35 @@
 """Utility helpers for App/Action installations."""
 
+import asyncio
+import copy
 import typing
 from base64 import b64decode
+from enum import Enum
 from http import HTTPStatus
 from io import StringIO
 from pathlib import Path
 
 import gidgethub
 
+import attr
 import yaml
 
+# pylint: disable=relative-beyond-top-level
+from ...runtime.config_cache import (
+    INSTALLATION_CONFIG_CACHE, CachedConfig, is_immutable_ref,
+)
 # pylint: disable=relative-beyond-top-level
 from ...runtime.context import RUNTIME_CONTEXT
+# pylint: disable=relative-beyond-top-level
+from ...runtime.memo import memoize_in_delivery
+# pylint: disable=relative-beyond-top-level
+from ...runtime.repo_snapshots import REPO_SNAPSHOTS, RepoSnapshot
+# pylint: disable=relative-beyond-top-level
+from ...runtime.tree_index import REPO_TREE_INDEXES, RepoTreeIndex
+
+
+_YamlSafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+"""The libyaml-backed loader if PyYAML has been built with it."""
 
 
 def _get_file_contents_from_fs(file_name: str) -> typing.Optional[str]:
@@ -60,6 +78,130 @@ async def _get_file_contents_from_api(
     return b64decode(config_response['content']).decode()
 
 
+def _get_current_repo_slug() -> str:
+    return RUNTIME_CONTEXT.github_event.payload['repository']['full_name']
+
+
+def _get_loaded_repo_snapshot(
+        ref: typing.Optional[str],
+) -> typing.Optional[RepoSnapshot]:
+    """Return the snapshot of the current repo at ref if it's present."""
+    if not is_immutable_ref(ref):
+        return None
+    return REPO_SNAPSHOTS.get(
+        _get_current_repo_slug(), typing.cast(str, ref),
+    )
+
+
+async def get_repo_snapshot(*, sha: str) -> RepoSnapshot:
+    """Get the snapshot of the whole current repository at a commit.
+
+    The tarball is downloaded once and kept in an on-disk cache. While
+    it's there, :py:func:`read_file_contents_from_repo` serves the files
+    at this commit from it too.
+
+    Usage::
+
+        >>> from octomachinery.app.runtime.installation_utils import (
+        ...     get_repo_snapshot
+        ... )
+        >>> repo_snapshot = await get_repo_snapshot(sha=commit_sha)
+        >>> for file_path in repo_snapshot.glob('*/package.json'):
+        ...     repo_snapshot.read_text(file_path)
+
+    :raises ValueError: if the ref is not a full commit SHA
+    """
+    if not is_immutable_ref(sha):
+        raise ValueError(f'{sha!s} is not a full commit SHA')
+
+    github_api = RUNTIME_CONTEXT.app_installation_client
+    repo_slug = _get_current_repo_slug()
+    return await REPO_SNAPSHOTS.load(
+        repo_slug, sha,
+        lambda: github_api.iter_response_chunks(
+            f'/repos/{repo_slug}/tarball/{sha}',
+        ),
+    )
+
+
+async def list_repo_files(
+        pattern: str = '*',
+        *,
+        sha: str,
+) -> typing.List[str]:
+    """List the current repository files matching a shell-style pattern.
+
+    The ``*`` wildcard matches ``/`` too.
+    """
+    return (await get_repo_snapshot(sha=sha)).glob(pattern)
+
+
+async def _get_tree_entries_from_api(
+        repo_slug: str, tree_sha: str, path_prefix: str = '',
+) -> typing.List[typing.Mapping[str, typing.Any]]:
+    """Read all the entries of the tree and its subtrees.
+
+    The recursive listing is truncated by GitHub for huge trees. When
+    that happens, the tree is walked level by level instead.
+    """
+    github_api = RUNTIME_CONTEXT.app_installation_client
+    git_tree = await github_api.getitem(
+        f'/repos/{repo_slug}/git/trees/{tree_sha}?recursive=1',
+    )
+    if not git_tree['truncated']:
+        return [
+            {**tree_entry, 'path': f'{path_prefix!s}{tree_entry["path"]!s}'}
+            for tree_entry in git_tree['tree']
+        ]
+
+    git_tree = await github_api.getitem(
+        f'/repos/{repo_slug}/git/trees/{tree_sha}',
+    )
+    tree_entries: typing.List[typing.Mapping[str, typing.Any]] = [
+        {**tree_entry, 'path': f'{path_prefix!s}{tree_entry["path"]!s}'}
+        for tree_entry in git_tree['tree']
+    ]
+    subtrees_entries = await asyncio.gather(
+        *(
+            _get_tree_entries_from_api(
+                repo_slug, tree_entry['sha'], f'{tree_entry["path"]!s}/',
+            )
+            for tree_entry in tree_entries
+            if tree_entry['type'] == 'tree'
+        ),
+    )
+    for subtree_entries in subtrees_entries:
+        tree_entries.extend(subtree_entries)
+    return tree_entries
+
+
+async def get_repo_tree_index(*, sha: str) -> RepoTreeIndex:
+    """Get the index of the current repository file paths at a commit.
+
+    The recursive tree of the commit is fetched once and then the
+    existence, prefix and glob queries are answered locally.
+
+    Usage::
+
+        >>> from octomachinery.app.runtime.installation_utils import (
+        ...     get_repo_tree_index
+        ... )
+        >>> repo_tree = await get_repo_tree_index(sha=commit_sha)
+        >>> repo_tree.has_match('src/*.py')
+        >>> 'setup.cfg' in repo_tree
+
+    :raises ValueError: if the ref is not a full commit SHA
+    """
+    if not is_immutable_ref(sha):
+        raise ValueError(f'{sha!s} is not a full commit SHA')
+
+    repo_slug = _get_current_repo_slug()
+    return await REPO_TREE_INDEXES.load_index(
+        repo_slug, sha,
+        lambda: _get_tree_entries_from_api(repo_slug, sha),
+    )
+
+
 async def read_file_contents_from_repo(
         *,
         file_path: str,
@@ -68,6 +210,7 @@ async def read_file_contents_from_repo(
     """Get a config object from the current installation.
 
     Read from file system checkout in case of GitHub Action env.
+    Take it from the repository snapshot at ref if it's been downloaded.
     Grab it via GitHub API otherwise.
 
     Usage::
@@ -80,10 +223,260 @@ async def read_file_contents_from_repo(
         ...     ref='bdeaf38',
         ... )
     """
+    async def read_file_contents():
+        if RUNTIME_CONTEXT.IS_GITHUB_ACTION and ref is None:
+            return _get_file_contents_from_fs(file_path)
+
+        repo_snapshot = _get_loaded_repo_snapshot(ref)
+        if repo_snapshot is not None:
+            return repo_snapshot.read_text(file_path)
+
+        return await _get_file_contents_from_api(file_path, ref)
+
+    return await memoize_in_delivery(
+        ('file-contents', file_path, ref), read_file_contents,
+    )
+
+
+class FileContentsSource(str, Enum):
+    """Where the contents of a repository file have been read from."""
+
+    CHECKOUT = 'checkout'
+    """The local checkout of the GitHub Action workspace."""
+    SNAPSHOT = 'snapshot'
+    """The downloaded repository tarball."""
+    GRAPHQL = 'graphql'
+    """A batched GraphQL API query."""
+    REST = 'rest'
+    """The REST API repository contents endpoint."""
+
+
+@attr.dataclass(frozen=True)
+class RepoFilesContents:  # pylint: disable=too-few-public-methods
+    """Contents of many repository files read at once."""
+
+    contents: typing.Dict[str, typing.Optional[str]]
+    """File contents by path, ``None`` for missing files."""
+    sources: typing.Dict[str, FileContentsSource]
+    """Sources the contents have been read from by path."""
+
+
+_GRAPHQL_FILES_PER_QUERY = 100
+"""Number of aliased blob lookups to put into a single GraphQL query."""
+
+
+def _make_files_contents_query(files_count: int) -> str:
+    """Build a GraphQL query reading the given number of blobs."""
+    expression_vars = ', '.join(
+        f'$expr{file_num:d}: String!' for file_num in range(files_count)
+    )
+    blob_lookups = '\n'.join(
+        f'file{file_num:d}: object(expression: $expr{file_num:d}) '
+        '{ ... on Blob { text isBinary isTruncated } }'
+        for file_num in range(files_count)
+    )
+    return (
+        f'query($owner: String!, $name: String!, {expression_vars!s}) '
+        '{ repository(owner: $owner, name: $name) {\n'
+        f'{blob_lookups!s}\n'
+        '} }'
+    )
+
+
+async def _get_files_contents_from_graphql(
+        file_paths: typing.Sequence[str],
+        ref: typing.Optional[str],
+) -> typing.Dict[str, typing.Optional[str]]:
+    """Read text files with one GraphQL query.
+
+    The files that are binary or too big for GraphQL are left out of
+    the result. The paths pointing at directories or submodules are
+    reported as missing files, like the snapshots do.
+    """
+    github_api = RUNTIME_CONTEXT.app_installation_client
+    repo_slug = RUNTIME_CONTEXT.github_event.payload['repository']['full_name']
+    repo_owner, _sep, repo_name = repo_slug.partition('/')
+
+    query_result = await github_api.graphql(
+        _make_files_contents_query(len(file_paths)),
+        owner=repo_owner,
+        name=repo_name,
+        **{
+            f'expr{file_num:d}': f'{ref or "HEAD"!s}:{file_path!s}'
+            for file_num, file_path in enumerate(file_paths)
+        },
+    )
+
+    files_contents: typing.Dict[str, typing.Optional[str]] = {}
+    repo_objects = query_result['repository'] or {}
+    for file_num, file_path in enumerate(file_paths):
+        repo_object = repo_objects.get(f'file{file_num:d}')
+        if repo_object is None or 'isBinary' not in repo_object:
+            # NOTE: Trees and commits don't match the `... on Blob`
+            # NOTE: fragment so they come back as empty objects.
+            files_contents[file_path] = None
+            continue
+        if repo_object['isBinary'] or repo_object['isTruncated']:
+            continue
+        files_contents[file_path] = repo_object.get('text')
+    return files_contents
+
+
+async def read_files_contents_from_repo(
+        *,
+        file_paths: typing.Iterable[str],
+        ref: typing.Optional[str] = None,
+        max_concurrency: int = 8,
+) -> RepoFilesContents:
+    """Get contents of many files from the current installation at once.
+
+    Read from file system checkout in case of GitHub Action env or
+    from the repository snapshot at ref if it's been downloaded.
+    Grab them with a single GraphQL query otherwise. The files that
+    GraphQL can't serve are requested from the contents API, with no
+    more than ``max_concurrency`` requests in flight. If the GraphQL
+    query fails, all of the files are read that way.
+
+    Usage::
+
+        >>> from octomachinery.app.runtime.installation_utils import (
+        ...     read_files_contents_from_repo
+        ... )
+        >>> repo_files = await read_files_contents_from_repo(
+        ...     file_paths=('.github/CODEOWNERS', 'setup.cfg'),
+        ...     ref='bdeaf38',
+        ... )
+        >>> repo_files.contents['setup.cfg']
+    """
+    unique_file_paths = list(dict.fromkeys(file_paths))
+
     if RUNTIME_CONTEXT.IS_GITHUB_ACTION and ref is None:
-        return _get_file_contents_from_fs(file_path)
+        return RepoFilesContents(
+            contents={
+                file_path: _get_file_contents_from_fs(file_path)
+                for file_path in unique_file_paths
+            },
+            sources=dict.fromkeys(
+                unique_file_paths, FileContentsSource.CHECKOUT,
+            ),
+        )
 
-    return await _get_file_contents_from_api(file_path, ref)
+    repo_snapshot = _get_loaded_repo_snapshot(ref)
+    if repo_snapshot is not None:
+        return RepoFilesContents(
+            contents={
+                file_path: repo_snapshot.read_text(file_path)
+                for file_path in unique_file_paths
+            },
+            sources=dict.fromkeys(
+                unique_file_paths, FileContentsSource.SNAPSHOT,
+            ),
+        )
+
+    files_contents: typing.Dict[str, typing.Optional[str]] = {}
+    files_sources: typing.Dict[str, FileContentsSource] = {}
+    for chunk_start in range(
+            0, len(unique_file_paths), _GRAPHQL_FILES_PER_QUERY,
+    ):
+        paths_chunk = unique_file_paths[
+            chunk_start:chunk_start + _GRAPHQL_FILES_PER_QUERY
+        ]
+        try:
+            graphql_contents = await _get_files_contents_from_graphql(
+                paths_chunk, ref,
+            )
+        except (gidgethub.GitHubException, TypeError):
+            # NOTE: The token may lack the GraphQL access, the query may
+            # NOTE: be rejected or the API may be broken at the moment.
+            # NOTE: The REST API is the way to go then.
+            continue
+        files_contents.update(graphql_contents)
+        files_sources.update(
+            dict.fromkeys(graphql_contents, FileContentsSource.GRAPHQL),
+        )
+
+    rest_semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def read_file_via_rest(file_path: str) -> None:
+        async with rest_semaphore:
+            files_contents[file_path] = await read_file_contents_from_repo(
+                file_path=file_path, ref=ref,
+            )
+        files_sources[file_path] = FileContentsSource.REST
+
+    await asyncio.gather(
+        *(
+            read_file_via_rest(file_path)
+            for file_path in unique_file_paths
+            if file_path not in files_contents
+        ),
+    )
+
+    return RepoFilesContents(
+        contents={
+            file_path: files_contents[file_path]
+            for file_path in unique_file_paths
+        },
+        sources={
+            file_path: files_sources[file_path]
+            for file_path in unique_file_paths
+        },
+    )
+
+
+def _parse_config(config_content: typing.Optional[str]) -> typing.Any:
+    if config_content is None:
+        return {}
+
+    return yaml.load(StringIO(config_content), Loader=_YamlSafeLoader)
+
+
+async def _get_cached_config_from_api(
+        config_path: str,
+        ref: typing.Optional[str],
+) -> typing.Any:
+    """Read the parsed config, revalidating the cached one if any."""
+    repo_slug = RUNTIME_CONTEXT.github_event.payload['repository']['full_name']
+    cache_key = repo_slug, ref, config_path
+    cached_config = INSTALLATION_CONFIG_CACHE.get(cache_key)
+    if cached_config is not None and is_immutable_ref(ref):
+        return cached_config.config
+
+    github_api = RUNTIME_CONTEXT.app_installation_client
+    try:
+        config_response, etag = await github_api.getitem_if_modified(
+            f'/repos/{repo_slug}/contents/{config_path}{{?ref}}',
+            url_vars={'ref': ref},
+            etag=None if cached_config is None else cached_config.etag,
+        )
+    except gidgethub.BadRequest as http_bad_req:
+        if http_bad_req.status_code != HTTPStatus.NOT_FOUND:
+            raise
+
+        INSTALLATION_CONFIG_CACHE.invalidate(cache_key)
+        return {}
+
+    if config_response is None:
+        return cached_config.config  # type: ignore[union-attr]
+
+    config_file_found = (
+        config_response.get('encoding') == 'base64' and
+        'content' in config_response
+    )
+    config_content = (
+        b64decode(config_response['content']).decode()
+        if config_file_found else None
+    )
+    parsed_config = _parse_config(config_content)
+    INSTALLATION_CONFIG_CACHE.put(
+        cache_key,
+        CachedConfig(
+            config=parsed_config,
+            etag=etag,
+            size=len(config_content or ''),
+        ),
+    )
+    return parsed_config
 
 
 async def get_installation_config(
@@ -94,7 +487,8 @@ async def get_installation_config(
     """Get a config object from the current installation.
 
     Read from file system checkout in case of GitHub Action env.
-    Grab it via GitHub API otherwise.
+    Grab it via GitHub API otherwise, reusing the parsed config from
+    the previous events unless GitHub says it's been modified since.
 
     Usage::
 
@@ -105,12 +499,15 @@ async def get_installation_config(
     """
     config_path = f'.github/{config_name}'
 
-    config_content = await read_file_contents_from_repo(
-        file_path=config_path,
-        ref=ref,
-    )
-
-    if config_content is None:
-        return {}
+    if RUNTIME_CONTEXT.IS_GITHUB_ACTION and ref is None:
+        return _parse_config(
+            await read_file_contents_from_repo(file_path=config_path),
+        )
 
-    return yaml.load(StringIO(config_content), Loader=yaml.SafeLoader)
+    parsed_config = await memoize_in_delivery(
+        ('installation-config', config_path, ref),
+        lambda: _get_cached_config_from_api(config_path, ref),
+    )
+    # NOTE: The parsed config is shared so the callers get their own
+    # NOTE: copies to be free to mutate.
+    return copy.deepcopy(parsed_config)
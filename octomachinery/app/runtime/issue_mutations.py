@@ -0,0 +1,157 @@
+"""Batched changes of the current issue or pull request.
+
+Within a delivery, the changes requested by all of the event handlers
+are merged and applied once the dispatch is over, so awaiting them only
+records the change. They return futures that get the outcomes of the
+API calls after the dispatch. A handler may attach callbacks to them
+but it must not await them since the dispatch waits for the handler.
+Outside of a delivery, the changes are applied right away and the
+failures are raised.
+
+Usage::
+
+    >>> from octomachinery.app.runtime.issue_mutations import add_labels
+    >>> from octomachinery.routing.routers import ConcurrentRouter
+    >>> router = ConcurrentRouter()
+    >>> @router.register('pull_request', action='opened')
+    ... async def on_pr_opened(event):
+    ...     labels_change = await add_labels('needs-triage')
+    ...     labels_change.add_done_callback(report_labels_failure)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import typing
+
+# pylint: disable=relative-beyond-top-level
+from ...routing.event_keys import pull_request_key
+# pylint: disable=relative-beyond-top-level
+from ...runtime.context import RUNTIME_CONTEXT
+# pylint: disable=relative-beyond-top-level
+from ...runtime.mutations import MutationBatch, get_mutation_batch
+
+
+__all__ = (
+    'add_assignees',
+    'add_labels',
+    'remove_assignees',
+    'remove_labels',
+    'remove_requested_reviewers',
+    'request_reviewers',
+)
+
+
+RecordMutation = typing.Callable[
+    [MutationBatch, str, int], 'asyncio.Future[None]',
+]
+
+
+async def _record_mutation(
+        record: RecordMutation,
+        number: typing.Optional[int],
+) -> asyncio.Future[None]:
+    """Put the change into the delivery batch or apply it right away.
+
+    :returns: the future of the change, already done outside \
+              of a delivery
+    :raises LookupError: if the event isn't about an issue or a PR and \
+                         the number isn't passed
+    """
+    github_event = RUNTIME_CONTEXT.github_event
+    repo_slug, event_number = pull_request_key(github_event)
+    if number is None:
+        number = event_number
+    if repo_slug is None or number is None:
+        raise LookupError(
+            f'Event {github_event.name!s} is not about an issue '
+            'or a pull request',
+        )
+
+    mutation_batch = get_mutation_batch()
+    if mutation_batch is not None and not mutation_batch.is_flushed:
+        # NOTE: The future is only resolved after all the handlers of
+        # NOTE: the delivery return so waiting for it here would hang.
+        return record(mutation_batch, repo_slug, number)
+
+    one_off_batch = MutationBatch()
+    change_waiter = record(one_off_batch, repo_slug, number)
+    await one_off_batch.flush(RUNTIME_CONTEXT.app_installation_client)
+    change_waiter.result()
+    return change_waiter
+
+
+async def add_labels(
+        *labels: str, number: typing.Optional[int] = None,
+) -> asyncio.Future[None]:
+    """Add labels to the issue or the PR of the current event."""
+    return await _record_mutation(
+        lambda batch, repo_slug, number: batch.add_labels(
+            repo_slug, number, *labels,
+        ),
+        number,
+    )
+
+
+async def remove_labels(
+        *labels: str, number: typing.Optional[int] = None,
+) -> asyncio.Future[None]:
+    """Remove labels from the issue or the PR of the current event."""
+    return await _record_mutation(
+        lambda batch, repo_slug, number: batch.remove_labels(
+            repo_slug, number, *labels,
+        ),
+        number,
+    )
+
+
+async def add_assignees(
+        *assignees: str, number: typing.Optional[int] = None,
+) -> asyncio.Future[None]:
+    """Assign users to the issue or the PR of the current event."""
+    return await _record_mutation(
+        lambda batch, repo_slug, number: batch.add_assignees(
+            repo_slug, number, *assignees,
+        ),
+        number,
+    )
+
+
+async def remove_assignees(
+        *assignees: str, number: typing.Optional[int] = None,
+) -> asyncio.Future[None]:
+    """Unassign users from the issue or the PR of the current event."""
+    return await _record_mutation(
+        lambda batch, repo_slug, number: batch.remove_assignees(
+            repo_slug, number, *assignees,
+        ),
+        number,
+    )
+
+
+async def request_reviewers(
+        *reviewers: str,
+        team_reviewers: typing.Iterable[str] = (),
+        number: typing.Optional[int] = None,
+) -> asyncio.Future[None]:
+    """Request reviews of the PR of the current event."""
+    return await _record_mutation(
+        lambda batch, repo_slug, number: batch.request_reviewers(
+            repo_slug, number, reviewers, team_reviewers,
+        ),
+        number,
+    )
+
+
+async def remove_requested_reviewers(
+        *reviewers: str,
+        team_reviewers: typing.Iterable[str] = (),
+        number: typing.Optional[int] = None,
+) -> asyncio.Future[None]:
+    """Withdraw the review requests of the PR of the current event."""
+    return await _record_mutation(
+        lambda batch, repo_slug, number: batch.remove_requested_reviewers(
+            repo_slug, number, reviewers, team_reviewers,
+        ),
+        number,
+    )
@@ -0,0 +1,158 @@
+"""Helpers for working with the pull requests of the current repo."""
+
+from __future__ import annotations
+
+import asyncio
+import typing
+
+# pylint: disable=relative-beyond-top-level
+from ...routing.event_keys import pull_request_key
+# pylint: disable=relative-beyond-top-level
+from ...runtime.context import RUNTIME_CONTEXT
+# pylint: disable=relative-beyond-top-level
+from ...runtime.pr_files_index import (
+    PULL_REQUEST_FILES_INDEXES, PullRequestFilesIndex,
+)
+# pylint: disable=relative-beyond-top-level
+from ...utils.diffs import DiffFile, DiffHunk, iter_diff_hunks
+
+
+__all__ = (
+    'get_pull_request',
+    'get_pull_request_files_index',
+    'iter_pull_request_diff_hunks',
+)
+
+
+PR_FILES_PER_PAGE = 100
+"""The page size of the PR files listing, the maximum GitHub allows."""
+
+PR_FILES_LIMIT = 3000
+"""The number of the PR files GitHub is able to list."""
+
+
+def _get_pull_request_number(pr_number: typing.Optional[int]) -> int:
+    """Return the given PR number or the one of the current event.
+
+    :raises LookupError: if the event isn't about a PR
+    """
+    if pr_number is not None:
+        return pr_number
+
+    github_event = RUNTIME_CONTEXT.github_event
+    _repo_slug, event_pr_number = pull_request_key(github_event)
+    if event_pr_number is None:
+        raise LookupError(
+            f'Event {github_event.name!s} is not about a pull request',
+        )
+    return event_pr_number
+
+
+async def get_pull_request(
+        pr_number: typing.Optional[int] = None,
+) -> typing.Mapping[str, typing.Any]:
+    """Get the pull request object of the current repository.
+
+    The PR of the current event is used unless the number is passed.
+    The one from the event payload is reused when it's there.
+    """
+    pr_number = _get_pull_request_number(pr_number)
+    event_payload = RUNTIME_CONTEXT.github_event.payload
+    payload_pull_request = event_payload.get('pull_request') or {}
+    if (
+            payload_pull_request.get('number') == pr_number
+            and 'changed_files' in payload_pull_request
+    ):
+        return payload_pull_request
+
+    repo_slug = event_payload['repository']['full_name']
+    return await RUNTIME_CONTEXT.app_installation_client.getitem(
+        f'/repos/{repo_slug}/pulls/{pr_number}',
+    )
+
+
+async def get_pull_request_files_index(
+        pr_number: typing.Optional[int] = None,
+        *,
+        max_concurrency: int = 8,
+) -> PullRequestFilesIndex:
+    """Get the index of the files changed in the pull request.
+
+    The index is shared by all the handlers and events seeing the same
+    head commit of the PR. The pages of the listing are requested in
+    parallel, with no more than ``max_concurrency`` requests in flight.
+
+    Usage::
+
+        >>> from octomachinery.app.runtime.pull_requests import (
+        ...     get_pull_request_files_index
+        ... )
+        >>> pr_files = await get_pull_request_files_index()
+        >>> for file_path in pr_files.glob('docs/*.rst'):
+        ...     for hunk in pr_files.get_patch_hunks(file_path):
+        ...         ...
+    """
+    pull_request = await get_pull_request(pr_number)
+    repo_slug = RUNTIME_CONTEXT.github_event.payload['repository']['full_name']
+    github_api = RUNTIME_CONTEXT.app_installation_client
+    pr_files_url = f'/repos/{repo_slug}/pulls/{pull_request["number"]}/files'
+    head_sha = pull_request['head']['sha']
+    pages_count = -(
+        -min(pull_request['changed_files'], PR_FILES_LIMIT)
+        // PR_FILES_PER_PAGE
+    )
+    pages_semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def get_files_page(page_number: int) -> typing.Any:
+        async with pages_semaphore:
+            return await github_api.getitem(
+                f'{pr_files_url}?per_page={PR_FILES_PER_PAGE}'
+                f'&page={page_number}',
+            )
+
+    async def list_changed_files() -> PullRequestFilesIndex:
+        files_pages = await asyncio.gather(
+            *(
+                get_files_page(page_number)
+                for page_number in range(1, pages_count + 1)
+            ),
+        )
+        return PullRequestFilesIndex(
+            head_sha,
+            (
+                changed_file
+                for files_page in files_pages
+                for changed_file in files_page
+            ),
+        )
+
+    return await PULL_REQUEST_FILES_INDEXES.load(
+        (repo_slug, pull_request['number'], head_sha), list_changed_files,
+    )
+
+
+async def iter_pull_request_diff_hunks(
+        pr_number: typing.Optional[int] = None,
+) -> typing.AsyncIterator[typing.Tuple[DiffFile, DiffHunk]]:
+    """Stream the pull request diff, parsing it hunk by hunk.
+
+    Unlike the files listing, the diff isn't limited to 3000 files and
+    has the patches that are too big for the listing. Only the hunk
+    being parsed is kept in memory.
+
+    Usage::
+
+        >>> from octomachinery.app.runtime.pull_requests import (
+        ...     iter_pull_request_diff_hunks
+        ... )
+        >>> async for diff_file, diff_hunk in iter_pull_request_diff_hunks():
+        ...     for line_number, line_text in diff_hunk.iter_added_lines():
+        ...         ...
+    """
+    pr_number = _get_pull_request_number(pr_number)
+    repo_slug = RUNTIME_CONTEXT.github_event.payload['repository']['full_name']
+    diff_chunks = RUNTIME_CONTEXT.app_installation_client.iter_diff_chunks(
+        f'/repos/{repo_slug}/pulls/{pr_number}',
+    )
+    async for file_hunk in iter_diff_hunks(diff_chunks):
+        yield file_hunk
@@ -0,0 +1,89 @@
+"""Idempotent updates of the bot's comments and commit statuses.
+
+Usage::
+
+    >>> from octomachinery.app.runtime.upserts import upsert_comment
+    >>> from octomachinery.routing.routers import ConcurrentRouter
+    >>> router = ConcurrentRouter()
+    >>> @router.register('pull_request', action='synchronize')
+    ... async def on_pr_sync(event):
+    ...     await upsert_comment('summary', '## Summary\\n\\nAll good!')
+"""
+
+import typing
+
+# pylint: disable=relative-beyond-top-level
+from ...routing.event_keys import pull_request_key
+# pylint: disable=relative-beyond-top-level
+from ...runtime.bot_items import BOT_ITEMS, UpsertOutcome
+# pylint: disable=relative-beyond-top-level
+from ...runtime.context import RUNTIME_CONTEXT
+
+
+__all__ = ('upsert_comment', 'upsert_commit_status')
+
+
+_GITHUB_ACTIONS_BOT_LOGIN = 'github-actions[bot]'
+"""The account GitHub Actions post as with the workflow token."""
+
+
+def _get_bot_login() -> str:
+    if RUNTIME_CONTEXT.IS_GITHUB_ACTION:
+        return _GITHUB_ACTIONS_BOT_LOGIN
+
+    app_installation = RUNTIME_CONTEXT.app_installation
+    if app_installation is None:
+        raise LookupError('This event occurred outside of an installation')
+    return app_installation.bot_login
+
+
+async def upsert_comment(
+        comment_key: str, body: str,
+        *,
+        number: typing.Optional[int] = None,
+) -> UpsertOutcome:
+    """Keep one comment per key up to date on the current issue or PR.
+
+    The comment is created on the first call and edited in place on
+    the subsequent ones. No API calls are made when the body is the
+    same as the last time.
+
+    Only the comments of the bot itself are updated, the ones with the
+    same key made by other apps are left alone.
+
+    :raises LookupError: if the event isn't about an issue or a PR and \
+                         the number isn't passed, or if it's happened \
+                         outside of an installation
+    """
+    github_event = RUNTIME_CONTEXT.github_event
+    repo_slug, event_number = pull_request_key(github_event)
+    if number is None:
+        number = event_number
+    if repo_slug is None or number is None:
+        raise LookupError(
+            f'Event {github_event.name!s} is not about an issue '
+            'or a pull request',
+        )
+
+    return await BOT_ITEMS.upsert_comment(
+        RUNTIME_CONTEXT.app_installation_client,
+        repo_slug, number, comment_key, body,
+        bot_login=_get_bot_login(),
+    )
+
+
+async def upsert_commit_status(
+        *,
+        sha: str,
+        context: str,
+        state: str,
+        description: typing.Optional[str] = None,
+        target_url: typing.Optional[str] = None,
+) -> UpsertOutcome:
+    """Set the status of a commit in the current repo if it's changed."""
+    repo_slug = RUNTIME_CONTEXT.github_event.payload['repository']['full_name']
+    return await BOT_ITEMS.upsert_commit_status(
+        RUNTIME_CONTEXT.app_installation_client,
+        repo_slug, sha, context,
+        state=state, description=description, target_url=target_url,
+    )
@@ -2,6 +2,11 @@
 
 import environ
 
+# pylint: disable=relative-beyond-top-level
+from ..routing.scheduler import (
+    parse_event_priorities, parse_installation_weights, parse_priority_classes,
+)
+
 
 @environ.config
 class WebServerConfig:  # pylint: disable=too-few-public-methods
@@ -9,3 +14,71 @@ class WebServerConfig:  # pylint: disable=too-few-public-methods
 
     host = environ.var('0.0.0.0', name='HOST')
     port = environ.var(8080, name='PORT', converter=int)
+
+    dedup_ttl = environ.var(
+        0, name='OCTOMACHINERY_WEBHOOK_DEDUP_TTL', converter=float,
+    )
+    """Seconds to remember webhook deliveries for; 0 disables it.
+
+    Deduplication is off by default. Set it to a positive number of
+    seconds, like ``3600``, to skip the redeliveries of the same
+    webhook events.
+    """
+    dedup_max_size = environ.var(
+        10_000, name='OCTOMACHINERY_WEBHOOK_DEDUP_MAX_SIZE', converter=int,
+    )
+    """Maximum number of remembered webhook deliveries."""
+    dedup_store_path = environ.var(
+        None, name='OCTOMACHINERY_WEBHOOK_DEDUP_STORE_PATH',
+    )
+    """Directory to share the seen deliveries between workers via."""
+    dedup_by_content = environ.bool_var(
+        False, name='OCTOMACHINERY_WEBHOOK_DEDUP_BY_CONTENT',
+    )
+    """Whether to skip identical payloads arriving with new delivery IDs."""
+
+    dispatch_concurrency = environ.var(
+        0, name='OCTOMACHINERY_DISPATCH_CONCURRENCY', converter=int,
+    )
+    """Number of events handled simultaneously; 0 means unlimited."""
+    dispatch_max_queue_size = environ.var(
+        10_000, name='OCTOMACHINERY_DISPATCH_MAX_QUEUE_SIZE', converter=int,
+    )
+    """Number of queued events at which the shedding kicks in."""
+    dispatch_event_priorities = environ.var(
+        '', name='OCTOMACHINERY_DISPATCH_EVENT_PRIORITIES',
+        converter=parse_event_priorities,
+    )
+    """Priority classes of events, e.g. ``issue_comment=high,push=low``."""
+    dispatch_sheddable_priorities = environ.var(
+        'low', name='OCTOMACHINERY_DISPATCH_SHEDDABLE_PRIORITIES',
+        converter=parse_priority_classes,
+    )
+    """Priority classes that may be dropped under overload."""
+    dispatch_installation_concurrency = environ.var(
+        0, name='OCTOMACHINERY_DISPATCH_INSTALLATION_CONCURRENCY',
+        converter=int,
+    )
+    """Events of one installation handled at once; 0 means no cap."""
+    dispatch_installation_weights = environ.var(
+        '', name='OCTOMACHINERY_DISPATCH_INSTALLATION_WEIGHTS',
+        converter=parse_installation_weights,
+    )
+    """Fair share weights of installations, e.g. ``1234=4,5678=2``."""
+    dispatch_deadline = environ.var(
+        0, name='OCTOMACHINERY_DISPATCH_DEADLINE', converter=float,
+    )
+    """Seconds the event handlers may run for; 0 means unlimited."""
+    dispatch_metrics_interval = environ.var(
+        300, name='OCTOMACHINERY_DISPATCH_METRICS_INTERVAL', converter=float,
+    )
+    """Seconds between logging the dispatch queue stats; 0 disables it."""
+
+    shutdown_grace_period = environ.var(
+        30, name='OCTOMACHINERY_SHUTDOWN_GRACE_PERIOD', converter=float,
+    )
+    """Seconds to let the scheduled events finish for on shutdown."""
+    shutdown_abandoned_events_dir = environ.var(
+        None, name='OCTOMACHINERY_SHUTDOWN_ABANDONED_EVENTS_DIR',
+    )
+    """Directory to save the events unfinished on shutdown into."""
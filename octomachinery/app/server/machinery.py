@@ -1,8 +1,14 @@
 """Web-server constructors."""
 
+import asyncio
+import contextlib
 import functools
+import json
 import logging
-from typing import Union
+import pathlib
+import signal
+import uuid
+from typing import Iterable, Optional, Union
 
 import anyio
 from aiohttp import web
@@ -11,7 +17,21 @@ from aiohttp.client import ClientSession
 # pylint: disable=relative-beyond-top-level
 from ...github.api.app_client import GitHubApp
 # pylint: disable=relative-beyond-top-level
-from ...utils.asynctools import auto_cleanup_aio_tasks
+from ...github.api.immutable_cache import IMMUTABLE_RESPONSES
+# pylint: disable=relative-beyond-top-level
+from ...github.models.events import GitHubEvent
+# pylint: disable=relative-beyond-top-level
+from ...runtime.config_cache import INSTALLATION_CONFIG_CACHE
+# pylint: disable=relative-beyond-top-level
+from ...runtime.repo_snapshots import REPO_SNAPSHOTS
+# pylint: disable=relative-beyond-top-level
+from ...utils.asynctools import (
+    auto_cleanup_aio_tasks, configure_sync_thread_pool,
+)
+# pylint: disable=relative-beyond-top-level
+from ..routing.dedup import WebhookEventDeduplicator, make_event_deduplicator
+# pylint: disable=relative-beyond-top-level
+from ..routing.scheduler import EventDispatchScheduler, make_dispatch_scheduler
 # pylint: disable=relative-beyond-top-level
 from ..routing.webhooks_dispatcher import route_github_webhook_event
 
@@ -38,9 +58,10 @@ async def get_server_runner(http_handler):
     aiohttp_server = web.Server(http_handler)
     aiohttp_server_runner = web.ServerRunner(
         aiohttp_server,
-        # handle SIGTERM and SIGINT
-        # by raising aiohttp.web_runner.GracefulExit exception
-        handle_signals=True,
+        # NOTE: SIGTERM and SIGINT are handled by
+        # NOTE: `_wait_for_shutdown_signal()` instead so that
+        # NOTE: the scheduled events get a chance to finish.
+        handle_signals=False,
     )
     await aiohttp_server_runner.setup()
     return aiohttp_server_runner
@@ -72,20 +93,76 @@ async def _launch_web_server_and_wait_until_it_stops(
 ) -> None:
     """Start a web server.
 
-    And then block until SIGINT comes in.
+    And then block until SIGINT or SIGTERM comes in.
     """
+    dispatch_scheduler = make_dispatch_scheduler(web_server_config)
     aiohttp_server_runner = await setup_server_runner(
         github_app, webhook_secret,
+        event_deduplicator=make_event_deduplicator(web_server_config),
+        dispatch_scheduler=dispatch_scheduler,
+        dispatch_deadline=web_server_config.dispatch_deadline or None,
     )
     aiohttp_tcp_site = await start_tcp_site(
         web_server_config, aiohttp_server_runner,
     )
-    await _stop_site_on_cancel(aiohttp_tcp_site)
+    metrics_logging_task = (
+        asyncio.create_task(
+            _log_dispatch_metrics_periodically(
+                dispatch_scheduler,
+                web_server_config.dispatch_metrics_interval,
+            ),
+        ) if web_server_config.dispatch_metrics_interval > 0
+        else None
+    )
+    try:
+        await _stop_site_on_cancel(
+            aiohttp_tcp_site, dispatch_scheduler,
+            grace_period=web_server_config.shutdown_grace_period,
+            abandoned_events_dir=(
+                web_server_config.shutdown_abandoned_events_dir
+            ),
+        )
+    finally:
+        if metrics_logging_task is not None:
+            metrics_logging_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await metrics_logging_task
+
+
+def log_dispatch_metrics(dispatch_scheduler: EventDispatchScheduler) -> None:
+    """Log the queueing stats of each priority class."""
+    for priority_name, class_metrics in (
+            dispatch_scheduler.metrics_snapshot().items()
+    ):
+        logger.info(
+            'Dispatch queue of %s priority: %d enqueued, %d dispatched, '
+            '%d shed, %d queued; queue time mean %.3fs, max %.3fs',
+            priority_name,
+            class_metrics['enqueued'],
+            class_metrics['dispatched'],
+            class_metrics['shed'],
+            class_metrics['queued'],
+            class_metrics['mean_queue_time'],
+            class_metrics['max_queue_time'],
+        )
+
+
+async def _log_dispatch_metrics_periodically(
+        dispatch_scheduler: EventDispatchScheduler,
+        interval: float,
+) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        log_dispatch_metrics(dispatch_scheduler)
 
 
 async def setup_server_runner(
         github_app: GitHubApp,
         webhook_secret: Union[str, None] = None,
+        *,
+        event_deduplicator: Optional[WebhookEventDeduplicator] = None,
+        dispatch_scheduler: Optional[EventDispatchScheduler] = None,
+        dispatch_deadline: Optional[float] = None,
 ) -> web.ServerRunner:
     """Return a server runner with a webhook dispatcher set up."""
     return await get_server_runner(
@@ -93,18 +170,123 @@ async def setup_server_runner(
             route_github_webhook_event,
             github_app=github_app,
             webhook_secret=webhook_secret,
+            event_deduplicator=event_deduplicator,
+            dispatch_scheduler=dispatch_scheduler,
+            dispatch_deadline=dispatch_deadline,
         ),
     )
 
 
-async def _stop_site_on_cancel(aiohttp_tcp_site):
-    """Stop the server after SIGINT."""
+async def _wait_for_shutdown_signal():
+    """Block until SIGINT or SIGTERM comes in."""
     try:
+        async with anyio.receive_signals(
+                signal.SIGINT, signal.SIGTERM,
+        ) as shutdown_signals:
+            async for signal_number in shutdown_signals:
+                logger.info(
+                    'Got %s, shutting down...',
+                    signal.Signals(signal_number).name,
+                )
+                return
+    except NotImplementedError:
+        # NOTE: There's no signal handling in the event loop on Windows
+        # NOTE: so we rely on getting cancelled on KeyboardInterrupt.
         await anyio.sleep(float('inf'))
+
+
+def _persist_abandoned_events(
+        abandoned_events: Iterable[GitHubEvent],
+        abandoned_events_dir: str,
+) -> None:
+    """Save events as fixture files that ``receive`` CLI can replay."""
+    events_dir_path = pathlib.Path(abandoned_events_dir)
+    events_dir_path.mkdir(parents=True, exist_ok=True)
+
+    for github_event in abandoned_events:
+        delivery_id = (
+            getattr(github_event, 'delivery_id', None) or uuid.uuid4()
+        )
+        http_headers = [
+            {'x-github-delivery': str(delivery_id)},
+            {'x-github-event': github_event.name},
+        ]
+        event_fixture_path = events_dir_path / f'{delivery_id!s}.jsonl'
+        event_fixture_path.write_text(
+            f'{json.dumps(http_headers)!s}\n'
+            f'{json.dumps(github_event.payload)!s}\n',
+            encoding='utf-8',
+        )
+        logger.info(
+            'Saved abandoned event "%s" to %s',
+            github_event.name, event_fixture_path,
+        )
+
+
+async def _drain_dispatch_scheduler(
+        dispatch_scheduler: EventDispatchScheduler,
+        *,
+        grace_period: float,
+        abandoned_events_dir: Optional[str],
+) -> None:
+    """Let the scheduled events finish and report the ones that don't."""
+    logger.info(
+        'Waiting up to %ss for %s in-flight and %s queued events...',
+        grace_period,
+        dispatch_scheduler.running_count,
+        dispatch_scheduler.queued_count,
+    )
+    drain_report = await dispatch_scheduler.drain(grace_period)
+    logger.info(
+        'Drained the event dispatch queue in %.3fs: '
+        '%s events completed, %s events abandoned',
+        drain_report.duration,
+        drain_report.completed_count,
+        len(drain_report.abandoned_events),
+    )
+
+    for github_event in drain_report.abandoned_events:
+        logger.warning(
+            'Abandoned event "%s" (Delivery ID: %s)',
+            github_event.name,
+            getattr(github_event, 'delivery_id', None),
+        )
+
+    if drain_report.abandoned_events and abandoned_events_dir is not None:
+        _persist_abandoned_events(
+            drain_report.abandoned_events, abandoned_events_dir,
+        )
+
+
+async def _stop_site_on_cancel(
+        aiohttp_tcp_site,
+        dispatch_scheduler: Optional[EventDispatchScheduler] = None,
+        *,
+        grace_period: float = 0,
+        abandoned_events_dir: Optional[str] = None,
+):
+    """Stop the server after SIGINT or SIGTERM.
+
+    Then, let the scheduled events finish within the grace period.
+    """
+    try:
+        await _wait_for_shutdown_signal()
     except anyio.get_cancelled_exc_class():
+        logger.info('The server has been cancelled, shutting down...')
+
+    # NOTE: Shielding the cleanup so that it's not interrupted
+    # NOTE: in case of the shutdown being caused by cancellation.
+    async with anyio.open_cancel_scope(shield=True):
         logger.info(' Stopping the server '.center(50, '='))
         await aiohttp_tcp_site.stop()
 
+        if dispatch_scheduler is not None:
+            await _drain_dispatch_scheduler(
+                dispatch_scheduler,
+                grace_period=grace_period,
+                abandoned_events_dir=abandoned_events_dir,
+            )
+
 
 def log_webhook_secret_status(webhook_secret):
     """Log HTTP body signature verification behavior."""
@@ -126,6 +308,15 @@ async def run_forever(config, event_routers):
     """Spawn an HTTP server in anyio context."""
     logger.debug('The GitHub App env is set to `%s`', config.runtime.env)
     log_webhook_secret_status(config.github.webhook_secret)
+    configure_sync_thread_pool(config.runtime.sync_handler_threads or None)
+    INSTALLATION_CONFIG_CACHE.max_size = config.runtime.config_cache_size
+    REPO_SNAPSHOTS.cache_dir = config.runtime.repo_snapshots_dir
+    REPO_SNAPSHOTS.max_size = config.runtime.repo_snapshots_size
+    IMMUTABLE_RESPONSES.max_size = config.runtime.immutable_cache_size
+    IMMUTABLE_RESPONSES.cache_dir = config.runtime.immutable_cache_dir
+    IMMUTABLE_RESPONSES.max_disk_size = (
+        config.runtime.immutable_cache_disk_size
+    )
     async with ClientSession() as aiohttp_client_session:
         github_app = GitHubApp(
             config.github,
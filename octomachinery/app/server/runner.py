@@ -10,9 +10,9 @@ from anyio import run as run_until_complete
 import attr
 
 # pylint: disable=relative-beyond-top-level
-from ..config import BotAppConfig
+from ...routing.manifest import get_default_event_routers
 # pylint: disable=relative-beyond-top-level
-from ..routing import WEBHOOK_EVENTS_ROUTER
+from ..config import BotAppConfig
 # pylint: disable=relative-beyond-top-level
 from ..routing.abc import OctomachineryRouterBase
 # pylint: disable=relative-beyond-top-level
@@ -33,9 +33,6 @@ def run(
         event_routers: Optional[Iterable[OctomachineryRouterBase]] = None,
 ):
     """Start up a server using CLI args for host and port."""
-    if event_routers is None:
-        event_routers = {WEBHOOK_EVENTS_ROUTER}
-
     if (
             config is not None and
             (name is not None or version is not None or url is not None)
@@ -67,6 +64,13 @@ def run(
             config.github.app_version,
         )
 
+    if event_routers is None:
+        runtime_config = config.runtime  # pylint: disable=no-member
+        event_routers = get_default_event_routers(
+            runtime_config.route_manifest_path,
+            use_entry_points=runtime_config.route_entry_points,
+        )
+
     try:
         run_until_complete(run_server_forever, config, event_routers)
     except (GracefulExit, KeyboardInterrupt):
@@ -3,6 +3,7 @@
 
 import asyncio
 import importlib
+import json
 import os
 import pathlib
 from functools import wraps
@@ -18,6 +19,8 @@ import click
 # pylint: disable=relative-beyond-top-level
 from ..app.config import BotAppConfig
 # pylint: disable=relative-beyond-top-level
+from ..app.routing import WEBHOOK_EVENTS_ROUTER
+# pylint: disable=relative-beyond-top-level
 from ..app.routing.abc import OctomachineryRouterBase
 # pylint: disable=relative-beyond-top-level
 from ..app.routing.webhooks_dispatcher import route_github_event
@@ -28,6 +31,8 @@ from ..github.entities.action import GitHubAction
 # pylint: disable=relative-beyond-top-level
 # pylint: disable=relative-beyond-top-level
 from ..github.models.events import GitHubEvent, GitHubWebhookEvent
+# pylint: disable=relative-beyond-top-level
+from ..routing.manifest import generate_route_manifest
 
 
 @click.group()
@@ -145,6 +150,40 @@ async def receive(  # pylint: disable=too-many-arguments,too-many-locals
     )
 
 
+@cli.command('route-manifest')
+@click.option('--entrypoint-module', '-m', prompt=False, type=str)
+@click.option(
+    '--event-router', '-r',
+    'event_routers',
+    multiple=True,
+    prompt=False,
+    type=str,
+)
+@click.pass_context
+def route_manifest(
+        ctx: click.Context,
+        entrypoint_module: str,
+        event_routers: Iterable[str],
+) -> None:
+    """Print a lazy loading route manifest of the event routers."""
+    target_routers = set(
+        load_event_routers(
+            entrypoint_module,
+            # pylint: disable=fixme
+            event_routers,  # type: ignore[arg-type]  # FIXME: typing
+        ),
+    ) or {WEBHOOK_EVENTS_ROUTER}
+
+    try:
+        route_manifest_map = generate_route_manifest(
+            *target_routers,  # type: ignore[arg-type]
+        )
+    except ValueError as val_err:
+        ctx.fail(click.style(str(val_err), fg='red'))
+
+    click.echo(json.dumps(route_manifest_map, indent=2, sort_keys=True))
+
+
 def load_event_routers(
         entrypoint_module: Union[str, None] = None,
         event_routers: Union[FrozenSet[str], Set[str]] = frozenset(),
@@ -63,6 +63,7 @@ class GitHubApp:
         """Dispatch ``github_event`` into the embedded routers."""
         return await github_event.dispatch_via(
             *self._event_routers,  # pylint: disable=not-an-iterable
+            flatten=self._config.flatten_routes,
         )
 
     async def log_installs_list(self) -> None:
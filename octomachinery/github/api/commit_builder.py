@@ -0,0 +1,284 @@
+"""Commits of many file changes at once through the Git Data API.
+
+Updating files one by one via the contents API makes a commit and a
+few requests per file. The builder stages the changes in memory and
+then makes a single tree, a single commit and moves the branch to it.
+Blobs are only created for the files that can't be inlined into the
+tree, concurrently, and the ones staged from disk are streamed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import logging
+import pathlib
+import typing
+
+import attr
+
+
+__all__ = (
+    'GitCommitBuilder',
+    'GitFileMode',
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+class GitFileMode:
+    """File modes accepted in Git trees."""
+
+    FILE = '100644'
+    EXECUTABLE = '100755'
+    SYMLINK = '120000'
+
+
+_BLOB_READ_SIZE = 3 * 64 * 1024
+"""How much of a file to base64-encode at once while streaming it.
+
+It's a multiple of 3 so that the encoded chunks can be concatenated.
+"""
+
+
+@attr.dataclass(frozen=True)
+class _StagedFile:
+    """The new state of a file in the commit."""
+
+    mode: str
+    """The Git file mode."""
+    contents: typing.Optional[bytes] = None
+    """The file contents held in memory."""
+    local_path: typing.Optional[pathlib.Path] = None
+    """The file on disk to upload the contents from."""
+
+
+def _read_file_chunk(
+        local_path: pathlib.Path, offset: int, size: int,
+) -> bytes:
+    with local_path.open('rb') as local_file:
+        local_file.seek(offset)
+        return local_file.read(size)
+
+
+async def _iter_blob_payload(
+        local_path: pathlib.Path,
+) -> typing.AsyncIterator[bytes]:
+    """Produce the JSON body of a blob request reading the file lazily."""
+    loop = asyncio.get_running_loop()
+    yield b'{"encoding":"base64","content":"'
+    offset = 0
+    while True:
+        file_chunk = await loop.run_in_executor(
+            None, _read_file_chunk, local_path, offset, _BLOB_READ_SIZE,
+        )
+        if not file_chunk:
+            break
+        offset += len(file_chunk)
+        yield base64.b64encode(file_chunk)
+    yield b'"}'
+
+
+class GitCommitBuilder:
+    """File changes staged to be committed to a repository branch.
+
+    Usage::
+
+        >>> commit_builder = github_api.make_commit_builder('org/repo')
+        >>> commit_builder.put_file('README.md', '# Hello\\n')
+        >>> commit_builder.put_file_from_disk('dist/app.zip', '/tmp/app.zip')
+        >>> commit_builder.remove_file('obsolete.txt')
+        >>> await commit_builder.commit('Update the release', branch='main')
+    """
+
+    def __init__(
+            self, github_api: typing.Any, repo_slug: str,
+            *,
+            max_concurrency: int = 8,
+            max_inline_size: int = 64 * 1024,
+    ):
+        """Initialize GitCommitBuilder.
+
+        :param github_api: the client to make the API calls with
+        :param str repo_slug: the repository to commit to
+        :param int max_concurrency: the number of blobs to upload at once
+        :param int max_inline_size: the size of the text files to put \
+                                    right into the tree request instead \
+                                    of creating blobs for them
+        """
+        self.github_api = github_api
+        self.repo_slug = repo_slug
+        self.max_concurrency = max_concurrency
+        self.max_inline_size = max_inline_size
+        self._staged_files: typing.Dict[
+            str, typing.Optional[_StagedFile],
+        ] = {}
+
+    def __len__(self) -> int:
+        """Return the number of the staged file changes."""
+        return len(self._staged_files)
+
+    def __repr__(self):
+        """Render a class instance representation."""
+        return (
+            f'{self.__class__.__name__}('
+            f'repo_slug={self.repo_slug!r}, changes={len(self)!r})'
+        )
+
+    def put_file(
+            self, file_path: str, contents: typing.Union[bytes, str],
+            *,
+            mode: str = GitFileMode.FILE,
+    ) -> None:
+        """Stage adding or replacing the file with the given contents."""
+        if isinstance(contents, str):
+            contents = contents.encode()
+        self._staged_files[file_path.lstrip('/')] = _StagedFile(
+            mode=mode, contents=contents,
+        )
+
+    def put_file_from_disk(
+            self, file_path: str,
+            local_path: typing.Union[pathlib.Path, str],
+            *,
+            mode: str = GitFileMode.FILE,
+    ) -> None:
+        """Stage adding or replacing the file with a local file.
+
+        The local file is read when committing, in chunks, so it must
+        stay in place until then.
+        """
+        self._staged_files[file_path.lstrip('/')] = _StagedFile(
+            mode=mode, local_path=pathlib.Path(local_path),
+        )
+
+    def remove_file(self, file_path: str) -> None:
+        """Stage deleting the file."""
+        self._staged_files[file_path.lstrip('/')] = None
+
+    def _can_inline(self, staged_file: _StagedFile) -> bool:
+        if (
+                staged_file.contents is None
+                or len(staged_file.contents) > self.max_inline_size
+        ):
+            return False
+        try:
+            staged_file.contents.decode('utf-8')
+        except UnicodeDecodeError:
+            return False
+        return True
+
+    async def _create_blob(self, staged_file: _StagedFile) -> str:
+        blobs_url = f'/repos/{self.repo_slug!s}/git/blobs'
+        if staged_file.local_path is not None:
+            created_blob = await self.github_api.post_streamed(
+                blobs_url,
+                body_chunks=_iter_blob_payload(staged_file.local_path),
+            )
+        else:
+            created_blob = await self.github_api.post(
+                blobs_url,
+                data={
+                    'encoding': 'base64',
+                    'content': base64.b64encode(
+                        typing.cast(bytes, staged_file.contents),
+                    ).decode(),
+                },
+            )
+        return created_blob['sha']
+
+    async def _make_tree_entries(
+            self,
+    ) -> typing.List[typing.Dict[str, typing.Any]]:
+        """Create the blobs and describe the changed tree entries."""
+        blobs_semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def make_tree_entry(
+                file_path: str, staged_file: typing.Optional[_StagedFile],
+        ) -> typing.Dict[str, typing.Any]:
+            if staged_file is None:
+                # NOTE: A null SHA removes the path from the base tree.
+                return {
+                    'path': file_path, 'mode': GitFileMode.FILE,
+                    'type': 'blob', 'sha': None,
+                }
+
+            tree_entry = {
+                'path': file_path, 'mode': staged_file.mode, 'type': 'blob',
+            }
+            if self._can_inline(staged_file):
+                tree_entry['content'] = typing.cast(
+                    bytes, staged_file.contents,
+                ).decode('utf-8')
+                return tree_entry
+
+            async with blobs_semaphore:
+                tree_entry['sha'] = await self._create_blob(staged_file)
+            return tree_entry
+
+        return list(await asyncio.gather(*(
+            make_tree_entry(file_path, staged_file)
+            for file_path, staged_file in self._staged_files.items()
+        )))
+
+    async def commit(
+            self, message: str,
+            *,
+            branch: str,
+            parent_sha: typing.Optional[str] = None,
+            force: bool = False,
+            **commit_fields: typing.Any,
+    ) -> typing.Dict[str, typing.Any]:
+        """Commit the staged changes on top of the branch and push it.
+
+        :param str message: the commit message
+        :param str branch: the branch to move to the new commit
+        :param str parent_sha: the commit to build upon, the branch \
+                               head is fetched if unset
+        :param bool force: whether to move the branch even if it's not \
+                           a fast-forward
+        :param commit_fields: extra fields of the commit, like \
+                              ``author`` or ``committer``
+        :returns: the created commit as returned by the API
+        :raises ValueError: if there's nothing staged
+        """
+        if not self._staged_files:
+            raise ValueError('There are no changes to commit')
+
+        git_api_url = f'/repos/{self.repo_slug!s}/git'
+        if parent_sha is None:
+            branch_ref = await self.github_api.getitem(
+                f'{git_api_url!s}/ref/heads/{branch!s}',
+            )
+            parent_sha = branch_ref['object']['sha']
+        parent_commit = await self.github_api.getitem(
+            f'{git_api_url!s}/commits/{parent_sha!s}',
+        )
+
+        new_tree = await self.github_api.post(
+            f'{git_api_url!s}/trees',
+            data={
+                'base_tree': parent_commit['tree']['sha'],
+                'tree': await self._make_tree_entries(),
+            },
+        )
+        new_commit = await self.github_api.post(
+            f'{git_api_url!s}/commits',
+            data={
+                **commit_fields,
+                'message': message,
+                'tree': new_tree['sha'],
+                'parents': [parent_sha],
+            },
+        )
+        await self.github_api.patch(
+            f'{git_api_url!s}/refs/heads/{branch!s}',
+            data={'sha': new_commit['sha'], 'force': force},
+        )
+        logger.debug(
+            'Committed %d file changes to %s@%s as %s',
+            len(self), self.repo_slug, branch, new_commit['sha'],
+        )
+        self._staged_files.clear()
+        return new_commit
@@ -0,0 +1,271 @@
+"""A cache of the GitHub API responses that never change.
+
+Git objects (blobs, trees, commits and tags), commits and comparisons
+addressed by full SHAs, as well as file contents at a full commit SHA,
+are immutable. Such responses are never revalidated. They're only
+evicted when the cache runs out of space.
+
+The responses are kept in memory and, optionally, in a directory on
+disk that survives restarts.
+
+The cache is shared by all the clients but the responses are keyed by
+the token identity, so a client only gets what it has fetched itself,
+possibly before a restart.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import re
+import typing
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlsplit
+
+
+__all__ = (
+    'IMMUTABLE_RESPONSES',
+    'ImmutableResponseCache',
+    'is_immutable_url',
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+_SHA = r'[0-9a-f]{40}'
+_IMMUTABLE_PATH_RE = re.compile(
+    rf'/repos/[^/]+/[^/]+/(?:'
+    rf'git/(?:blobs|trees|commits|tags)/{_SHA}'
+    rf'|commits/{_SHA}'
+    rf'|compare/{_SHA}\.\.\.?{_SHA}'
+    rf'|(?P<contents>contents/.*)'
+    rf')$',
+)
+_SHA_RE = re.compile(rf'^{_SHA}$')
+
+
+def is_immutable_url(url: str) -> bool:
+    """Check whether the API URL addresses an immutable resource."""
+    split_url = urlsplit(url)
+    # NOTE: GitHub Enterprise API paths have a prefix.
+    path_match = _IMMUTABLE_PATH_RE.search(split_url.path)
+    if path_match is None:
+        return False
+
+    if path_match.group('contents') is None:
+        return True
+
+    requested_refs = parse_qs(split_url.query).get('ref', [])
+    return len(requested_refs) == 1 and bool(_SHA_RE.match(requested_refs[0]))
+
+
+def _get_cache_file_name(cache_key: typing.Hashable) -> str:
+    return hashlib.sha256(repr(cache_key).encode()).hexdigest()
+
+
+class ImmutableResponseCache:
+    """Serialized responses in memory backed by an optional disk store.
+
+    Both of the tiers are LRU caches bounded by the total size of the
+    responses they hold.
+    """
+
+    def __init__(
+            self,
+            max_size: int = 64 * 1024 * 1024,
+            *,
+            cache_dir: typing.Union[pathlib.Path, str, None] = None,
+            max_disk_size: int = 1024 * 1024 * 1024,
+    ):
+        """Initialize ImmutableResponseCache.
+
+        :param int max_size: the size of the responses to keep in memory
+        :param cache_dir: where to persist the responses, they're only \
+                          kept in memory if unset
+        :param int max_disk_size: the size of the responses to keep on disk
+        """
+        self.max_size = max_size
+        self.cache_dir = cache_dir
+        self.max_disk_size = max_disk_size
+        self._entries: typing.OrderedDict[typing.Hashable, bytes] = (
+            OrderedDict()
+        )
+        self._total_size = 0
+        self._disk_index: typing.Optional[typing.OrderedDict[str, int]] = None
+        self._disk_index_dir: typing.Union[pathlib.Path, str, None] = None
+        self._disk_size = 0
+        self.hits = 0
+        """Number of the lookups served from the cache."""
+        self.misses = 0
+        """Number of the lookups that weren't found in the cache."""
+
+    def __len__(self) -> int:
+        """Return the number of the responses held in memory."""
+        return len(self._entries)
+
+    @property
+    def total_size(self) -> int:
+        """Return the size of the responses held in memory."""
+        return self._total_size
+
+    def _remember(self, cache_key: typing.Hashable, entry: bytes) -> None:
+        if len(entry) > self.max_size:
+            return
+
+        self._entries[cache_key] = entry
+        self._total_size += len(entry)
+        while self._total_size > self.max_size:
+            _evicted_key, evicted_entry = self._entries.popitem(last=False)
+            self._total_size -= len(evicted_entry)
+
+    def _get_cache_dir(self) -> pathlib.Path:
+        return pathlib.Path(
+            typing.cast(typing.Union[pathlib.Path, str], self.cache_dir),
+        )
+
+    def _get_cache_file(self, cache_key: typing.Hashable) -> pathlib.Path:
+        return self._get_cache_dir() / _get_cache_file_name(cache_key)
+
+    def _read_from_disk(
+            self, cache_key: typing.Hashable,
+    ) -> typing.Optional[bytes]:
+        cache_file = self._get_cache_file(cache_key)
+        try:
+            entry = cache_file.read_bytes()
+        except FileNotFoundError:
+            return None
+        # NOTE: The modification time stands for the last access here
+        # NOTE: so that the disk store evicts the least recently used
+        # NOTE: entries even after a restart.
+        os.utime(cache_file)
+        return entry
+
+    def _write_to_disk(self, cache_key: typing.Hashable, entry: bytes) -> None:
+        cache_dir = self._get_cache_dir()
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        cache_file = cache_dir / _get_cache_file_name(cache_key)
+        partial_cache_file = cache_file.with_suffix('.part')
+        partial_cache_file.write_bytes(entry)
+        os.replace(partial_cache_file, cache_file)
+
+    def _scan_disk(self) -> typing.List[typing.Tuple[str, int]]:
+        """List the persisted entries from the least recently used."""
+        cache_dir = self._get_cache_dir()
+        if not cache_dir.is_dir():
+            return []
+        cache_files = [
+            (cache_file.stat(), cache_file.name)
+            for cache_file in cache_dir.iterdir()
+            if not cache_file.suffix
+        ]
+        return [
+            (file_name, file_stat.st_size)
+            for file_stat, file_name in sorted(
+                cache_files,
+                key=lambda stat_and_name: stat_and_name[0].st_mtime,
+            )
+        ]
+
+    def _remove_from_disk(self, file_names: typing.List[str]) -> None:
+        cache_dir = self._get_cache_dir()
+        for file_name in file_names:
+            try:
+                (cache_dir / file_name).unlink()
+            except FileNotFoundError:
+                pass
+
+    async def _get_disk_index(self) -> typing.OrderedDict[str, int]:
+        """Return the sizes of the persisted entries in the LRU order.
+
+        The directory is only listed once, then the index is kept up to
+        date as the entries are read and written.
+        """
+        if self._disk_index is None or self._disk_index_dir != self.cache_dir:
+            self._disk_index_dir = self.cache_dir
+            self._disk_index = OrderedDict(
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self._scan_disk,
+                ),
+            )
+            self._disk_size = sum(self._disk_index.values())
+        return self._disk_index
+
+    async def _persist(self, cache_key: typing.Hashable, entry: bytes) -> None:
+        if self.cache_dir is None or len(entry) > self.max_disk_size:
+            return
+
+        loop = asyncio.get_running_loop()
+        disk_index = await self._get_disk_index()
+        await loop.run_in_executor(
+            None, self._write_to_disk, cache_key, entry,
+        )
+
+        file_name = _get_cache_file_name(cache_key)
+        self._disk_size += len(entry) - disk_index.pop(file_name, 0)
+        disk_index[file_name] = len(entry)
+        evicted_file_names = []
+        while self._disk_size > self.max_disk_size:
+            evicted_file_name, evicted_size = disk_index.popitem(last=False)
+            self._disk_size -= evicted_size
+            evicted_file_names.append(evicted_file_name)
+        if evicted_file_names:
+            await loop.run_in_executor(
+                None, self._remove_from_disk, evicted_file_names,
+            )
+
+    async def get(self, cache_key: typing.Hashable) -> typing.Any:
+        """Return a fresh copy of the cached response.
+
+        :raises KeyError: if the response hasn't been cached
+        """
+        try:
+            self._entries.move_to_end(cache_key)
+            entry = self._entries[cache_key]
+        except KeyError:
+            disk_entry = None
+            if self.cache_dir is not None:
+                disk_index = await self._get_disk_index()
+                disk_entry = await asyncio.get_running_loop().run_in_executor(
+                    None, self._read_from_disk, cache_key,
+                )
+                file_name = _get_cache_file_name(cache_key)
+                if file_name in disk_index:
+                    disk_index.move_to_end(file_name)
+            if disk_entry is None:
+                self.misses += 1
+                raise
+            entry = disk_entry
+            self._remember(cache_key, entry)
+
+        self.hits += 1
+        return json.loads(entry)
+
+    async def put(
+            self, cache_key: typing.Hashable, response: typing.Any,
+    ) -> None:
+        """Remember the JSON-serializable response."""
+        if cache_key in self._entries:
+            return
+
+        entry = json.dumps(response, separators=(',', ':')).encode()
+        self._remember(cache_key, entry)
+        try:
+            await self._persist(cache_key, entry)
+        except OSError as os_err:
+            logger.warning(
+                'Failed to persist an immutable response: %s', os_err,
+            )
+
+    def clear(self) -> None:
+        """Forget the responses held in memory."""
+        self._entries.clear()
+        self._total_size = 0
+
+
+IMMUTABLE_RESPONSES = ImmutableResponseCache()
+"""The cache of the immutable responses shared by all the clients."""
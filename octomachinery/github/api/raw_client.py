@@ -1,16 +1,63 @@
 """A very low-level GitHub API client."""
 
+import contextlib
+import hashlib
 from asyncio import iscoroutinefunction
-from typing import Any, Dict, Optional, Tuple, Union
+from functools import partial
+from http import HTTPStatus
+from typing import (
+    Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, Iterator,
+    Optional, Tuple, Union,
+)
 
+import anyio
+from gidgethub import sansio
 from gidgethub.abc import JSON_CONTENT_TYPE
 from gidgethub.aiohttp import GitHubAPI
 
 # pylint: disable=relative-beyond-top-level
+from ...runtime.deadlines import get_remaining_time
+# pylint: disable=relative-beyond-top-level
+from ...runtime.memo import get_delivery_memo
+# pylint: disable=relative-beyond-top-level
+from .commit_builder import GitCommitBuilder
+from .immutable_cache import IMMUTABLE_RESPONSES, is_immutable_url
 from .tokens import GitHubJWTToken, GitHubOAuthToken, GitHubToken
 from .utils import accept_preview_version, mark_uninitialized_in_repr
 
 
+_MEMO_KEY_PREFIX = 'github-api'
+
+
+def _get_token_identity(token: Optional[str]) -> Optional[str]:
+    """Return a digest telling apart the tokens without revealing them."""
+    return None if token is None else hashlib.sha256(
+        token.encode(),
+    ).hexdigest()
+
+
+def _is_memoized_api_read(memo_key: Any) -> bool:
+    return isinstance(memo_key, tuple) and memo_key[:1] == (_MEMO_KEY_PREFIX, )
+
+
+@contextlib.contextmanager
+def _forgetting_memoized_api_reads() -> Iterator[None]:
+    """Drop the API reads memoized in the delivery around a write."""
+    delivery_memo = get_delivery_memo()
+    if delivery_memo is None:
+        yield
+        return
+
+    # NOTE: A write may change what any of the earlier reads would
+    # NOTE: return now so none of them can be reused, including the
+    # NOTE: ones still in flight.
+    delivery_memo.forget(_is_memoized_api_read)
+    try:
+        yield
+    finally:
+        delivery_memo.forget(_is_memoized_api_read)
+
+
 @mark_uninitialized_in_repr
 class RawGitHubAPI(GitHubAPI):
     """A low-level GitHub API client with a pre-populated token."""
@@ -46,6 +93,184 @@ class RawGitHubAPI(GitHubAPI):
         )
         return f'{cls_name}({init_args})'
 
+    async def get_token(self) -> Optional[GitHubToken]:
+        """Return the current token, refreshing it if needed."""
+        token = self._token
+        if iscoroutinefunction(token):
+            token = await token()
+        return token
+
+    async def _make_raw_request_headers(
+            self, accept: Optional[str] = None,
+    ) -> Dict[str, str]:
+        token = await self.get_token()
+        auth_kwargs = (
+            {} if token is None
+            else {'jwt': str(token)} if isinstance(token, GitHubJWTToken)
+            else {'oauth_token': str(token)}
+        )
+        accept_kwargs = {} if accept is None else {'accept': accept}
+        return sansio.create_headers(
+            self.requester, **auth_kwargs, **accept_kwargs,
+        )
+
+    def _format_raw_request_url(
+            self, url: str, url_vars: Optional[Dict[str, str]] = None,
+    ) -> str:
+        # NOTE: Old GidgetHub versions don't support custom API URLs.
+        base_url = getattr(self, 'base_url', None)
+        return sansio.format_url(
+            url, url_vars or {},
+            **({} if base_url is None else {'base_url': base_url}),
+        )
+
+    async def iter_response_chunks(
+            self, url: str,
+            url_vars: Optional[Dict[str, str]] = None,
+            *,
+            accept: Optional[str] = None,
+            chunk_size: int = 64 * 1024,
+    ) -> AsyncIterator[bytes]:
+        """Stream the raw body of a GET response chunk by chunk.
+
+        Unlike with ``getitem()``, the response isn't loaded into
+        memory as a whole which makes it suitable for big downloads
+        like repository tarballs. Redirects are followed.
+
+        :raises gidgethub.HTTPException: if the response is unsuccessful
+        """
+        request_headers = await self._make_raw_request_headers(accept)
+        # NOTE: The deadline covers the whole download, including the
+        # NOTE: time the consumer spends between the chunks.
+        async with anyio.fail_after(get_remaining_time()):
+            async with self._session.get(
+                    self._format_raw_request_url(url, url_vars),
+                    headers=request_headers,
+            ) as http_response:
+                if http_response.status != HTTPStatus.OK:
+                    sansio.decipher_response(
+                        http_response.status, http_response.headers,
+                        await http_response.read(),
+                    )
+                self.rate_limit = sansio.RateLimit.from_http(
+                    http_response.headers,
+                )
+                async for chunk in http_response.content.iter_chunked(
+                        chunk_size,
+                ):
+                    yield chunk
+
+    async def post_streamed(
+            self, url: str,
+            url_vars: Optional[Dict[str, str]] = None,
+            *,
+            body_chunks: AsyncIterable[bytes],
+            content_type: str = JSON_CONTENT_TYPE,
+    ) -> Any:
+        """Send a POST request with the body produced chunk by chunk.
+
+        This allows uploading big payloads, like blobs read from disk,
+        without holding them in memory as a whole.
+
+        :raises gidgethub.HTTPException: if the response is unsuccessful
+        """
+        request_headers = await self._make_raw_request_headers()
+        request_headers['content-type'] = content_type
+        with _forgetting_memoized_api_reads():
+            async with anyio.fail_after(get_remaining_time()):
+                async with self._session.post(
+                        self._format_raw_request_url(url, url_vars),
+                        headers=request_headers,
+                        data=body_chunks,
+                ) as http_response:
+                    data, self.rate_limit, _more = sansio.decipher_response(
+                        http_response.status, http_response.headers,
+                        await http_response.read(),
+                    )
+        return data
+
+    def make_commit_builder(
+            self, repo_slug: str, **builder_kwargs: Any,
+    ) -> GitCommitBuilder:
+        """Start staging changes to many files for a single commit.
+
+        See :py:class:`GitCommitBuilder` for the arguments.
+        """
+        return GitCommitBuilder(self, repo_slug, **builder_kwargs)
+
+    def iter_diff_chunks(
+            self, url: str,
+            url_vars: Optional[Dict[str, str]] = None,
+            *,
+            chunk_size: int = 64 * 1024,
+    ) -> AsyncIterator[bytes]:
+        """Stream the diff of a PR, a commit or a comparison.
+
+        Feed the chunks to
+        :py:func:`~octomachinery.utils.diffs.iter_diff_hunks` to parse
+        them as they arrive.
+        """
+        return self.iter_response_chunks(
+            url, url_vars,
+            accept='application/vnd.github.diff',
+            chunk_size=chunk_size,
+        )
+
+    async def getitem_if_modified(
+            self, url: str,
+            url_vars: Optional[Dict[str, str]] = None,
+            *,
+            etag: Optional[str] = None,
+            accept: Optional[str] = None,
+    ) -> Tuple[Any, Optional[str]]:
+        """Fetch a resource unless it still matches the given ETag.
+
+        Conditional requests answered with ``304 Not Modified`` don't
+        count against the API rate limit.
+
+        :returns: the decoded response body or ``None`` if the resource \
+                  hasn't been modified, along with its current ETag
+        """
+        request_headers = await self._make_raw_request_headers(accept)
+        if etag is not None:
+            request_headers['if-none-match'] = etag
+
+        filled_url = self._format_raw_request_url(url, url_vars)
+        async with anyio.fail_after(get_remaining_time()):
+            status_code, response_headers, response_body = (
+                await self._request('GET', filled_url, request_headers, b'')
+            )
+
+        if status_code == HTTPStatus.NOT_MODIFIED:
+            return None, etag
+
+        data, self.rate_limit, _more = sansio.decipher_response(
+            status_code, response_headers, response_body,
+        )
+        return data, response_headers.get('etag')
+
+    async def graphql(
+            self, query: str,
+            *,
+            endpoint: str = 'https://api.github.com/graphql',
+            **variables: Any,
+    ) -> Any:
+        """Query the GraphQL v4 API with the current token.
+
+        :raises TypeError: if the client authenticates as a GitHub App
+        """
+        token = await self.get_token()
+        if isinstance(token, GitHubJWTToken):
+            raise TypeError('GraphQL API is not available to GitHub Apps')
+
+        # NOTE: GidgetHub reads the token from this attribute before
+        # NOTE: yielding to the event loop so it's safe to set it here.
+        self.oauth_token = None if token is None else str(token)
+        async with anyio.fail_after(get_remaining_time()):
+            return await super().graphql(
+                query, endpoint=endpoint, **variables,
+            )
+
     # pylint: disable=arguments-differ
     # pylint: disable=keyword-arg-before-vararg
     # pylint: disable=too-many-arguments
@@ -57,9 +282,7 @@ class RawGitHubAPI(GitHubAPI):
             content_type: str = JSON_CONTENT_TYPE,
             extra_headers: Optional[Dict[str, str]] = None,
     ) -> Tuple[bytes, Optional[str]]:
-        token = self._token
-        if iscoroutinefunction(token):
-            token = await token()
+        token = await self.get_token()
         if isinstance(token, GitHubOAuthToken):
             oauth_token = str(token)
             jwt = None
@@ -77,7 +300,8 @@ class RawGitHubAPI(GitHubAPI):
             # NOTE: is modern enough are close to 100%.
             'extra_headers': extra_headers,
         } if extra_headers is not None else {}
-        return await super()._make_request(
+        make_request = partial(
+            self._make_request_within_deadline,
             method=method,
             url=url,
             url_vars=url_vars,
@@ -89,6 +313,73 @@ class RawGitHubAPI(GitHubAPI):
             **optional_kwargs,
         )
 
+        if method == 'GET':
+            request_url = self._format_raw_request_url(url, url_vars)
+            if is_immutable_url(request_url):
+                make_request = partial(
+                    self._make_immutable_request,
+                    # NOTE: Private objects mustn't leak to the clients
+                    # NOTE: that aren't allowed to read them.
+                    cache_key=(
+                        _get_token_identity(jwt or oauth_token),
+                        request_url,
+                        accept,
+                        tuple(sorted((extra_headers or {}).items())),
+                    ),
+                    make_request=make_request,
+                )
+
+        if method != 'GET':
+            with _forgetting_memoized_api_reads():
+                return await make_request()
+
+        delivery_memo = get_delivery_memo()
+        if delivery_memo is None:
+            return await make_request()
+
+        # NOTE: Reads are idempotent within a delivery so the handlers
+        # NOTE: of the same event may share them. Copies are returned
+        # NOTE: for them not to see each other's mutations. Responses
+        # NOTE: are only shared between the requests with the same token
+        # NOTE: since they depend on what the token is allowed to see.
+        return await delivery_memo.memoize(
+            (
+                _MEMO_KEY_PREFIX,
+                _get_token_identity(jwt or oauth_token),
+                url,
+                tuple(sorted(url_vars.items())),
+                accept,
+                tuple(sorted((extra_headers or {}).items())),
+            ),
+            make_request, copy_result=True,
+        )
+
+    async def _make_immutable_request(
+            self, *,
+            cache_key: Tuple[Any, ...],
+            make_request: Callable[[], Awaitable[Tuple[Any, Optional[str]]]],
+    ) -> Tuple[Any, Optional[str]]:
+        # NOTE: Objects addressed by SHAs never change so there's no
+        # NOTE: need to revalidate them or to spend the rate limit.
+        try:
+            return tuple(
+                await IMMUTABLE_RESPONSES.get(cache_key),
+            )
+        except KeyError:
+            pass
+
+        api_response = await make_request()
+        await IMMUTABLE_RESPONSES.put(cache_key, api_response)
+        return api_response
+
+    async def _make_request_within_deadline(
+            self, **request_kwargs: Any,
+    ) -> Tuple[bytes, Optional[str]]:
+        # NOTE: The handler deadline, if any, caps each request so that
+        # NOTE: a slow endpoint surfaces as a `TimeoutError` right here.
+        async with anyio.fail_after(get_remaining_time()):
+            return await super()._make_request(**request_kwargs)
+
     getitem = accept_preview_version(GitHubAPI.getitem)
     getiter = accept_preview_version(GitHubAPI.getiter)
     post = accept_preview_version(GitHubAPI.post)
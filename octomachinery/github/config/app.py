@@ -66,6 +66,14 @@ class GitHubAppIntegrationConfig:  # pylint: disable=too-few-public-methods
         converter=lambda s: SecretStr(s) if s is not None else s,
     )
 
+    flatten_routes = environ.bool_var(
+        False, name='OCTOMACHINERY_FLATTEN_ROUTES',
+    )
+    """Whether to invoke handlers shared by the routers just once.
+
+    It's only meant for the routers invoking handlers concurrently.
+    """
+
     app_name = environ.var(None, name='OCTOMACHINERY_APP_NAME')
     app_version = environ.var(None, name='OCTOMACHINERY_APP_VERSION')
     app_url = environ.var(None, name='OCTOMACHINERY_APP_URL')
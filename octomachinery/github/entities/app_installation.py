@@ -39,6 +39,11 @@ class GitHubAppInstallation:
         """Bound GitHub App instance."""
         return self._github_app
 
+    @property
+    def bot_login(self) -> str:
+        """The login of the account the installation acts as."""
+        return f'{self._metadata.app_slug!s}[bot]'
+
     async def get_token(self):
         """Retrieve installation access token from GitHub API."""
         return GitHubInstallationAccessToken(
@@ -2,12 +2,13 @@
 
 from __future__ import annotations
 
+import inspect
 import json
 import pathlib
 import uuid
 import warnings
 from typing import (
-    TYPE_CHECKING, Any, Iterable, Mapping, TextIO, Type, Union, cast,
+    TYPE_CHECKING, Any, Dict, Iterable, Mapping, TextIO, Type, Union, cast,
 )
 
 from gidgethub.sansio import Event as _GidgetHubEvent
@@ -139,14 +140,43 @@ class GitHubEvent:
             self,
             *routers: OctomachineryRouterBase,
             ctx: Union[Mapping[str, Any], None] = None,
+            flatten: bool = False,
     ) -> Iterable[Any]:
-        """Invoke this event handlers from different routers."""
+        """Invoke this event handlers from different routers.
+
+        With ``flatten``, the handlers matched by all the routers are
+        collected first and invoked together, each one just once even if
+        it's registered in several routers. Handlers wrapped with
+        :py:func:`functools.wraps`, like the ones with route options,
+        are told apart by the original function, and the first one
+        emitted wins. This bypasses the routers' own ``dispatch()`` so
+        it's only meant for the ones invoking handlers concurrently,
+        like ``ConcurrentRouter``.
+        """
         if not routers:
             raise ValueError('At least one router must be supplied')
 
         if ctx is None:
             ctx = {}
 
+        if flatten:
+            # NOTE: A dict preserves the order in which the routers
+            # NOTE: emit the handlers while dropping the repeated ones.
+            unique_callbacks: Dict[Any, Any] = {}
+            for router in routers:
+                for callback in router.emit_routes_for(
+                        self.name, self.payload,
+                ):
+                    unique_callbacks.setdefault(
+                        inspect.unwrap(callback), callback,
+                    )
+            return await aio_gather(
+                *(
+                    callback(self, **ctx)
+                    for callback in unique_callbacks.values()
+                ),
+            )
+
         return await aio_gather(
             *(
                 r.dispatch(self, **ctx)
@@ -2,8 +2,11 @@
 
 from __future__ import annotations
 
+import asyncio
+import inspect
+import typing
 from functools import wraps
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, Set, Tuple
 
 
 if TYPE_CHECKING:
@@ -11,7 +14,11 @@ if TYPE_CHECKING:
     from ..github.models.events import GitHubEvent
 
 
-__all__ = ('process_webhook_payload',)
+__all__ = (
+    'coalesce_events',
+    'extract_payload_args',
+    'process_webhook_payload',
+)
 
 
 def process_webhook_payload(wrapped_function):
@@ -20,3 +27,214 @@ def process_webhook_payload(wrapped_function):
     def wrapper(event: GitHubEvent) -> Any:
         return wrapped_function(**event.payload)
     return wrapper
+
+
+_MISSING = object()
+
+_BOOL_STRINGS = {
+    'true': True, 'yes': True, 'on': True, '1': True,
+    'false': False, 'no': False, 'off': False, '0': False,
+}
+
+
+def _convert_to_bool(value: Any) -> bool:
+    """Interpret a payload value as a flag.
+
+    Unlike ``bool()``, this doesn't turn any non-empty string into
+    ``True``.
+    """
+    if isinstance(value, str) and value.strip().lower() in _BOOL_STRINGS:
+        return _BOOL_STRINGS[value.strip().lower()]
+    if isinstance(value, int) and value in {0, 1}:
+        return bool(value)
+    raise ValueError(f'{value!r} is not a boolean flag')
+
+
+def _get_payload_value(payload: Any, payload_path: Tuple[str, ...]) -> Any:
+    """Return the value under the path or ``_MISSING`` if there's none."""
+    value = payload
+    for path_key in payload_path:
+        try:
+            value = value[path_key]
+        except (KeyError, IndexError, TypeError):
+            return _MISSING
+    return value
+
+
+def _make_payload_arg_getter(
+        arg_name: str,
+        payload_path: Tuple[str, ...],
+        type_hint: Any,
+        default: Any,
+) -> Callable[[GitHubEvent], Any]:
+    """Build a function pulling one handler argument from the event."""
+    if payload_path == ('event', ) and default is inspect.Parameter.empty:
+        return lambda event: event
+
+    converter: Any = type_hint if isinstance(type_hint, type) else None
+    if converter is bool:
+        converter = _convert_to_bool
+
+    def get_payload_arg(event: GitHubEvent) -> Any:
+        value = _get_payload_value(event.payload, payload_path)
+        if value is _MISSING or value is None:
+            if default is not inspect.Parameter.empty:
+                return default
+            if value is _MISSING:
+                raise TypeError(
+                    f'The event payload has no {".".join(payload_path)!s} '
+                    f'for the {arg_name!s} argument',
+                )
+            return None
+
+        if (
+                converter is None
+                or isinstance(type_hint, type) and isinstance(value, type_hint)
+        ):
+            return value
+        return converter(value)
+
+    return get_payload_arg
+
+
+def extract_payload_args(**arg_payload_paths: str):
+    """Pass only the arguments the handler declares from the payload.
+
+    The handler signature is inspected once when decorating it. Each
+    parameter gets the same-named top-level payload key unless mapped
+    to a dotted path via ``arg_payload_paths``. Values are converted to
+    the annotated type when it's a plain class, except for ``None``.
+    Flags are only parsed from ``true``/``false``-like strings and
+    ``0``/``1``. A parameter named
+    ``event`` gets the event object itself. The payload keys that the
+    handler doesn't mention are ignored.
+
+    Usage::
+
+        >>> from octomachinery.routing.decorators import (
+        ...     extract_payload_args,
+        ... )
+        >>> from octomachinery.routing.routers import ConcurrentRouter
+        >>> router = ConcurrentRouter()
+        >>> @router.register('pull_request', action='opened')
+        ... @extract_payload_args(
+        ...     pr_number='pull_request.number',
+        ...     repo_slug='repository.full_name',
+        ... )
+        ... async def on_pr_opened(pr_number: int, repo_slug: str):
+        ...     ...
+    """
+    def decorator(wrapped_function):
+        handler_signature = inspect.signature(wrapped_function)
+        unknown_arg_names = (
+            set(arg_payload_paths) - set(handler_signature.parameters)
+        )
+        if unknown_arg_names:
+            raise TypeError(
+                f'{wrapped_function.__qualname__!s} has no arguments named '
+                f'{", ".join(sorted(unknown_arg_names))!s}',
+            )
+
+        try:
+            type_hints = typing.get_type_hints(wrapped_function)
+        except NameError:
+            # NOTE: Some annotations are only importable for type checkers
+            # NOTE: so there's no conversion to be done for them.
+            type_hints = {}
+        positional_arg_getters = []
+        keyword_arg_getters = {}
+        for arg_name, param in handler_signature.parameters.items():
+            if param.kind in {param.VAR_POSITIONAL, param.VAR_KEYWORD}:
+                continue
+
+            arg_getter = _make_payload_arg_getter(
+                arg_name,
+                tuple(arg_payload_paths.get(arg_name, arg_name).split('.')),
+                type_hints.get(arg_name),
+                param.default,
+            )
+            if param.kind is param.KEYWORD_ONLY:
+                keyword_arg_getters[arg_name] = arg_getter
+            else:
+                positional_arg_getters.append(arg_getter)
+
+        @wraps(wrapped_function)
+        def wrapper(event: GitHubEvent) -> Any:
+            return wrapped_function(
+                *(get_arg(event) for get_arg in positional_arg_getters),
+                **{
+                    arg_name: get_arg(event)
+                    for arg_name, get_arg in keyword_arg_getters.items()
+                },
+            )
+        return wrapper
+    return decorator
+
+
+def coalesce_events(
+        key: Callable[[GitHubEvent], Hashable],
+        *,
+        window: float,
+        cancel_superseded: bool = False,
+):
+    """Only handle the latest of the events sharing a key within a window.
+
+    Each invocation waits for ``window`` seconds before running the
+    handler. If another event with the same key arrives meanwhile, the
+    earlier one is dropped. With ``cancel_superseded``, a handler run
+    that is already in progress is cancelled as well.
+
+    Usage::
+
+        >>> from octomachinery.routing.decorators import coalesce_events
+        >>> from octomachinery.routing.event_keys import pull_request_key
+        >>> from octomachinery.routing.routers import ConcurrentRouter
+        >>> router = ConcurrentRouter()
+        >>> @router.register('pull_request', action='synchronize')
+        ... @coalesce_events(pull_request_key, window=30)
+        ... async def on_pr_sync(event):
+        ...     ...
+    """
+    def decorator(wrapped_function):
+        latest_generations: Dict[Hashable, int] = {}
+        running_tasks: Dict[Hashable, asyncio.Task[Any]] = {}
+        superseded_tasks: Set[asyncio.Task[Any]] = set()
+
+        async def run_handler(event_key, event, *args, **kwargs):
+            handler_task = asyncio.create_task(
+                wrapped_function(event, *args, **kwargs),
+            )
+            running_tasks[event_key] = handler_task
+            try:
+                return await handler_task
+            except asyncio.CancelledError:
+                if handler_task not in superseded_tasks:
+                    raise
+                return None
+            finally:
+                superseded_tasks.discard(handler_task)
+                if running_tasks.get(event_key) is handler_task:
+                    del running_tasks[event_key]
+
+        @wraps(wrapped_function)
+        async def wrapper(event: GitHubEvent, *args, **kwargs) -> Any:
+            event_key = key(event)
+            generation = latest_generations.get(event_key, 0) + 1
+            latest_generations[event_key] = generation
+
+            if cancel_superseded and event_key in running_tasks:
+                superseded_task = running_tasks[event_key]
+                superseded_tasks.add(superseded_task)
+                superseded_task.cancel()
+
+            try:
+                await asyncio.sleep(window)
+                if latest_generations[event_key] != generation:
+                    return None  # A newer event has superseded this one
+
+                return await run_handler(event_key, event, *args, **kwargs)
+            finally:
+                if latest_generations.get(event_key) == generation:
+                    del latest_generations[event_key]
+        return wrapper
+    return decorator
@@ -21,22 +21,33 @@ dispatch_event = WEBHOOK_EVENTS_ROUTER.dispatch  # pylint: disable=invalid-name
 process_event = WEBHOOK_EVENTS_ROUTER.register  # pylint: disable=invalid-name
 
 
-def process_event_actions(event_name, actions=None):
-    """Subscribe to multiple events."""
+def process_event_actions(event_name, actions=None, **route_options):
+    """Subscribe to multiple events.
+
+    The ``route_options`` (like ``deadline`` or ``max_concurrency``)
+    are applied once so all the actions share the same limits.
+    """
     if actions is None:
         actions = []
 
     def decorator(original_function):
 
+        @wraps(original_function)
         def wrapper(*args, **kwargs):
             return original_function(*args, **kwargs)
 
+        route_callback = WEBHOOK_EVENTS_ROUTER.wrap_callback(
+            wrapper, **route_options,
+        )
+
         if not actions:
-            wrapper = process_event(event_name)(wrapper)
+            WEBHOOK_EVENTS_ROUTER.add(route_callback, event_name)
 
         for action in actions:
-            wrapper = process_event(event_name, action=action)(wrapper)
+            WEBHOOK_EVENTS_ROUTER.add(
+                route_callback, event_name, action=action,
+            )
 
-        return wraps(original_function)(wrapper)
+        return wrapper
 
     return decorator
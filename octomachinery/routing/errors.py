@@ -0,0 +1,9 @@
+"""Exceptions collection related to the event dispatching."""
+
+
+class EventDispatchError(Exception):
+    """Generic event dispatching error."""
+
+
+class EventShedError(EventDispatchError):
+    """Event has been dropped because of the dispatcher overload."""
@@ -0,0 +1,40 @@
+"""Helpers grouping GitHub events by the resources they relate to.
+
+These are meant to be used as key functions for the routing machinery
+that needs to tell which events concern the same thing.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Optional, Tuple
+
+
+if TYPE_CHECKING:
+    # pylint: disable=relative-beyond-top-level
+    from ..github.models.events import GitHubEvent
+
+
+__all__ = ('installation_key', 'pull_request_key', 'repository_key')
+
+
+def installation_key(event: GitHubEvent) -> Optional[int]:
+    """Return the ID of the installation the event belongs to."""
+    return event.payload.get('installation', {}).get('id')
+
+
+def repository_key(event: GitHubEvent) -> Optional[str]:
+    """Return the slug of the repository the event belongs to."""
+    return event.payload.get('repository', {}).get('full_name')
+
+
+def pull_request_key(
+        event: GitHubEvent,
+) -> Tuple[Optional[str], Optional[int]]:
+    """Return the repository slug and the PR/issue number of the event."""
+    payload = event.payload
+    issue_number = (
+        payload.get('pull_request', {}).get('number')
+        or payload.get('issue', {}).get('number')
+        or payload.get('number')
+    )
+    return repository_key(event), issue_number
@@ -0,0 +1,227 @@
+"""Concurrency and rate limits of individual event handlers."""
+
+from __future__ import annotations
+
+import asyncio
+import enum
+import logging
+import time
+import typing
+from contextlib import AsyncExitStack, asynccontextmanager
+from functools import wraps
+
+from .errors import EventShedError
+
+
+__all__ = (
+    'HandlerLimiter',
+    'OverflowPolicy',
+    'TokenBucket',
+    'limit_handler',
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+class OverflowPolicy(str, enum.Enum):
+    """What to do with a handler invocation exceeding its limits."""
+
+    QUEUE = 'queue'
+    """Wait for a free slot unless too many invocations wait already."""
+    SHED = 'shed'
+    """Drop the invocation right away."""
+
+
+class TokenBucket:
+    """A token bucket refilling at a constant ``rate`` per second."""
+
+    def __init__(self, rate: float, burst: typing.Optional[int] = None):
+        """Initialize TokenBucket.
+
+        :param float rate: number of tokens added per second
+        :param int burst: maximum number of tokens stored, \
+                          defaults to ``max(1, rate)``
+        """
+        if rate <= 0:
+            raise ValueError('The token refill rate must be positive')
+        self._rate = rate
+        self._capacity = float(burst or max(1, int(rate)))
+        self._tokens = self._capacity
+        self._updated_at = time.monotonic()
+        # NOTE: The lock is created lazily so that it's bound to the loop
+        # NOTE: that actually uses it rather than the one at import time.
+        self._lock: typing.Optional[asyncio.Lock] = None
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self._capacity,
+            self._tokens + (now - self._updated_at) * self._rate,
+        )
+        self._updated_at = now
+
+    def try_acquire(self) -> bool:
+        """Take a token if there's one available."""
+        self._refill()
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    async def acquire(self) -> None:
+        """Take a token, waiting for it in the FIFO order if needed."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            while not self.try_acquire():
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+
+class HandlerLimiter:
+    """Concurrency cap and rate limit of a single event handler."""
+
+    def __init__(
+            self,
+            *,
+            max_concurrency: typing.Optional[int] = None,
+            rate_limit: typing.Optional[float] = None,
+            rate_burst: typing.Optional[int] = None,
+            overflow_policy: typing.Union[OverflowPolicy, str] = (
+                OverflowPolicy.QUEUE
+            ),
+            max_pending: int = 100,
+    ):
+        """Initialize HandlerLimiter.
+
+        :param int max_concurrency: how many invocations may run at once
+        :param float rate_limit: how many invocations may start per second
+        :param int rate_burst: how many invocations may start at once \
+                               after being idle
+        :param overflow_policy: whether to queue or shed the excess \
+                                invocations
+        :param int max_pending: how many invocations may wait for their \
+                                turn before the new ones get shed
+        """
+        self._max_concurrency = max_concurrency
+        self._token_bucket = (
+            None if rate_limit is None
+            else TokenBucket(rate_limit, rate_burst)
+        )
+        self._overflow_policy = OverflowPolicy(overflow_policy)
+        self._max_pending = max_pending
+        self._semaphore: typing.Optional[asyncio.Semaphore] = None
+
+        self.pending_count = 0
+        """Number of invocations waiting for their turn."""
+        self.running_count = 0
+        """Number of invocations in progress."""
+        self.shed_count = 0
+        """Number of invocations dropped so far."""
+
+    def _shed(self, reason: str) -> EventShedError:
+        self.shed_count += 1
+        return EventShedError(reason)
+
+    def _has_capacity(self) -> bool:
+        return (
+            self._max_concurrency is None
+            or self.running_count < self._max_concurrency
+        )
+
+    async def _acquire_queued(self) -> None:
+        if self.pending_count >= self._max_pending:
+            raise self._shed(
+                f'There are already {self.pending_count!s} invocations '
+                'waiting for their turn',
+            )
+
+        if self._semaphore is None and self._max_concurrency is not None:
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+
+        self.pending_count += 1
+        try:
+            if self._semaphore is not None:
+                await self._semaphore.acquire()
+            try:
+                if self._token_bucket is not None:
+                    await self._token_bucket.acquire()
+            except BaseException:
+                if self._semaphore is not None:
+                    self._semaphore.release()
+                raise
+        finally:
+            self.pending_count -= 1
+
+    def _acquire_or_shed(self) -> None:
+        if not self._has_capacity():
+            raise self._shed(
+                f'There are already {self.running_count!s} invocations '
+                'in progress',
+            )
+        if self._token_bucket is not None and (
+                not self._token_bucket.try_acquire()
+        ):
+            raise self._shed('The rate limit has been exceeded')
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold a slot for a handler invocation.
+
+        :raises EventShedError: if the invocation has been dropped
+        """
+        if self._overflow_policy is OverflowPolicy.SHED:
+            self._acquire_or_shed()
+        else:
+            await self._acquire_queued()
+
+        self.running_count += 1
+        try:
+            yield
+        finally:
+            self.running_count -= 1
+            if self._semaphore is not None:
+                self._semaphore.release()
+
+
+def limit_handler(**limiter_kwargs: typing.Any):
+    """Limit concurrency and rate of the wrapped event handler.
+
+    Accepts the same arguments as :py:class:`HandlerLimiter`. Dropped
+    invocations are logged rather than failing the other handlers of
+    the same event.
+
+    Usage::
+
+        >>> from octomachinery.routing.limits import limit_handler
+        >>> from octomachinery.routing.routers import ConcurrentRouter
+        >>> router = ConcurrentRouter()
+        >>> @router.register('push')
+        ... @limit_handler(max_concurrency=2, rate_limit=0.5)
+        ... async def on_push(event):
+        ...     ...
+    """
+    handler_limiter = HandlerLimiter(**limiter_kwargs)
+
+    def decorator(wrapped_function):
+        @wraps(wrapped_function)
+        async def wrapper(*args, **kwargs):
+            async with AsyncExitStack() as slot_stack:
+                # NOTE: Only this limiter shedding the invocation is
+                # NOTE: handled here. The handler errors, including the
+                # NOTE: ones of the nested limiters, propagate as is.
+                try:
+                    await slot_stack.enter_async_context(
+                        handler_limiter.slot(),
+                    )
+                except EventShedError as shed_exc:
+                    logger.warning(
+                        'Event handler %s invocation has been shed: %s',
+                        wrapped_function.__qualname__, shed_exc,
+                    )
+                    return None
+                return await wrapped_function(*args, **kwargs)
+        wrapper.handler_limiter = handler_limiter  # type: ignore[attr-defined]
+        return wrapper
+    return decorator
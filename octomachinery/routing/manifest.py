@@ -0,0 +1,323 @@
+"""Route manifests mapping events to lazily imported handlers.
+
+A manifest maps event names, optionally suffixed with an action like
+``pull_request.opened``, to import paths of the handlers in the form of
+``package.module:function``. It can be declared as a YAML/JSON file::
+
+    {
+      "pull_request.opened": ["bot.handlers.pulls:on_pr_opened"],
+      "push": ["bot.handlers.ci:on_push"]
+    }
+
+Or as entry points of the distribution, one handler per entry::
+
+    [options.entry_points]
+    octomachinery.routes =
+      pull_request.opened = bot.handlers.pulls:on_pr_opened
+      push = bot.handlers.ci:on_push
+
+The handler modules listed there are only imported by
+:py:class:`LazyRouter` when the first matching event comes in. Such
+modules must not register their handlers with the global router via
+``@process_event`` because those would be invoked twice. The lazy
+router refuses to use the handlers registered like that.
+
+The bot apps pick up the manifest set by the
+``OCTOMACHINERY_ROUTE_MANIFEST`` environment variable and, with
+``OCTOMACHINERY_ROUTE_ENTRY_POINTS=true``, the entry points.
+"""
+
+from __future__ import annotations
+
+import importlib
+import inspect
+import logging
+import pathlib
+import typing
+from collections import defaultdict
+from itertools import chain
+
+import yaml
+
+from ..utils.asynctools import aio_gather, ensure_async_callable
+from .abc import OctomachineryRouterBase
+from .default_router import WEBHOOK_EVENTS_ROUTER
+
+
+if typing.TYPE_CHECKING:
+    from gidgethub.routing import AsyncCallback
+
+    from ..github.models.events import GitHubEvent
+    from .routers import GidgetHubRouterBase
+
+
+__all__ = (
+    'ROUTES_ENTRY_POINT_GROUP',
+    'LazyRouter',
+    'generate_route_manifest',
+    'get_default_event_routers',
+    'load_route_manifest',
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+ROUTES_ENTRY_POINT_GROUP = 'octomachinery.routes'
+"""Entry point group to look up the handler declarations in."""
+
+RouteManifest = typing.Dict[str, typing.List[str]]
+
+
+def _iter_entry_points(
+        group: str,
+) -> typing.Iterator[typing.Tuple[str, str]]:
+    """Yield names and values of the entry points in the group."""
+    # NOTE: The imports are kept local so that the slow to import
+    # NOTE: `pkg_resources` is only pulled in on the old Pythons that
+    # NOTE: lack `importlib.metadata`, and only if the entry points
+    # NOTE: are actually requested.
+    # pylint: disable=import-outside-toplevel
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:  # Python < 3.8
+        import pkg_resources
+        for entry_point in pkg_resources.iter_entry_points(group):
+            handler_qualname = '.'.join(entry_point.attrs)
+            yield (
+                entry_point.name,
+                f'{entry_point.module_name!s}:{handler_qualname!s}',
+            )
+        return
+
+    all_entry_points = entry_points()
+    group_entry_points = (
+        all_entry_points.select(group=group)
+        if hasattr(all_entry_points, 'select')
+        else all_entry_points.get(group, ())  # Python < 3.10
+    )
+    for entry_point in group_entry_points:
+        yield entry_point.name, entry_point.value
+
+
+def load_route_manifest(
+        manifest_path: typing.Union[pathlib.Path, str, None] = None,
+        *,
+        entry_point_group: typing.Optional[str] = ROUTES_ENTRY_POINT_GROUP,
+) -> RouteManifest:
+    """Read the route manifest from a file and/or the entry points."""
+    route_manifest: RouteManifest = defaultdict(list)
+
+    if manifest_path is not None:
+        manifest_text = pathlib.Path(
+            manifest_path,
+        ).read_text(encoding='utf-8')
+        # NOTE: JSON is a subset of YAML so this covers both formats.
+        for route_key, import_paths in (
+                yaml.safe_load(manifest_text) or {}
+        ).items():
+            if isinstance(import_paths, str):
+                import_paths = [import_paths]
+            route_manifest[route_key].extend(import_paths)
+
+    if entry_point_group is not None:
+        for route_key, import_path in _iter_entry_points(entry_point_group):
+            route_manifest[route_key].append(import_path)
+
+    return dict(route_manifest)
+
+
+def _iter_router_routes(
+        router: GidgetHubRouterBase,
+) -> typing.Iterator[typing.Tuple[str, AsyncCallback[...]]]:
+    """Yield the manifest route keys with the callbacks of the router.
+
+    :raises ValueError: if a route is filtered by something else than \
+                        the action
+    """
+    # pylint: disable=protected-access
+    for event_name, callbacks in router._shallow_routes.items():
+        for callback in callbacks:
+            yield event_name, callback
+
+    for event_name, deep_routes in router._deep_routes.items():
+        for payload_key, payload_values in deep_routes.items():
+            if payload_key != 'action':
+                raise ValueError(
+                    f'Routes of {event_name!s} filtered by '
+                    f'{payload_key!s} cannot be put into a manifest',
+                )
+            for action, callbacks in payload_values.items():
+                for callback in callbacks:
+                    yield f'{event_name!s}.{action!s}', callback
+
+
+def _get_import_path(callback: AsyncCallback[...]) -> str:
+    """Return the ``module:qualname`` path of the original handler.
+
+    :raises ValueError: if the handler can't be imported by that path
+    """
+    handler = inspect.unwrap(callback)
+    import_path = f'{handler.__module__!s}:{handler.__qualname__!s}'
+    if '<locals>' in import_path:
+        raise ValueError(f'{import_path!s} is not importable')
+    return import_path
+
+
+def generate_route_manifest(
+        *routers: GidgetHubRouterBase,
+) -> RouteManifest:
+    """Build a route manifest out of the already populated routers.
+
+    Only the ``action`` payload filters can be expressed in a manifest.
+    The per-route options (like deadlines) are not preserved either.
+
+    :raises ValueError: if a route can't be put into the manifest
+    """
+    route_manifest: RouteManifest = defaultdict(list)
+
+    for router in routers:
+        for route_key, callback in _iter_router_routes(router):
+            import_path = _get_import_path(callback)
+            if import_path not in route_manifest[route_key]:
+                route_manifest[route_key].append(import_path)
+
+    return dict(route_manifest)
+
+
+def _iter_all_router_callbacks(
+        router: GidgetHubRouterBase,
+) -> typing.Iterator[AsyncCallback[...]]:
+    """Yield the callbacks of all the router routes, filtered or not."""
+    # pylint: disable=protected-access
+    for callbacks in router._shallow_routes.values():
+        yield from callbacks
+
+    for deep_routes in router._deep_routes.values():
+        for payload_values in deep_routes.values():
+            for callbacks in payload_values.values():
+                yield from callbacks
+
+
+def _import_handler(import_path: str) -> AsyncCallback[...]:
+    """Import the handler function by its ``module:qualname`` path.
+
+    :raises ValueError: if the handler has registered itself with \
+                        the global router on import
+    """
+    module_path, _sep, handler_qualname = import_path.partition(':')
+    handler: typing.Any = importlib.import_module(module_path)
+    for attr_name in handler_qualname.split('.'):
+        handler = getattr(handler, attr_name)
+
+    if any(
+            inspect.unwrap(callback) is inspect.unwrap(handler)
+            for callback in _iter_all_router_callbacks(WEBHOOK_EVENTS_ROUTER)
+    ):
+        raise ValueError(
+            f'{import_path!s} is registered with the global router on '
+            'import so it cannot be routed lazily, drop its '
+            '@process_event decorator',
+        )
+    return ensure_async_callable(handler)
+
+
+class LazyRouter(OctomachineryRouterBase):
+    """GitHub event router importing handlers on the first use.
+
+    The handlers are invoked simultaneously, like with
+    ``ConcurrentRouter``. Their modules must not register them with
+    the global router on import.
+    """
+
+    def __init__(self, route_manifest: RouteManifest):
+        """Initialize LazyRouter.
+
+        :param route_manifest: a mapping of event names with optional \
+                               actions to handler import paths
+        """
+        self._route_manifest = route_manifest
+        self._imported_handlers: typing.Dict[str, AsyncCallback[...]] = {}
+
+    @classmethod
+    def from_manifest(
+            cls,
+            manifest_path: typing.Union[pathlib.Path, str, None] = None,
+            *,
+            entry_point_group: typing.Optional[str] = (
+                ROUTES_ENTRY_POINT_GROUP
+            ),
+    ) -> LazyRouter:
+        """Make a router from a manifest file and/or the entry points."""
+        return cls(
+            load_route_manifest(
+                manifest_path, entry_point_group=entry_point_group,
+            ),
+        )
+
+    def _get_handler(self, import_path: str) -> AsyncCallback[...]:
+        try:
+            return self._imported_handlers[import_path]
+        except KeyError:
+            pass
+
+        logger.debug('Importing event handler %s', import_path)
+        handler = self._imported_handlers[import_path] = _import_handler(
+            import_path,
+        )
+        return handler
+
+    def emit_routes_for(
+            self, event_name: str, event_payload: typing.Any,
+    ) -> typing.Iterator[AsyncCallback[...]]:
+        """Emit callbacks that match given event and payload.
+
+        :param str event_name: name of the GitHub event
+        :param str event_payload: details of the GitHub event
+
+        :yields: coroutine event handlers
+        """
+        event_action = event_payload.get('action')
+        import_paths = chain(
+            self._route_manifest.get(event_name, ()),
+            () if event_action is None
+            else self._route_manifest.get(
+                f'{event_name!s}.{event_action!s}', (),
+            ),
+        )
+        for import_path in import_paths:
+            yield self._get_handler(import_path)
+
+    async def dispatch(
+            self, event: GitHubEvent,
+            *args: typing.Any, **kwargs: typing.Any,
+    ) -> None:
+        """Invoke coroutine callbacks for the given event together."""
+        callback_gen = self.emit_routes_for(event.name, event.payload)
+        callback_coros = (cb(event, *args, **kwargs) for cb in callback_gen)
+
+        await aio_gather(*callback_coros)
+
+
+def get_default_event_routers(
+        route_manifest_path: typing.Union[pathlib.Path, str, None] = None,
+        *,
+        use_entry_points: bool = False,
+) -> typing.Set[OctomachineryRouterBase]:
+    """Return the global router, plus a lazy one if routes are declared.
+
+    :param route_manifest_path: a YAML/JSON file with the lazy routes
+    :param bool use_entry_points: whether to take the lazy routes from \
+                                  the entry points too
+    """
+    event_routers: typing.Set[OctomachineryRouterBase] = {
+        WEBHOOK_EVENTS_ROUTER,
+    }
+    route_manifest = load_route_manifest(
+        route_manifest_path,
+        entry_point_group=ROUTES_ENTRY_POINT_GROUP if use_entry_points
+        else None,
+    )
+    if route_manifest:
+        event_routers.add(LazyRouter(route_manifest))
+    return event_routers
@@ -1,32 +1,151 @@
 """Octomachinery event dispatchers collection."""
 
+from __future__ import annotations
+
 import asyncio
+import inspect
+import multiprocessing.context
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import suppress
-from typing import Any, Iterator, Set, Union
+from functools import partial, wraps
+from typing import (
+    Any, Callable, Dict, Hashable, Iterator, MutableSet, Optional, Set, Tuple,
+    Union,
+)
 
+from aiohttp.client import ClientSession
 from gidgethub.routing import AsyncCallback
 from gidgethub.routing import Router as _GidgetHubRouter
 
+import attr
+
+from ..github.api.raw_client import RawGitHubAPI
+from ..github.api.tokens import GitHubOAuthToken
 from ..github.models.events import (
-    GidgetHubWebhookEvent, GitHubEvent, _GidgetHubEvent,
+    GidgetHubWebhookEvent, GitHubEvent, GitHubWebhookEvent, _GidgetHubEvent,
 )
-from ..utils.asynctools import aio_gather
+from ..github.models.utils import SecretStr
+from ..runtime.context import RUNTIME_CONTEXT
+from ..runtime.deadlines import with_deadline
+from ..utils.asynctools import aio_gather, ensure_async_callable, try_await
 from .abc import OctomachineryRouterBase
+from .errors import EventShedError
+from .event_keys import repository_key
+from .limits import OverflowPolicy, limit_handler
 
 
 __all__ = (
     'GidgetHubRouterBase',
     'ConcurrentRouter',
+    'KeyedSerialRouter',
     'NonBlockingConcurrentRouter',
+    'ProcessPoolRouter',
 )
 
 
+ROUTE_OPTION_NAMES = frozenset({
+    'deadline',
+    'max_concurrency',
+    'max_pending',
+    'overflow_policy',
+    'rate_burst',
+    'rate_limit',
+})
+"""Keyword arguments of ``register()`` that aren't payload filters."""
+
+
 class GidgetHubRouterBase(_GidgetHubRouter, OctomachineryRouterBase):
     """GidgetHub-based router exposing callback matching separately."""
 
+    @staticmethod
+    def wrap_callback(  # pylint: disable=too-many-arguments
+            func: AsyncCallback[...],
+            *,
+            deadline: Optional[float] = None,
+            max_concurrency: Optional[int] = None,
+            rate_limit: Optional[float] = None,
+            rate_burst: Optional[int] = None,
+            overflow_policy: Union[OverflowPolicy, str] = OverflowPolicy.QUEUE,
+            max_pending: int = 100,
+    ) -> AsyncCallback[...]:
+        """Apply the per-route options to the given event handler.
+
+        Blocking handlers are turned into ones running in a thread pool.
+
+        :param float deadline: seconds after which the handler is \
+                               cancelled
+        :param int max_concurrency: how many invocations may run at once
+        :param float rate_limit: how many invocations may start per second
+        :param int rate_burst: how many invocations may start at once \
+                               after being idle
+        :param overflow_policy: whether to queue or shed the invocations \
+                                exceeding the limits
+        :param int max_pending: how many invocations may wait for their \
+                                turn before the new ones get shed
+        """
+        func = ensure_async_callable(func)
+        if deadline is not None:
+            func = with_deadline(deadline)(func)
+        if max_concurrency is not None or rate_limit is not None:
+            func = limit_handler(
+                max_concurrency=max_concurrency,
+                rate_limit=rate_limit,
+                rate_burst=rate_burst,
+                overflow_policy=overflow_policy,
+                max_pending=max_pending,
+            )(func)
+        return func
+
+    def adapt_handler(self, func: AsyncCallback[...]) -> AsyncCallback[...]:
+        """Make the handler run the way the router invokes its handlers.
+
+        Every route goes through this, both the directly added ones and
+        the registered ones (before the route options are applied), so
+        it must return the handlers it's already adapted as is.
+        Here, blocking functions are made to run in a thread pool.
+        """
+        return ensure_async_callable(func)
+
+    def add(
+            self, func: AsyncCallback[...], event_type: str,
+            **data_detail: Any,
+    ) -> None:
+        """Subscribe the function to the given event.
+
+        A blocking function gets invoked in a thread pool.
+        """
+        super().add(self.adapt_handler(func), event_type, **data_detail)
+
+    def register(
+            self, event_type: str,
+            **data_detail: Any,
+    ) -> Callable[[AsyncCallback[...]], AsyncCallback[...]]:
+        """Subscribe the decorated function to the given event.
+
+        :param str event_type: name of the GitHub event
+        :param data_detail: a payload key-value pair to filter by and \
+                            the route options :py:meth:`wrap_callback` \
+                            accepts
+        """
+        route_options = {
+            option_name: data_detail.pop(option_name)
+            for option_name in ROUTE_OPTION_NAMES
+            if option_name in data_detail
+        }
+
+        def decorator(func: AsyncCallback[...]) -> AsyncCallback[...]:
+            self.add(
+                self.wrap_callback(self.adapt_handler(func), **route_options),
+                event_type, **data_detail,
+            )
+            return func
+        return decorator
+
     def emit_routes_for(
             self, event_name: str, event_payload: Any,
-    ) -> Iterator[AsyncCallback]:
+    ) -> Iterator[AsyncCallback[...]]:
         """Emit callbacks that match given event and payload.
 
         :param str event_name: name of the GitHub event
@@ -97,3 +216,272 @@ class NonBlockingConcurrentRouter(ConcurrentRouter):
         callback_coros = (cb(event, *args, **kwargs) for cb in callback_gen)
         handler_tasks = map(asyncio.create_task, callback_coros)
         self._event_handler_tasks.update(handler_tasks)
+
+
+@attr.dataclass
+class _KeySlot:  # pylint: disable=too-few-public-methods
+    """State of the events sharing a key."""
+
+    lock: asyncio.Lock = attr.ib(factory=asyncio.Lock)
+    """A FIFO lock letting the events through one by one."""
+    pending_events: int = 0
+    """Number of the events either being handled or waiting for it."""
+
+
+class KeyedSerialRouter(ConcurrentRouter):
+    """GitHub event router serializing events that share a key.
+
+    Events are handled in the order of arrival when they have the same
+    key (like a repository or a pull request) while the ones with
+    different keys are processed simultaneously. Events without a key
+    (``None``) are never held back.
+    """
+
+    def __init__(
+            self, *args,
+            key: Callable[[GitHubEvent], Hashable] = repository_key,
+            max_pending_per_key: int = 100,
+            **kwargs,
+    ):
+        """Initialize KeyedSerialRouter.
+
+        :param key: a function computing the key of a given event
+        :param int max_pending_per_key: how many events sharing a key \
+                                        may wait for their turn before \
+                                        the new ones get shed
+        """
+        super().__init__(*args, **kwargs)
+        self._key = key
+        self._max_pending_per_key = max_pending_per_key
+        self._key_slots: Dict[Hashable, _KeySlot] = {}
+
+    async def dispatch(
+            self, event: Union[GitHubEvent, _GidgetHubEvent],
+            *args: Any, **kwargs: Any,
+    ) -> None:
+        """Invoke coroutine callbacks once the preceding events are done.
+
+        :raises EventShedError: if too many events wait for this key
+        """
+        if isinstance(event, _GidgetHubEvent):
+            event = GidgetHubWebhookEvent.from_gidgethub(event)
+
+        event_key = self._key(event)
+        if event_key is None:
+            await super().dispatch(event, *args, **kwargs)
+            return
+
+        key_slot = self._key_slots.setdefault(event_key, _KeySlot())
+        if key_slot.pending_events >= self._max_pending_per_key:
+            raise EventShedError(
+                f'There are already {key_slot.pending_events!s} events '
+                f'with key {event_key!r} waiting to be handled',
+            )
+
+        key_slot.pending_events += 1
+        try:
+            async with key_slot.lock:
+                await super().dispatch(event, *args, **kwargs)
+        finally:
+            key_slot.pending_events -= 1
+            if not key_slot.pending_events:
+                # Nothing else is queued for this key, free up its state
+                del self._key_slots[event_key]
+
+
+@attr.dataclass(frozen=True)
+class _WorkerEventSnapshot:  # pylint: disable=too-few-public-methods
+    """A picklable state of the event for the process pool workers."""
+
+    name: str
+    """Event name."""
+    payload: Dict[str, Any]
+    """Event payload object."""
+    delivery_id: Optional[str]
+    """A delivery UUID if the event has come in as a webhook."""
+    api_token: Optional[str]
+    """An installation (or Action) token the worker may use."""
+    api_base_url: Optional[str]
+    """GitHub API URL the token is meant for."""
+    user_agent: Optional[str]
+    """User-Agent to identify the API client with."""
+    is_github_action: bool
+    """Whether the event comes from the GitHub Actions env."""
+
+    def to_github_event(self) -> GitHubEvent:
+        """Reconstruct the event in the worker."""
+        if self.delivery_id is None:
+            return GitHubEvent(name=self.name, payload=self.payload)
+        return GitHubWebhookEvent(
+            name=self.name, payload=self.payload,
+            delivery_id=self.delivery_id,
+        )
+
+
+def _warm_up_worker() -> None:
+    """Do nothing just to get a worker process spawned."""
+
+
+async def _invoke_in_worker(
+        handler: AsyncCallback[...],
+        event_snapshot: _WorkerEventSnapshot,
+        args: Tuple[Any, ...], kwargs: Dict[str, Any],
+) -> Any:
+    """Set up the runtime context in the worker and invoke the handler."""
+    github_event = event_snapshot.to_github_event()
+    api_client_kwargs = (
+        {} if event_snapshot.api_base_url is None
+        else {'base_url': event_snapshot.api_base_url}
+    )
+    async with ClientSession() as http_session:
+        # pylint: disable=assigning-non-slot
+        RUNTIME_CONTEXT.IS_GITHUB_ACTION = event_snapshot.is_github_action
+        # pylint: disable=assigning-non-slot
+        RUNTIME_CONTEXT.IS_GITHUB_APP = not event_snapshot.is_github_action
+        # pylint: disable=assigning-non-slot
+        RUNTIME_CONTEXT.github_event = github_event
+        if event_snapshot.api_token is not None:
+            # NOTE: Without a token in the parent, there's no client to
+            # NOTE: provide in the worker either.
+            # pylint: disable=assigning-non-slot
+            RUNTIME_CONTEXT.app_installation_client = RawGitHubAPI(
+                token=GitHubOAuthToken(SecretStr(event_snapshot.api_token)),
+                session=http_session,
+                user_agent=event_snapshot.user_agent,
+                **api_client_kwargs,
+            )
+        # NOTE: Blocking handlers may just run on the worker's own loop.
+        return await try_await(handler(github_event, *args, **kwargs))
+
+
+def _run_handler_in_worker(
+        handler: AsyncCallback[...],
+        event_snapshot: _WorkerEventSnapshot,
+        args: Tuple[Any, ...], kwargs: Dict[str, Any],
+) -> Any:
+    """Run the event handler on a worker's own event loop."""
+    return asyncio.run(
+        _invoke_in_worker(handler, event_snapshot, args, kwargs),
+    )
+
+
+class ProcessPoolRouter(ConcurrentRouter):
+    """GitHub event router invoking handlers in a pool of processes.
+
+    This is meant for CPU-bound handlers that would otherwise block
+    the event loop shared by all the deliveries. The handlers must be
+    importable (module-level) functions, and so must be their results.
+    Inside the worker, ``RUNTIME_CONTEXT`` provides the event and, if the
+    parent has one, an ``app_installation_client`` authenticated with
+    a snapshot of its installation token. The app and installation
+    objects are not available there.
+
+    All the routes are offloaded, including the ones added directly.
+    Per-route options (deadlines and limits) are enforced in the parent
+    process. A cancelled invocation stops being awaited but the worker
+    still lets it run to completion.
+    """
+
+    def __init__(
+            self, *args,
+            max_workers: Optional[int] = None,
+            mp_context: Optional[multiprocessing.context.BaseContext] = None,
+            initializer: Optional[Callable[..., None]] = None,
+            **kwargs,
+    ):
+        """Initialize ProcessPoolRouter.
+
+        :param int max_workers: the number of worker processes, \
+                                defaults to the number of CPUs
+        :param mp_context: a multiprocessing context to start workers with
+        :param initializer: a callable to run in each worker on start, \
+                            e.g. to import heavy modules upfront
+        """
+        super().__init__(*args, **kwargs)
+        self._max_workers = (
+            max_workers if max_workers is not None
+            else os.cpu_count() or 1
+        )
+        self._mp_context = mp_context
+        self._initializer = initializer
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._offloaded_handlers: MutableSet[AsyncCallback[...]] = (
+            weakref.WeakSet()
+        )
+
+    @property
+    def process_pool(self) -> ProcessPoolExecutor:
+        """Return the process pool, starting it if needed."""
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=self._max_workers,
+                mp_context=self._mp_context,
+                initializer=self._initializer,
+            )
+        return self._process_pool
+
+    async def warm_up(self) -> None:
+        """Spawn all the worker processes ahead of the first event."""
+        process_pool = self.process_pool
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(
+            loop.run_in_executor(process_pool, _warm_up_worker)
+            for _ in range(self._max_workers)
+        ))
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker processes."""
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=wait)
+            self._process_pool = None
+
+    def adapt_handler(self, func: AsyncCallback[...]) -> AsyncCallback[...]:
+        """Make the handler run in the process pool.
+
+        The handlers that already do, possibly wrapped into the route
+        options, are returned as is.
+        """
+        if inspect.unwrap(
+                func, stop=self._offloaded_handlers.__contains__,
+        ) in self._offloaded_handlers:
+            return func
+
+        offloaded_handler = self._offload(func)
+        self._offloaded_handlers.add(offloaded_handler)
+        return offloaded_handler
+
+    def _offload(self, handler: AsyncCallback[...]) -> AsyncCallback[...]:
+        """Make a coroutine function running the handler in a worker."""
+        @wraps(handler)
+        async def run_in_worker(
+                event: GitHubEvent, *args: Any, **kwargs: Any,
+        ) -> Any:
+            event_snapshot = await _make_worker_event_snapshot(event)
+            return await asyncio.get_running_loop().run_in_executor(
+                self.process_pool,
+                partial(
+                    _run_handler_in_worker,
+                    handler, event_snapshot, args, kwargs,
+                ),
+            )
+        return run_in_worker
+
+
+async def _make_worker_event_snapshot(
+        event: GitHubEvent,
+) -> _WorkerEventSnapshot:
+    """Capture the event and the API credentials in a picklable form."""
+    api_client = getattr(RUNTIME_CONTEXT, 'app_installation_client', None)
+    api_token = None if api_client is None else await api_client.get_token()
+    is_github_action = getattr(RUNTIME_CONTEXT, 'IS_GITHUB_ACTION', False)
+
+    delivery_id = getattr(event, 'delivery_id', None)
+    return _WorkerEventSnapshot(
+        name=event.name,
+        payload=dict(event.payload),
+        delivery_id=None if delivery_id is None else str(delivery_id),
+        api_token=None if api_token is None else str(api_token),
+        api_base_url=getattr(api_client, 'base_url', None),
+        user_agent=getattr(api_client, 'requester', None),
+        is_github_action=is_github_action,
+    )
@@ -4,7 +4,7 @@ from __future__ import annotations
 
 import contextlib
 import logging
-from typing import Any, Iterable
+from typing import Any, Iterable, Optional
 
 from anyio import get_cancelled_exc_class
 from anyio import sleep as async_sleep
@@ -20,7 +20,20 @@ from ..github.errors import GitHubActionError
 # pylint: disable=relative-beyond-top-level,import-error
 from ..github.models.events import GitHubEvent
 # pylint: disable=relative-beyond-top-level,import-error
+from ..runtime.bot_items import BOT_ITEMS
+# pylint: disable=relative-beyond-top-level,import-error
+from ..runtime.config_cache import INSTALLATION_CONFIG_CACHE
+# pylint: disable=relative-beyond-top-level,import-error
 from ..runtime.context import RUNTIME_CONTEXT
+# pylint: disable=relative-beyond-top-level,import-error
+from ..runtime.deadlines import DeadlineState, deadline_scope, record_timeout
+# pylint: disable=relative-beyond-top-level,import-error
+from ..runtime.memo import DeliveryMemoStore
+# pylint: disable=relative-beyond-top-level,import-error
+from ..runtime.mutations import MutationBatch
+# pylint: disable=relative-beyond-top-level,import-error
+from ..runtime.resources import event_resources_scope
+from .errors import EventShedError
 
 
 __all__ = ('route_github_event',)
@@ -34,14 +47,22 @@ async def route_github_event(  # type: ignore[return]  # FIXME
         *,
         github_event: GitHubEvent,
         github_app: GitHubApp,
+        deadline: Optional[float] = None,
 ) -> Iterable[Any]:
     """Dispatch GitHub event to corresponding handlers.
 
     Set up ``RUNTIME_CONTEXT`` before doing that. This is so
     the concrete event handlers have access to the API client
     and flags in runtime.
+
+    If ``deadline`` is set, the handlers get cancelled once they've
+    been running for that many seconds. What's left of it is applied
+    to the GitHub API calls they make.
     """
     is_gh_action = isinstance(github_app, GitHubAction)
+    INSTALLATION_CONFIG_CACHE.observe_event(github_event)
+    BOT_ITEMS.observe_event(github_event)
+
     # pylint: disable=assigning-non-slot
     RUNTIME_CONTEXT.IS_GITHUB_ACTION = is_gh_action
     # pylint: disable=assigning-non-slot
@@ -53,6 +74,15 @@ async def route_github_event(  # type: ignore[return]  # FIXME
     # pylint: disable=assigning-non-slot
     RUNTIME_CONTEXT.github_event = github_event
 
+    delivery_memo = DeliveryMemoStore()
+    # pylint: disable=assigning-non-slot
+    RUNTIME_CONTEXT.delivery_memo = delivery_memo
+
+    delivery_mutations = MutationBatch()
+    # pylint: disable=assigning-non-slot
+    RUNTIME_CONTEXT.delivery_mutations = delivery_mutations
+    is_dispatch_cancelled = False
+
     # pylint: disable=assigning-non-slot
     RUNTIME_CONTEXT.app_installation = None
     if is_gh_action:
@@ -84,55 +114,132 @@ async def route_github_event(  # type: ignore[return]  # FIXME
         # and actions are executed in workflows that rely on those VMs.
         await async_sleep(1)
 
+    dispatch_deadline = DeadlineState()
     try:
-        return await github_app.dispatch_event(github_event)
-    except GitHubActionError:
-        # Bypass GitHub Actions errors as they are supposed to be a
-        # mechanism for communicating outcomes and are expected.
-        raise
+        with event_resources_scope(github_event):
+            async with deadline_scope(deadline) as dispatch_deadline:
+                return await github_app.dispatch_event(github_event)
     except get_cancelled_exc_class():
+        is_dispatch_cancelled = True
         raise
     except Exception as exc:  # pylint: disable=broad-except
-        # NOTE: It's probably better to wrap each event handler with
-        # NOTE: try/except and call `capture_exception()` there instead.
-        # NOTE: We'll also need to figure out the magic of associating
-        # NOTE: breadcrumbs with event handlers.
-        sentry_sdk.capture_exception(exc)
-
-        # NOTE: Framework-wise, these exceptions are meaningless because they
-        # NOTE: can be anything random that the webhook author (octomachinery
-        # NOTE: end-user) forgot to handle. There's nothing we can do about
-        # NOTE: them except put in the log so that the end-user would be able
-        # NOTE: to properly debug their problem by inspecting the logs.
-        # NOTE: P.S. This is also where we'd inject Sentry
-        if isinstance(exc.__context__, get_cancelled_exc_class()):
-            # The CancelledError context is irrelevant to the
-            # user-defined webhook event handler workflow so we're
-            # dropping it from the logs:
-            exc.__context__ = None
-
-        logger.exception(
-            'An unhandled exception happened while running webhook '
-            'event handlers for "%s"...',
-            github_event.name,
+        if _handle_dispatch_error(
+                exc, github_event,
+                is_gh_action=is_gh_action,
+                deadline=deadline if dispatch_deadline.has_expired else None,
+        ):
+            raise
+    finally:
+        if is_dispatch_cancelled:
+            delivery_mutations.discard()
+        else:
+            await _flush_delivery_mutations(delivery_mutations)
+
+        # NOTE: Handlers spawning background tasks may still hold
+        # NOTE: the store but the memory should be freed anyway.
+        delivery_memo.clear()
+
+
+def _handle_dispatch_error(
+        exc: Exception, github_event: GitHubEvent,
+        *,
+        is_gh_action: bool,
+        deadline: Optional[float],
+) -> bool:
+    """Log the failure of the event handlers.
+
+    :param deadline: the deadline of the dispatch if it's been hit
+    :returns: whether the exception must be propagated
+    """
+    if isinstance(exc, GitHubActionError):
+        # Bypass GitHub Actions errors as they are supposed to be a
+        # mechanism for communicating outcomes and are expected.
+        return True
+
+    if isinstance(exc, TimeoutError) and deadline is not None:
+        record_timeout(f'route_github_event[{github_event.name!s}]')
+        logger.warning(
+            'Webhook event handlers for "%s" have been cancelled after '
+            'hitting the %ss deadline',
+            github_event.name, deadline,
         )
-        delivery_id_msg = (
-            '' if is_gh_action
-            else ' (Delivery ID: '
-            # FIXME:  # pylint: disable=fixme
-            f'{github_event.delivery_id!s})'  # type: ignore[attr-defined]
+        return False
+
+    if isinstance(exc, EventShedError):
+        # NOTE: This is an expected outcome of the dispatcher overload
+        # NOTE: protection rather than a bug so there's no need for
+        # NOTE: a traceback.
+        logger.warning(
+            'Webhook event handlers for "%s" have been shed: %s',
+            github_event.name, exc,
         )
-        logger.debug(
-            'The payload of "%s" event%s is: %r',
-            github_event.name, delivery_id_msg, github_event.payload,
+        return False
+
+    _report_unhandled_exception(exc, github_event, is_gh_action=is_gh_action)
+
+    # NOTE: In GitHub Actions env, the app is supposed to run as
+    # NOTE: a foreground single event process rather than a
+    # NOTE: server for multiple events. It's okay to propagate
+    # NOTE: unhandled errors so that they are spit out to the
+    # NOTE: console.
+    return is_gh_action
+
+
+def _report_unhandled_exception(
+        exc: Exception, github_event: GitHubEvent,
+        *,
+        is_gh_action: bool,
+) -> None:
+    """Send the error of an event handler to Sentry and to the log."""
+    # NOTE: It's probably better to wrap each event handler with
+    # NOTE: try/except and call `capture_exception()` there instead.
+    # NOTE: We'll also need to figure out the magic of associating
+    # NOTE: breadcrumbs with event handlers.
+    sentry_sdk.capture_exception(exc)
+
+    # NOTE: Framework-wise, these exceptions are meaningless because they
+    # NOTE: can be anything random that the webhook author (octomachinery
+    # NOTE: end-user) forgot to handle. There's nothing we can do about
+    # NOTE: them except put in the log so that the end-user would be able
+    # NOTE: to properly debug their problem by inspecting the logs.
+    # NOTE: P.S. This is also where we'd inject Sentry
+    if isinstance(exc.__context__, get_cancelled_exc_class()):
+        # The CancelledError context is irrelevant to the
+        # user-defined webhook event handler workflow so we're
+        # dropping it from the logs:
+        exc.__context__ = None
+
+    logger.error(
+        'An unhandled exception happened while running webhook '
+        'event handlers for "%s"...',
+        github_event.name,
+        exc_info=exc,
+    )
+    delivery_id_msg = (
+        '' if is_gh_action
+        else ' (Delivery ID: '
+        # FIXME:  # pylint: disable=fixme
+        f'{github_event.delivery_id!s})'  # type: ignore[attr-defined]
+    )
+    logger.debug(
+        'The payload of "%s" event%s is: %r',
+        github_event.name, delivery_id_msg, github_event.payload,
+    )
+
+
+async def _flush_delivery_mutations(delivery_mutations: MutationBatch) -> None:
+    """Apply the label, assignee and reviewer changes of the handlers."""
+    if not delivery_mutations:
+        delivery_mutations.discard()
+        return
+
+    github_api = getattr(RUNTIME_CONTEXT, 'app_installation_client', None)
+    if github_api is None:
+        logger.warning(
+            'Dropping %d batched mutations: no installation API client',
+            len(delivery_mutations),
         )
+        delivery_mutations.discard()
+        return
 
-        if is_gh_action:
-            # NOTE: In GitHub Actions env, the app is supposed to run as
-            # NOTE: a foreground single event process rather than a
-            # NOTE: server for multiple events. It's okay to propagate
-            # NOTE: unhandled errors so that they are spit out to the
-            # NOTE: console.
-            raise
-    except BaseException:  # SystemExit + KeyboardInterrupt + GeneratorExit
-        raise
+    await delivery_mutations.flush(github_api)
@@ -0,0 +1,304 @@
+"""An index of the comments and commit statuses the bot owns.
+
+Sticky comments are marked with a hidden key so that they can be found
+and updated in place. The key is only unique per bot account so that
+several apps installed into the same repository don't take over each
+other's comments. The index remembers their IDs and content hashes
+per issue or pull request, as well as the commit statuses the bot has
+set. It's kept up to date from the ``issue_comment`` and ``status``
+webhooks so that upserting rarely needs listing the comments and never
+makes an API call when nothing has changed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import typing
+import weakref
+from collections import OrderedDict
+from enum import Enum
+from http import HTTPStatus
+
+import gidgethub
+
+import attr
+
+
+if typing.TYPE_CHECKING:
+    # pylint: disable=relative-beyond-top-level
+    from ..github.models.events import GitHubEvent
+
+
+__all__ = (
+    'BOT_ITEMS',
+    'BotItemsIndex',
+    'UpsertOutcome',
+    'make_comment_marker',
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+ThreadKey = typing.Tuple[str, int]
+"""Repository slug and issue or pull request number."""
+
+StatusKey = typing.Tuple[str, str, str]
+"""Repository slug, commit SHA and status context."""
+
+CommentKey = typing.Tuple[str, str]
+"""Bot login and sticky comment key."""
+
+_COMMENT_MARKER_RE = re.compile(r'<!-- octomachinery:sticky:(?P<key>\S+) -->')
+
+
+class UpsertOutcome(str, Enum):
+    """What an upsert has done."""
+
+    CREATED = 'created'
+    UPDATED = 'updated'
+    UNCHANGED = 'unchanged'
+
+
+def make_comment_marker(comment_key: str) -> str:
+    """Return the hidden marker identifying the sticky comment."""
+    return f'<!-- octomachinery:sticky:{comment_key!s} -->'
+
+
+def _hash_content(content: typing.Any) -> str:
+    return hashlib.sha256(
+        json.dumps(content, sort_keys=True).encode(),
+    ).hexdigest()
+
+
+@attr.dataclass(frozen=True)
+class OwnedComment:
+    """A sticky comment of the bot."""
+
+    comment_id: int
+    """The ID of the comment."""
+    body_hash: str
+    """The hash of the current comment body."""
+
+
+@attr.dataclass
+class _ThreadComments:
+    """The known sticky comments of an issue or a pull request."""
+
+    comments: typing.Dict[CommentKey, OwnedComment] = attr.ib(factory=dict)
+    """The sticky comments by their authors and keys."""
+    is_complete: bool = False
+    """Whether all the comments of the thread have been seen."""
+
+
+class BotItemsIndex:
+    """Sticky comments and commit statuses of the bot.
+
+    The index is bounded: the least recently used threads and statuses
+    are forgotten and will be looked up again when needed.
+    """
+
+    def __init__(
+            self, max_threads: int = 4096, max_statuses: int = 16384,
+    ):
+        """Initialize BotItemsIndex.
+
+        :param int max_threads: the number of issues and PRs to track
+        :param int max_statuses: the number of commit statuses to track
+        """
+        self.max_threads = max_threads
+        self.max_statuses = max_statuses
+        self._threads: typing.OrderedDict[ThreadKey, _ThreadComments] = (
+            OrderedDict()
+        )
+        self._statuses: typing.OrderedDict[StatusKey, str] = OrderedDict()
+        self._thread_locks: typing.MutableMapping[
+            ThreadKey, asyncio.Lock,
+        ] = weakref.WeakValueDictionary()
+
+    def _get_thread(self, thread_key: ThreadKey) -> _ThreadComments:
+        try:
+            self._threads.move_to_end(thread_key)
+        except KeyError:
+            self._threads[thread_key] = _ThreadComments()
+            while len(self._threads) > self.max_threads:
+                self._threads.popitem(last=False)
+        return self._threads[thread_key]
+
+    def _remember_status(self, status_key: StatusKey, status_hash: str):
+        self._statuses[status_key] = status_hash
+        self._statuses.move_to_end(status_key)
+        while len(self._statuses) > self.max_statuses:
+            self._statuses.popitem(last=False)
+
+    def _observe_comment(
+            self, thread: _ThreadComments,
+            comment: typing.Mapping[str, typing.Any],
+    ) -> None:
+        """Remember the comment if it's a sticky one of a bot."""
+        comment_author = comment.get('user') or {}
+        if comment_author.get('type') != 'Bot':
+            return
+        marker_match = _COMMENT_MARKER_RE.search(comment.get('body') or '')
+        if marker_match is None:
+            return
+        owned_comment_key = comment_author['login'], marker_match['key']
+        thread.comments[owned_comment_key] = OwnedComment(
+            comment_id=comment['id'], body_hash=_hash_content(comment['body']),
+        )
+
+    def observe_event(self, event: GitHubEvent) -> None:
+        """Update the index from ``issue_comment`` and ``status`` events."""
+        payload = event.payload
+        repo_slug = (payload.get('repository') or {}).get('full_name')
+        if repo_slug is None:
+            return
+
+        if event.name == 'status':
+            self._remember_status(
+                (repo_slug, payload['sha'], payload['context']),
+                _hash_content([
+                    payload['state'],
+                    payload.get('description'),
+                    payload.get('target_url'),
+                ]),
+            )
+            return
+
+        if event.name != 'issue_comment':
+            return
+
+        thread = self._get_thread((repo_slug, payload['issue']['number']))
+        comment = payload['comment']
+        if payload.get('action') == 'deleted':
+            thread.comments = {
+                comment_key: owned_comment
+                for comment_key, owned_comment in thread.comments.items()
+                if owned_comment.comment_id != comment['id']
+            }
+            return
+
+        self._observe_comment(thread, comment)
+
+    async def _scan_thread(
+            self, github_api: typing.Any,
+            thread_key: ThreadKey, thread: _ThreadComments,
+    ) -> None:
+        repo_slug, number = thread_key
+        async for comment in github_api.getiter(
+                f'/repos/{repo_slug!s}/issues/{number:d}/comments',
+        ):
+            self._observe_comment(thread, comment)
+        thread.is_complete = True
+
+    async def upsert_comment(
+            self, github_api: typing.Any,
+            repo_slug: str, number: int,
+            comment_key: str, body: str,
+            *,
+            bot_login: str,
+    ) -> UpsertOutcome:
+        """Create or update the sticky comment unless it's up to date.
+
+        The comments of the thread are only listed if it's not known
+        whether the sticky comment exists.
+
+        :param str bot_login: the account the API client posts as, \
+                              like ``{app-slug}[bot]``, only its \
+                              comments are updated
+        """
+        thread_key = repo_slug, number
+        marked_body = f'{body!s}\n\n{make_comment_marker(comment_key)!s}'
+        owned_comment_key = bot_login, comment_key
+        body_hash = _hash_content(marked_body)
+
+        # NOTE: Concurrent upserts of the same thread must not end up
+        # NOTE: creating duplicate comments.
+        thread_lock = self._thread_locks.get(thread_key)
+        if thread_lock is None:
+            thread_lock = self._thread_locks[thread_key] = asyncio.Lock()
+
+        async with thread_lock:
+            thread = self._get_thread(thread_key)
+            if (
+                    owned_comment_key not in thread.comments
+                    and not thread.is_complete
+            ):
+                await self._scan_thread(github_api, thread_key, thread)
+
+            owned_comment = thread.comments.get(owned_comment_key)
+            if owned_comment is not None:
+                if owned_comment.body_hash == body_hash:
+                    return UpsertOutcome.UNCHANGED
+                try:
+                    await github_api.patch(
+                        f'/repos/{repo_slug!s}/issues/comments/'
+                        f'{owned_comment.comment_id:d}',
+                        data={'body': marked_body},
+                    )
+                except gidgethub.BadRequest as http_bad_req:
+                    if http_bad_req.status_code != HTTPStatus.NOT_FOUND:
+                        raise
+                    logger.debug(
+                        'Sticky comment %s is gone, re-creating it',
+                        owned_comment.comment_id,
+                    )
+                else:
+                    thread.comments[owned_comment_key] = attr.evolve(
+                        owned_comment, body_hash=body_hash,
+                    )
+                    return UpsertOutcome.UPDATED
+
+            new_comment = await github_api.post(
+                f'/repos/{repo_slug!s}/issues/{number:d}/comments',
+                data={'body': marked_body},
+            )
+            thread.comments[owned_comment_key] = OwnedComment(
+                comment_id=new_comment['id'], body_hash=body_hash,
+            )
+            return UpsertOutcome.CREATED
+
+    async def upsert_commit_status(
+            self, github_api: typing.Any,
+            repo_slug: str, sha: str, context: str,
+            *,
+            state: str,
+            description: typing.Optional[str] = None,
+            target_url: typing.Optional[str] = None,
+    ) -> UpsertOutcome:
+        """Set the commit status unless it's been set like that already."""
+        status_key = repo_slug, sha, context
+        status_hash = _hash_content([state, description, target_url])
+        known_status_hash = self._statuses.get(status_key)
+        if known_status_hash == status_hash:
+            self._statuses.move_to_end(status_key)
+            return UpsertOutcome.UNCHANGED
+
+        await github_api.post(
+            f'/repos/{repo_slug!s}/statuses/{sha!s}',
+            data={
+                'state': state,
+                'context': context,
+                **({} if description is None
+                   else {'description': description}),
+                **({} if target_url is None else {'target_url': target_url}),
+            },
+        )
+        self._remember_status(status_key, status_hash)
+        return (
+            UpsertOutcome.CREATED if known_status_hash is None
+            else UpsertOutcome.UPDATED
+        )
+
+    def clear(self) -> None:
+        """Forget everything."""
+        self._threads.clear()
+        self._statuses.clear()
+
+
+BOT_ITEMS = BotItemsIndex()
+"""The index of the bot-owned items shared by the handlers."""
@@ -0,0 +1,156 @@
+"""A process-wide cache of the parsed repository config files.
+
+Entries are keyed by the repository, the ref (``None`` standing for the
+default branch) and the file path. They are revalidated with ETags and
+dropped when a ``push`` event reports changes to the cached file.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import typing
+from collections import OrderedDict
+
+import attr
+
+
+if typing.TYPE_CHECKING:
+    # pylint: disable=relative-beyond-top-level
+    from ..github.models.events import GitHubEvent
+
+
+__all__ = (
+    'INSTALLATION_CONFIG_CACHE',
+    'CachedConfig',
+    'ConfigCache',
+    'is_immutable_ref',
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+ConfigCacheKey = typing.Tuple[str, typing.Optional[str], str]
+"""Repository slug, ref and file path."""
+
+_COMMIT_SHA_RE = re.compile(r'^[0-9a-f]{40}$')
+
+
+@attr.dataclass(frozen=True)
+class CachedConfig:
+    """A parsed config file along with its validator."""
+
+    config: typing.Any
+    """The parsed config contents."""
+    etag: typing.Optional[str]
+    """The ETag of the contents API response."""
+    size: int
+    """The size of the raw config file."""
+
+
+def is_immutable_ref(ref: typing.Optional[str]) -> bool:
+    """Check whether the ref is a commit SHA that never changes."""
+    return ref is not None and _COMMIT_SHA_RE.match(ref) is not None
+
+
+class ConfigCache:
+    """An LRU cache of parsed config files bounded by their total size."""
+
+    def __init__(self, max_size: int = 16 * 1024 * 1024):
+        """Initialize ConfigCache.
+
+        :param int max_size: the total size of the raw files to keep, \
+                             0 disables caching
+        """
+        self.max_size = max_size
+        self._entries: typing.OrderedDict[ConfigCacheKey, CachedConfig] = (
+            OrderedDict()
+        )
+        self._total_size = 0
+
+    def __len__(self) -> int:
+        """Return the number of the cached files."""
+        return len(self._entries)
+
+    @property
+    def total_size(self) -> int:
+        """Return the size of all the cached raw files."""
+        return self._total_size
+
+    def get(self, key: ConfigCacheKey) -> typing.Optional[CachedConfig]:
+        """Return the cached config, marking it as recently used."""
+        try:
+            self._entries.move_to_end(key)
+        except KeyError:
+            return None
+        return self._entries[key]
+
+    def put(self, key: ConfigCacheKey, cached_config: CachedConfig) -> None:
+        """Remember the config and evict the least recently used ones."""
+        self.invalidate(key)
+        if cached_config.size > self.max_size:
+            return
+
+        self._entries[key] = cached_config
+        self._total_size += cached_config.size
+        while self._total_size > self.max_size:
+            _evicted_key, evicted_config = self._entries.popitem(last=False)
+            self._total_size -= evicted_config.size
+
+    def invalidate(self, key: ConfigCacheKey) -> None:
+        """Forget the config."""
+        cached_config = self._entries.pop(key, None)
+        if cached_config is not None:
+            self._total_size -= cached_config.size
+
+    def clear(self) -> None:
+        """Forget all the configs."""
+        self._entries.clear()
+        self._total_size = 0
+
+    def observe_event(self, event: GitHubEvent) -> None:
+        """Invalidate the configs a ``push`` event has changed."""
+        if event.name != 'push':
+            return
+
+        payload = event.payload
+        repo = payload.get('repository') or {}
+        repo_slug = repo.get('full_name')
+        pushed_ref = payload.get('ref') or ''
+        if repo_slug is None or not pushed_ref.startswith('refs/heads/'):
+            return
+
+        branch_name = pushed_ref[len('refs/heads/'):]
+        affected_refs = {branch_name, pushed_ref}
+        if branch_name == repo.get('default_branch'):
+            affected_refs.add(None)
+
+        commits = payload.get('commits') or []
+        # NOTE: The commit list may be truncated. When some commits are
+        # NOTE: left out or the history is rewritten, there's no telling
+        # NOTE: what has changed so every config on the branch is dropped.
+        changed_paths: typing.Optional[typing.Set[str]] = None
+        is_history_rewritten = payload.get('forced') or payload.get('deleted')
+        if not is_history_rewritten and len(commits) >= payload.get(
+                'size', len(commits),
+        ):
+            changed_paths = {
+                changed_path
+                for commit in commits
+                for change_kind in ('added', 'modified', 'removed')
+                for changed_path in commit.get(change_kind, ())
+            }
+
+        stale_keys = [
+            key for key in self._entries
+            if key[0] == repo_slug and key[1] in affected_refs
+            and (changed_paths is None or key[2] in changed_paths)
+        ]
+        for stale_key in stale_keys:
+            logger.debug('Invalidating cached config %s', stale_key)
+            self.invalidate(stale_key)
+
+
+INSTALLATION_CONFIG_CACHE = ConfigCache()
+"""The cache behind ``get_installation_config()``."""
@@ -15,6 +15,8 @@ RUNTIME_CONTEXT = _ContextMap(
     app_installation='app installation',
     app_installation_client='app installation client',
     config='config context',
+    delivery_memo='delivery memo store',
+    delivery_mutations='delivery mutations batch',
     github_app='github app',
     github_event='GitHub Event',
     IS_GITHUB_ACTION='Is GitHub Action',
@@ -0,0 +1,130 @@
+"""Deadlines of the webhook event handlers.
+
+A deadline is stored in a context var as an absolute point in time so
+that every task spawned while handling an event inherits what's left of
+the time budget, down to the individual GitHub API calls.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+import typing
+from collections import Counter
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+import anyio
+
+
+__all__ = (
+    'DeadlineState',
+    'deadline_scope',
+    'get_remaining_time',
+    'get_timeout_counts',
+    'record_timeout',
+    'with_deadline',
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+_current_deadline: ContextVar[typing.Optional[float]] = ContextVar(
+    'current_deadline', default=None,
+)
+"""Monotonic clock time by which the current handler must finish."""
+
+_timeout_counts: typing.Counter[str] = Counter()
+"""Number of the time-outs per handler name."""
+
+
+def get_remaining_time() -> typing.Optional[float]:
+    """Return seconds left until the current deadline, if there's any."""
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return None
+    return max(deadline - time.monotonic(), 0)
+
+
+def record_timeout(handler_name: str) -> None:
+    """Count a handler that has run out of time."""
+    _timeout_counts[handler_name] += 1
+
+
+def get_timeout_counts() -> typing.Dict[str, int]:
+    """Return the number of the time-outs per handler name."""
+    return dict(_timeout_counts)
+
+
+class DeadlineState:  # pylint: disable=too-few-public-methods
+    """The outcome of a deadline scope."""
+
+    def __init__(self):
+        """Initialize DeadlineState."""
+        self.has_expired = False
+        """Whether it's this scope's deadline that has been hit."""
+
+
+@asynccontextmanager
+async def deadline_scope(
+        timeout: typing.Optional[float],
+) -> typing.AsyncIterator[DeadlineState]:
+    """Cancel the block if it doesn't complete within ``timeout``.
+
+    A scope nested into another one never extends the outer deadline.
+    It only enforces a tighter one. The yielded state tells the
+    time-outs of this scope apart from the ``TimeoutError`` raised
+    by anything else.
+
+    :raises TimeoutError: if this scope's deadline is hit
+    """
+    deadline_state = DeadlineState()
+    outer_deadline = _current_deadline.get()
+    deadline = None if timeout is None else time.monotonic() + timeout
+    if deadline is None or (
+            outer_deadline is not None and outer_deadline <= deadline
+    ):
+        # NOTE: The outer scope is going to fire first anyway.
+        yield deadline_state
+        return
+
+    deadline_token = _current_deadline.set(deadline)
+    try:
+        async with anyio.fail_after(timeout) as cancel_scope:
+            try:
+                yield deadline_state
+            finally:
+                # NOTE: Only this scope's deadline cancels it.
+                deadline_state.has_expired = cancel_scope.cancel_called
+    finally:
+        _current_deadline.reset(deadline_token)
+
+
+def with_deadline(timeout: float):
+    """Cancel the wrapped handler if it runs longer than ``timeout``.
+
+    The time-out is logged and counted rather than propagated further.
+    """
+    def decorator(wrapped_function):
+        handler_name = wrapped_function.__qualname__
+
+        @wraps(wrapped_function)
+        async def wrapper(*args, **kwargs):
+            handler_deadline = DeadlineState()
+            try:
+                async with deadline_scope(timeout) as handler_deadline:
+                    return await wrapped_function(*args, **kwargs)
+            except TimeoutError:
+                if not handler_deadline.has_expired:
+                    raise
+                record_timeout(handler_name)
+                logger.warning(
+                    'Event handler %s has been cancelled after hitting '
+                    'its %ss deadline',
+                    handler_name, timeout,
+                )
+                return None
+        return wrapper
+    return decorator
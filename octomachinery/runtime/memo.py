@@ -0,0 +1,143 @@
+"""Memoization scoped to a single event delivery.
+
+The store lives in ``RUNTIME_CONTEXT.delivery_memo`` while the event is
+being dispatched so that all of its handlers can reuse the same reads
+and computations. It's emptied once the dispatch is over.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+import typing
+from functools import wraps
+
+# pylint: disable=relative-beyond-top-level
+from .context import RUNTIME_CONTEXT
+
+
+__all__ = (
+    'DeliveryMemoStore',
+    'get_delivery_memo',
+    'memoize_in_delivery',
+    'memoized_per_delivery',
+)
+
+
+class DeliveryMemoStore:
+    """Results of the coroutines computed during one delivery.
+
+    Concurrent requests for the same key share a single computation.
+    Failed computations aren't remembered.
+    """
+
+    def __init__(self):
+        """Initialize DeliveryMemoStore."""
+        self._entries: typing.Dict[typing.Hashable, asyncio.Task[typing.Any]]
+        self._entries = {}
+        self.hits = 0
+        """Number of the lookups served from the store."""
+        self.misses = 0
+        """Number of the lookups that had to compute the value."""
+
+    def __len__(self) -> int:
+        """Return the number of the remembered values."""
+        return len(self._entries)
+
+    def _forget_failed(
+            self, key: typing.Hashable, task: asyncio.Task[typing.Any],
+    ) -> None:
+        if task.cancelled() or task.exception() is not None:
+            if self._entries.get(key) is task:
+                del self._entries[key]
+
+    async def memoize(
+            self,
+            key: typing.Hashable,
+            compute: typing.Callable[[], typing.Awaitable[typing.Any]],
+            *,
+            copy_result: bool = False,
+    ) -> typing.Any:
+        """Return the value of ``compute()`` remembered under ``key``.
+
+        :param bool copy_result: return a deep copy so that callers \
+                                 mutating the value don't affect others
+        """
+        try:
+            compute_task = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            compute_task = self._entries[key] = asyncio.ensure_future(
+                compute(),
+            )
+            compute_task.add_done_callback(
+                lambda task: self._forget_failed(key, task),
+            )
+        else:
+            self.hits += 1
+
+        # NOTE: Shielding the computation so that cancelling one caller
+        # NOTE: doesn't break the other ones awaiting the same value.
+        result = await asyncio.shield(compute_task)
+        return copy.deepcopy(result) if copy_result else result
+
+    def forget(
+            self, is_stale: typing.Callable[[typing.Hashable], bool],
+    ) -> None:
+        """Drop the values with the keys matching the predicate.
+
+        The computations in progress aren't cancelled, only detached
+        so that the next lookups start over.
+        """
+        for key in [key for key in self._entries if is_stale(key)]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        """Drop all the remembered values."""
+        for compute_task in self._entries.values():
+            compute_task.cancel()
+        self._entries.clear()
+
+
+def get_delivery_memo() -> typing.Optional[DeliveryMemoStore]:
+    """Return the memo store of the current delivery if there's any."""
+    return getattr(RUNTIME_CONTEXT, 'delivery_memo', None)
+
+
+async def memoize_in_delivery(
+        key: typing.Hashable,
+        compute: typing.Callable[[], typing.Awaitable[typing.Any]],
+        *,
+        copy_result: bool = False,
+) -> typing.Any:
+    """Compute the value once per delivery, or each time outside one."""
+    delivery_memo = get_delivery_memo()
+    if delivery_memo is None:
+        return await compute()
+    return await delivery_memo.memoize(key, compute, copy_result=copy_result)
+
+
+def memoized_per_delivery(wrapped_function):
+    """Remember results of the coroutine function per delivery.
+
+    The arguments must be hashable since they are a part of the key.
+
+    Usage::
+
+        >>> from octomachinery.runtime.memo import memoized_per_delivery
+        >>> @memoized_per_delivery
+        ... async def count_open_issues(repo_slug):
+        ...     ...
+    """
+    @wraps(wrapped_function)
+    async def wrapper(*args, **kwargs):
+        return await memoize_in_delivery(
+            (
+                wrapped_function.__module__,
+                wrapped_function.__qualname__,
+                args,
+                frozenset(kwargs.items()),
+            ),
+            lambda: wrapped_function(*args, **kwargs),
+        )
+    return wrapper
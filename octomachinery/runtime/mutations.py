@@ -0,0 +1,358 @@
+"""Batching of the issue and pull request mutations of one delivery.
+
+Handlers of the same event often change the labels, the assignees or
+the requested reviewers of the same issue or PR. The batch collects
+such changes from all of them, merges them and makes the minimal set of
+API calls once the dispatch is over. If several handlers disagree on an
+item, the change requested last wins.
+
+Each change request gets a future that's resolved once the API calls
+making the change are done. Awaiting it in a handler of the same
+delivery would never finish since the batch is only flushed after all
+the handlers return.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import typing
+from enum import Enum
+from http import HTTPStatus
+
+import gidgethub
+
+import attr
+
+# pylint: disable=relative-beyond-top-level
+from .context import RUNTIME_CONTEXT
+
+
+__all__ = (
+    'MutationBatch',
+    'MutationKind',
+    'get_mutation_batch',
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+class MutationKind(str, Enum):
+    """The things of issues and pull requests the batch can change."""
+
+    LABELS = 'labels'
+    ASSIGNEES = 'assignees'
+    REVIEWERS = 'reviewers'
+    TEAM_REVIEWERS = 'team_reviewers'
+
+
+MutationTarget = typing.Tuple[str, int]
+"""Repository slug and issue or pull request number."""
+
+
+@attr.dataclass
+class _ItemChange:
+    """The latest requested change of a single label or user."""
+
+    is_addition: bool
+    """Whether the item is to be added rather than removed."""
+    waiters: typing.List[asyncio.Future[None]] = attr.ib(factory=list)
+    """Futures of all the requests that touched the item."""
+
+
+@attr.dataclass(frozen=True)
+class _APICall:
+    """A request to make along with the futures depending on it."""
+
+    method: str
+    url: str
+    data: typing.Any
+    waiters: typing.Tuple[asyncio.Future[None], ...]
+    url_vars: typing.Mapping[str, str] = attr.ib(factory=dict)
+    """The values to escape and put into the URL template."""
+
+
+def _retrieve_exception(future: asyncio.Future[None]) -> None:
+    # NOTE: Failures are logged by the batch, so nobody needs to be
+    # NOTE: warned about the ones the callers didn't look at.
+    if not future.cancelled():
+        future.exception()
+
+
+class MutationBatch:
+    """Changes to the issues and PRs requested during one delivery."""
+
+    def __init__(self):
+        """Initialize MutationBatch."""
+        self._changes: typing.Dict[
+            MutationTarget,
+            typing.Dict[MutationKind, typing.Dict[str, _ItemChange]],
+        ] = {}
+        self._is_flushed = False
+
+    def __len__(self) -> int:
+        """Return the number of the items with pending changes."""
+        return sum(
+            len(item_changes)
+            for target_changes in self._changes.values()
+            for item_changes in target_changes.values()
+        )
+
+    @property
+    def is_flushed(self) -> bool:
+        """Return whether the batch takes no more changes."""
+        return self._is_flushed
+
+    def _record(
+            self, repo_slug: str, number: int,
+            changes: typing.Mapping[MutationKind, typing.Iterable[str]],
+            *,
+            is_addition: bool,
+    ) -> asyncio.Future[None]:
+        if self._is_flushed:
+            raise RuntimeError('The mutation batch has been flushed already')
+
+        change_waiter: asyncio.Future[None] = (
+            asyncio.get_event_loop().create_future()
+        )
+        change_waiter.add_done_callback(_retrieve_exception)
+        target_changes = self._changes.setdefault((repo_slug, number), {})
+        has_items = False
+        for mutation_kind, items in changes.items():
+            item_changes = target_changes.setdefault(mutation_kind, {})
+            for item in items:
+                has_items = True
+                waiters = item_changes.pop(
+                    item, _ItemChange(is_addition=is_addition),
+                ).waiters
+                item_changes[item] = _ItemChange(
+                    is_addition=is_addition,
+                    waiters=[*waiters, change_waiter],
+                )
+
+        if not has_items:
+            change_waiter.set_result(None)
+        return change_waiter
+
+    def add_labels(
+            self, repo_slug: str, number: int, *labels: str,
+    ) -> asyncio.Future[None]:
+        """Request adding labels to the issue or the PR."""
+        return self._record(
+            repo_slug, number, {MutationKind.LABELS: labels},
+            is_addition=True,
+        )
+
+    def remove_labels(
+            self, repo_slug: str, number: int, *labels: str,
+    ) -> asyncio.Future[None]:
+        """Request removing labels from the issue or the PR."""
+        return self._record(
+            repo_slug, number, {MutationKind.LABELS: labels},
+            is_addition=False,
+        )
+
+    def add_assignees(
+            self, repo_slug: str, number: int, *assignees: str,
+    ) -> asyncio.Future[None]:
+        """Request assigning users to the issue or the PR."""
+        return self._record(
+            repo_slug, number, {MutationKind.ASSIGNEES: assignees},
+            is_addition=True,
+        )
+
+    def remove_assignees(
+            self, repo_slug: str, number: int, *assignees: str,
+    ) -> asyncio.Future[None]:
+        """Request unassigning users from the issue or the PR."""
+        return self._record(
+            repo_slug, number, {MutationKind.ASSIGNEES: assignees},
+            is_addition=False,
+        )
+
+    def request_reviewers(
+            self, repo_slug: str, number: int,
+            reviewers: typing.Iterable[str] = (),
+            team_reviewers: typing.Iterable[str] = (),
+    ) -> asyncio.Future[None]:
+        """Request reviews of the PR from users and teams."""
+        return self._record(
+            repo_slug, number,
+            {
+                MutationKind.REVIEWERS: reviewers,
+                MutationKind.TEAM_REVIEWERS: team_reviewers,
+            },
+            is_addition=True,
+        )
+
+    def remove_requested_reviewers(
+            self, repo_slug: str, number: int,
+            reviewers: typing.Iterable[str] = (),
+            team_reviewers: typing.Iterable[str] = (),
+    ) -> asyncio.Future[None]:
+        """Withdraw the review requests of the PR."""
+        return self._record(
+            repo_slug, number,
+            {
+                MutationKind.REVIEWERS: reviewers,
+                MutationKind.TEAM_REVIEWERS: team_reviewers,
+            },
+            is_addition=False,
+        )
+
+    def _plan_api_calls(self) -> typing.List[_APICall]:
+        """Merge the changes into as few API calls as possible."""
+        api_calls = []
+
+        def make_api_call(
+                method: str, url: str, data: typing.Any,
+                item_changes: typing.Iterable[_ItemChange],
+                url_vars: typing.Optional[typing.Mapping[str, str]] = None,
+        ) -> _APICall:
+            return _APICall(
+                method=method, url=url, data=data,
+                waiters=tuple(
+                    waiter
+                    for item_change in item_changes
+                    for waiter in item_change.waiters
+                ),
+                url_vars=url_vars or {},
+            )
+
+        for (repo_slug, number), target_changes in self._changes.items():
+            issue_url = f'/repos/{repo_slug!s}/issues/{number:d}'
+            changes_by_direction: typing.Dict[
+                typing.Tuple[MutationKind, bool],
+                typing.Dict[str, _ItemChange],
+            ] = {}
+            for mutation_kind, item_changes in target_changes.items():
+                for item, item_change in item_changes.items():
+                    changes_by_direction.setdefault(
+                        (mutation_kind, item_change.is_addition), {},
+                    )[item] = item_change
+
+            added_labels = changes_by_direction.get(
+                (MutationKind.LABELS, True), {},
+            )
+            if added_labels:
+                api_calls.append(make_api_call(
+                    'POST', f'{issue_url!s}/labels',
+                    {'labels': list(added_labels)},
+                    added_labels.values(),
+                ))
+            # NOTE: There's no endpoint for removing many labels at once.
+            for label, label_change in changes_by_direction.get(
+                    (MutationKind.LABELS, False), {},
+            ).items():
+                api_calls.append(make_api_call(
+                    'DELETE', f'{issue_url!s}/labels/{{label}}', None,
+                    (label_change, ),
+                    url_vars={'label': label},
+                ))
+
+            for is_addition in (True, False):
+                assignees = changes_by_direction.get(
+                    (MutationKind.ASSIGNEES, is_addition), {},
+                )
+                if assignees:
+                    api_calls.append(make_api_call(
+                        'POST' if is_addition else 'DELETE',
+                        f'{issue_url!s}/assignees',
+                        {'assignees': list(assignees)},
+                        assignees.values(),
+                    ))
+
+                reviewers = changes_by_direction.get(
+                    (MutationKind.REVIEWERS, is_addition), {},
+                )
+                team_reviewers = changes_by_direction.get(
+                    (MutationKind.TEAM_REVIEWERS, is_addition), {},
+                )
+                if reviewers or team_reviewers:
+                    api_calls.append(make_api_call(
+                        'POST' if is_addition else 'DELETE',
+                        f'/repos/{repo_slug!s}/pulls/{number:d}'
+                        '/requested_reviewers',
+                        {
+                            'reviewers': list(reviewers),
+                            'team_reviewers': list(team_reviewers),
+                        },
+                        (*reviewers.values(), *team_reviewers.values()),
+                    ))
+
+        return api_calls
+
+    async def _make_api_call(
+            self, github_api: typing.Any, api_call: _APICall,
+    ) -> None:
+        if api_call.method == 'POST':
+            await github_api.post(
+                api_call.url, url_vars=api_call.url_vars, data=api_call.data,
+            )
+        elif api_call.data is not None:
+            await github_api.delete(
+                api_call.url, url_vars=api_call.url_vars, data=api_call.data,
+            )
+        else:
+            try:
+                await github_api.delete(
+                    api_call.url, url_vars=api_call.url_vars,
+                )
+            except gidgethub.BadRequest as http_bad_req:
+                # NOTE: The label is not there which is what's wanted.
+                if http_bad_req.status_code != HTTPStatus.NOT_FOUND:
+                    raise
+
+    async def flush(self, github_api: typing.Any) -> None:
+        """Make the API calls and resolve the futures of the requests.
+
+        The calls are made concurrently. A request fails if any of the
+        calls making its changes fails. Nothing can be added to the
+        batch afterwards.
+        """
+        self._is_flushed = True
+        api_calls = self._plan_api_calls()
+        self._changes.clear()
+
+        call_outcomes = await asyncio.gather(
+            *(
+                self._make_api_call(github_api, api_call)
+                for api_call in api_calls
+            ),
+            return_exceptions=True,
+        )
+
+        failures: typing.Dict[asyncio.Future[None], BaseException] = {}
+        for api_call, call_outcome in zip(api_calls, call_outcomes):
+            if isinstance(call_outcome, BaseException):
+                logger.warning(
+                    'Batched %s %s has failed: %r',
+                    api_call.method, api_call.url, call_outcome,
+                )
+                for waiter in api_call.waiters:
+                    failures.setdefault(waiter, call_outcome)
+
+        for api_call in api_calls:
+            for waiter in api_call.waiters:
+                if waiter.done():
+                    continue
+                if waiter in failures:
+                    waiter.set_exception(failures[waiter])
+                else:
+                    waiter.set_result(None)
+
+    def discard(self) -> None:
+        """Drop the pending changes, cancelling the futures."""
+        self._is_flushed = True
+        for target_changes in self._changes.values():
+            for item_changes in target_changes.values():
+                for item_change in item_changes.values():
+                    for waiter in item_change.waiters:
+                        waiter.cancel()
+        self._changes.clear()
+
+
+def get_mutation_batch() -> typing.Optional[MutationBatch]:
+    """Return the mutation batch of the current delivery if there's any."""
+    return getattr(RUNTIME_CONTEXT, 'delivery_mutations', None)
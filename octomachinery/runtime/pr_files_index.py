@@ -0,0 +1,105 @@
+"""Indexes of the files changed in pull requests.
+
+An index holds the ``GET /repos/{repo}/pulls/{number}/files`` entries
+of a PR at a given head commit. It's shared by all the handlers and
+events concerning the same head so the files are only paginated once.
+"""
+
+from __future__ import annotations
+
+import typing
+
+# pylint: disable=relative-beyond-top-level
+from ..utils.diffs import DiffHunk, parse_patch_hunks
+# pylint: disable=relative-beyond-top-level
+from ..utils.pathtools import glob_sorted_paths, iter_sorted_paths_with_prefix
+from .shared_cache import SharedResultsCache
+
+
+__all__ = (
+    'PULL_REQUEST_FILES_INDEXES',
+    'PullRequestFilesIndex',
+)
+
+
+PullRequestFilesKey = typing.Tuple[str, int, str]
+"""Repository slug, pull request number and head commit SHA."""
+
+ChangedFile = typing.Mapping[str, typing.Any]
+"""A pull request file entry as returned by the GitHub API."""
+
+
+class PullRequestFilesIndex:
+    """Files changed in a pull request at a head commit."""
+
+    def __init__(
+            self, head_sha: str, changed_files: typing.Iterable[ChangedFile],
+    ):
+        """Initialize PullRequestFilesIndex."""
+        self.head_sha = head_sha
+        """The head commit the files have been listed at."""
+        self.files: typing.Tuple[ChangedFile, ...] = tuple(changed_files)
+        """The file entries in the API order."""
+        self._paths = sorted(
+            changed_file['filename'] for changed_file in self.files
+        )
+        self._files_by_path = {
+            changed_file['filename']: changed_file
+            for changed_file in self.files
+        }
+        self._parsed_hunks: typing.Dict[str, typing.Tuple[DiffHunk, ...]] = {}
+
+    def __repr__(self):
+        """Render a class instance representation."""
+        return (
+            f'{self.__class__.__name__}('
+            f'head_sha={self.head_sha!r}, files={len(self)!r})'
+        )
+
+    def __len__(self) -> int:
+        """Return the number of the changed files."""
+        return len(self.files)
+
+    def __contains__(self, file_path: object) -> bool:
+        """Check whether the file has been changed."""
+        return file_path in self._files_by_path
+
+    def get(self, file_path: str) -> typing.Optional[ChangedFile]:
+        """Return the file entry or ``None`` if it hasn't been changed."""
+        return self._files_by_path.get(file_path)
+
+    def iter_prefix(self, path_prefix: str) -> typing.Iterator[str]:
+        """Iterate over the changed paths starting with the prefix."""
+        return iter_sorted_paths_with_prefix(self._paths, path_prefix)
+
+    def glob(self, pattern: str) -> typing.List[str]:
+        """List the changed paths matching a shell-style pattern.
+
+        Unlike in a shell, ``*`` matches ``/`` too.
+        """
+        return glob_sorted_paths(self._paths, pattern)
+
+    def get_patch_hunks(self, file_path: str) -> typing.Tuple[DiffHunk, ...]:
+        """Return the parsed hunks of the file patch.
+
+        Patches are parsed on the first access. Files without a patch,
+        like binary or too big ones, have no hunks.
+
+        :raises KeyError: if the file hasn't been changed
+        """
+        try:
+            return self._parsed_hunks[file_path]
+        except KeyError:
+            pass
+
+        file_patch = self._files_by_path[file_path].get('patch')
+        parsed_hunks = self._parsed_hunks[file_path] = (
+            () if not file_patch else tuple(parse_patch_hunks(file_patch))
+        )
+        return parsed_hunks
+
+
+PULL_REQUEST_FILES_INDEXES: SharedResultsCache[
+    PullRequestFilesKey, PullRequestFilesIndex,
+] = SharedResultsCache()
+"""The cache of the PR files indexes shared by the handlers."""
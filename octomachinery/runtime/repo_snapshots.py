@@ -0,0 +1,374 @@
+"""On-disk snapshots of whole repositories at given commits.
+
+The tarball of a commit is downloaded once and decompressed into a plain
+tar file on disk. It's never extracted. Instead, the offsets of its
+members are indexed in memory and the archive is memory-mapped so that
+reading any file is a slice of the mapping.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import mmap
+import os
+import pathlib
+import tarfile
+import tempfile
+import typing
+import zlib
+from collections import OrderedDict
+from fnmatch import fnmatchcase
+
+
+__all__ = (
+    'REPO_SNAPSHOTS',
+    'RepoSnapshot',
+    'RepoSnapshotCache',
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+SnapshotKey = typing.Tuple[str, str]
+"""Repository slug and commit SHA."""
+
+MemberIndex = typing.Dict[str, typing.Tuple[int, int]]
+"""Offsets and sizes of the archived files by their repository paths."""
+
+
+def _normalize_path(file_path: str) -> str:
+    file_path = file_path.lstrip('/')
+    return file_path[2:] if file_path.startswith('./') else file_path
+
+
+def _remove_archive(archive_path: pathlib.Path) -> None:
+    try:
+        archive_path.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def _write_decompressed(
+        archive_file: typing.BinaryIO,
+        gzip_decompressor: typing.Any,
+        gzipped_chunk: typing.Optional[bytes],
+) -> None:
+    """Decompress the chunk into the file, flushing on ``None``."""
+    archive_file.write(
+        gzip_decompressor.flush() if gzipped_chunk is None
+        else gzip_decompressor.decompress(gzipped_chunk),
+    )
+
+
+def _index_tar_members(archive_path: pathlib.Path) -> MemberIndex:
+    """Map the regular files of a GitHub tarball to their data offsets.
+
+    GitHub puts everything under a ``{owner}-{repo}-{sha}/`` directory
+    which is stripped from the paths. Symlinks and submodules are left
+    out.
+    """
+    member_index: MemberIndex = {}
+    with tarfile.open(archive_path, mode='r:') as tar_archive:
+        for tar_member in tar_archive:
+            if not tar_member.isfile():
+                continue
+            _top_dir, _sep, file_path = tar_member.name.partition('/')
+            if file_path:
+                member_index[file_path] = (
+                    tar_member.offset_data, tar_member.size,
+                )
+    return member_index
+
+
+class RepoSnapshot:
+    """A read-only view of the repository files at a commit."""
+
+    def __init__(
+            self, repo_slug: str, sha: str,
+            archive_path: pathlib.Path, member_index: MemberIndex,
+    ):
+        """Initialize RepoSnapshot, memory-mapping the archive."""
+        self.repo_slug = repo_slug
+        """The repository the snapshot belongs to."""
+        self.sha = sha
+        """The commit the snapshot has been taken at."""
+        self.archive_path = archive_path
+        """The decompressed tarball location."""
+        self._member_index = member_index
+        with archive_path.open('rb') as archive_file:
+            # NOTE: The mapping stays valid after the file is closed and
+            # NOTE: even after it's evicted from the disk cache. It's
+            # NOTE: unmapped on close() or when the snapshot is collected.
+            self._archive_map = mmap.mmap(
+                archive_file.fileno(), 0, access=mmap.ACCESS_READ,
+            )
+
+    def __repr__(self):
+        """Render a class instance representation."""
+        return (
+            f'{self.__class__.__name__}('
+            f'repo_slug={self.repo_slug!r}, sha={self.sha!r}, '
+            f'files={len(self._member_index)!r})'
+        )
+
+    def __contains__(self, file_path: object) -> bool:
+        """Check whether the file exists in the snapshot."""
+        return (
+            isinstance(file_path, str)
+            and _normalize_path(file_path) in self._member_index
+        )
+
+    @property
+    def size(self) -> int:
+        """Return the size of the decompressed archive."""
+        return len(self._archive_map)
+
+    @property
+    def paths(self) -> typing.KeysView[str]:
+        """Return the paths of all the files in the snapshot."""
+        return self._member_index.keys()
+
+    def glob(self, pattern: str) -> typing.List[str]:
+        """List the file paths matching a shell-style pattern.
+
+        Unlike in a shell, ``*`` matches ``/`` too so ``*.py`` lists
+        the Python files in all the directories.
+        """
+        return sorted(
+            file_path for file_path in self._member_index
+            if fnmatchcase(file_path, pattern)
+        )
+
+    def read_bytes(self, file_path: str) -> typing.Optional[bytes]:
+        """Return the file contents or ``None`` if there's no such file."""
+        try:
+            data_offset, data_size = self._member_index[
+                _normalize_path(file_path)
+            ]
+        except KeyError:
+            return None
+        return self._archive_map[data_offset:data_offset + data_size]
+
+    def read_text(
+            self, file_path: str, encoding: str = 'utf-8',
+    ) -> typing.Optional[str]:
+        """Return the decoded file contents or ``None`` if it's missing."""
+        file_contents = self.read_bytes(file_path)
+        return None if file_contents is None else file_contents.decode(
+            encoding,
+        )
+
+    def close(self) -> None:
+        """Unmap the archive."""
+        self._archive_map.close()
+
+
+class RepoSnapshotCache:
+    """Repository snapshots kept on disk within the size limit.
+
+    Concurrent requests for the same snapshot share one download. Once
+    the total size of the archives exceeds the limit, the least recently
+    used ones are deleted. The archives left in the cache directory by
+    the earlier runs count towards the limit too and go first.
+    """
+
+    def __init__(
+            self,
+            cache_dir: typing.Union[pathlib.Path, str, None] = None,
+            max_size: int = 1024 * 1024 * 1024,
+    ):
+        """Initialize RepoSnapshotCache.
+
+        :param cache_dir: where to keep the archives, a temporary \
+                          directory is made if unset
+        :param int max_size: the total size of the decompressed archives \
+                             to keep
+        """
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self._snapshots: typing.OrderedDict[SnapshotKey, RepoSnapshot] = (
+            OrderedDict()
+        )
+        self._downloads: typing.Dict[
+            SnapshotKey, asyncio.Task[RepoSnapshot],
+        ] = {}
+        self._leftover_archives: typing.OrderedDict[pathlib.Path, int] = (
+            OrderedDict()
+        )
+        self._leftover_archives_dir: typing.Union[
+            pathlib.Path, str, None,
+        ] = None
+
+    def __len__(self) -> int:
+        """Return the number of the cached snapshots."""
+        return len(self._snapshots)
+
+    @property
+    def total_size(self) -> int:
+        """Return the size of all the cached archives."""
+        return sum(
+            snapshot.size for snapshot in self._snapshots.values()
+        ) + sum(self._leftover_archives.values())
+
+    def _get_cache_dir(self) -> pathlib.Path:
+        if self.cache_dir is None:
+            self.cache_dir = tempfile.mkdtemp(prefix='octomachinery-repos-')
+        cache_dir = pathlib.Path(self.cache_dir)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        return cache_dir
+
+    def _scan_leftover_archives(
+            self, cache_dir: pathlib.Path,
+    ) -> typing.List[typing.Tuple[pathlib.Path, int]]:
+        """List the archives not loaded yet from the least recent one."""
+        loaded_archive_paths = {
+            snapshot.archive_path for snapshot in self._snapshots.values()
+        }
+        archive_stats = []
+        for archive_path in cache_dir.glob('*.tar'):
+            if archive_path in loaded_archive_paths:
+                continue
+            try:
+                archive_stats.append((archive_path.stat(), archive_path))
+            except FileNotFoundError:
+                pass
+        return [
+            (archive_path, archive_stat.st_size)
+            for archive_stat, archive_path in sorted(
+                archive_stats,
+                key=lambda stat_and_path: stat_and_path[0].st_mtime,
+            )
+        ]
+
+    async def _track_leftover_archives(self, cache_dir: pathlib.Path) -> None:
+        """Account for the archives persisted by the earlier runs.
+
+        The directory is only listed once, then the leftovers are
+        dropped from the index as they're loaded or evicted.
+        """
+        if self._leftover_archives_dir == self.cache_dir:
+            return
+        self._leftover_archives_dir = self.cache_dir
+        self._leftover_archives = OrderedDict(
+            await asyncio.get_running_loop().run_in_executor(
+                None, self._scan_leftover_archives, cache_dir,
+            ),
+        )
+
+    def get(self, repo_slug: str, sha: str) -> typing.Optional[RepoSnapshot]:
+        """Return the snapshot if it's been loaded already."""
+        snapshot_key = repo_slug, sha
+        try:
+            self._snapshots.move_to_end(snapshot_key)
+        except KeyError:
+            return None
+        return self._snapshots[snapshot_key]
+
+    async def load(
+            self, repo_slug: str, sha: str,
+            fetch_tarball: typing.Callable[[], typing.AsyncIterable[bytes]],
+    ) -> RepoSnapshot:
+        """Return the snapshot, downloading the tarball if needed.
+
+        :param fetch_tarball: a callable returning the gzipped tarball \
+                              contents as an async iterable of chunks
+        """
+        cached_snapshot = self.get(repo_slug, sha)
+        if cached_snapshot is not None:
+            return cached_snapshot
+
+        snapshot_key = repo_slug, sha
+        try:
+            download_task = self._downloads[snapshot_key]
+        except KeyError:
+            download_task = self._downloads[snapshot_key] = (
+                asyncio.ensure_future(
+                    self._download(repo_slug, sha, fetch_tarball),
+                )
+            )
+            download_task.add_done_callback(
+                lambda _task: self._downloads.pop(snapshot_key, None),
+            )
+
+        # NOTE: Shielding the download so that cancelling one caller
+        # NOTE: doesn't break the other ones awaiting the same snapshot.
+        return await asyncio.shield(download_task)
+
+    async def _download(
+            self, repo_slug: str, sha: str,
+            fetch_tarball: typing.Callable[[], typing.AsyncIterable[bytes]],
+    ) -> RepoSnapshot:
+        archive_name = f'{repo_slug.replace("/", "__")!s}@{sha!s}.tar'
+        cache_dir = self._get_cache_dir()
+        await self._track_leftover_archives(cache_dir)
+        archive_path = cache_dir / archive_name
+
+        loop = asyncio.get_running_loop()
+        if not archive_path.exists():
+            logger.debug('Downloading %s@%s tarball', repo_slug, sha)
+            partial_archive_path = archive_path.with_suffix('.part')
+            gzip_decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            try:
+                with partial_archive_path.open('wb') as archive_file:
+                    # NOTE: Decompressing and writing happen in a thread
+                    # NOTE: so that big tarballs don't block the loop.
+                    # NOTE: The chunks are still handled one at a time.
+                    async for gzipped_chunk in fetch_tarball():
+                        await loop.run_in_executor(
+                            None, _write_decompressed,
+                            archive_file, gzip_decompressor, gzipped_chunk,
+                        )
+                    await loop.run_in_executor(
+                        None, _write_decompressed,
+                        archive_file, gzip_decompressor, None,
+                    )
+                os.replace(partial_archive_path, archive_path)
+            finally:
+                if partial_archive_path.exists():
+                    partial_archive_path.unlink()
+
+        member_index = await loop.run_in_executor(
+            None, _index_tar_members, archive_path,
+        )
+        repo_snapshot = RepoSnapshot(
+            repo_slug, sha, archive_path, member_index,
+        )
+        self._leftover_archives.pop(archive_path, None)
+        self._snapshots[repo_slug, sha] = repo_snapshot
+        self._evict()
+        return repo_snapshot
+
+    def _evict(self) -> None:
+        # NOTE: The most recent snapshot is kept even if it's too big for
+        # NOTE: the limit since somebody is about to use it.
+        # NOTE: The evicted snapshots aren't closed because handlers may
+        # NOTE: still be reading them. Their mappings keep the deleted
+        # NOTE: archives' disk space and are only released once the last
+        # NOTE: reference to the snapshot is gone.
+        while self.total_size > self.max_size and self._leftover_archives:
+            leftover_archive_path, _size = self._leftover_archives.popitem(
+                last=False,
+            )
+            logger.debug('Evicting a leftover %s', leftover_archive_path)
+            _remove_archive(leftover_archive_path)
+        while self.total_size > self.max_size and len(self._snapshots) > 1:
+            _evicted_key, evicted_snapshot = self._snapshots.popitem(
+                last=False,
+            )
+            logger.debug('Evicting %r', evicted_snapshot)
+            _remove_archive(evicted_snapshot.archive_path)
+
+    def clear(self) -> None:
+        """Forget all the snapshots, deleting their archives."""
+        for snapshot in self._snapshots.values():
+            _remove_archive(snapshot.archive_path)
+        self._snapshots.clear()
+        for leftover_archive_path in self._leftover_archives:
+            _remove_archive(leftover_archive_path)
+        self._leftover_archives.clear()
+
+
+REPO_SNAPSHOTS = RepoSnapshotCache()
+"""The cache of the repository snapshots shared by the handlers."""
@@ -0,0 +1,149 @@
+"""Resources shared between the handlers of one event.
+
+Handlers declare the resources they need (like the repository config
+or the pull request object) and get them injected. All the resources of
+a handler are fetched concurrently. Within a dispatch scope, each one is
+fetched only once, no matter how many handlers of the event need it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import typing
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+import attr
+
+
+if typing.TYPE_CHECKING:
+    # pylint: disable=relative-beyond-top-level
+    from ..github.models.events import GitHubEvent
+
+
+__all__ = (
+    'EventResource',
+    'event_resources_scope',
+    'get_event_resource',
+    'inject_resources',
+    'resolve_event_resources',
+)
+
+
+@attr.dataclass(frozen=True)
+class EventResource:
+    """A declaration of something a handler needs for an event."""
+
+    name: str
+    """A unique name the resource is shared by within an event."""
+    fetch: typing.Callable[[GitHubEvent], typing.Awaitable[typing.Any]] = (
+        attr.ib(eq=False, repr=False)
+    )
+    """A coroutine function retrieving the resource for an event."""
+
+
+@attr.dataclass
+class _EventResourcesScope:
+    """Resources being fetched for a single event."""
+
+    event: GitHubEvent
+    """The event the resources belong to."""
+    fetch_tasks: typing.Dict[str, asyncio.Future[typing.Any]] = attr.ib(
+        factory=dict,
+    )
+    """Shared fetches of the resources keyed by their names."""
+    is_closed: bool = False
+    """Whether the event dispatch is over."""
+
+
+_current_scope: ContextVar[typing.Optional[_EventResourcesScope]] = (
+    ContextVar('current_event_resources_scope', default=None)
+)
+
+
+@contextmanager
+def event_resources_scope(event: GitHubEvent):
+    """Share the resources fetched for the event within the block.
+
+    Fetches left unfinished by the end of the block are cancelled.
+    """
+    scope = _EventResourcesScope(event=event)
+    scope_token = _current_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _current_scope.reset(scope_token)
+        scope.is_closed = True
+        for fetch_task in scope.fetch_tasks.values():
+            fetch_task.cancel()
+        scope.fetch_tasks.clear()
+
+
+async def get_event_resource(
+        resource: EventResource, event: GitHubEvent,
+) -> typing.Any:
+    """Return the resource, reusing the fetch of the current scope."""
+    scope = _current_scope.get()
+    if scope is None or scope.is_closed or scope.event is not event:
+        return await resource.fetch(event)
+
+    try:
+        fetch_task = scope.fetch_tasks[resource.name]
+    except KeyError:
+        # NOTE: The fetchers may return any awaitable, not necessarily
+        # NOTE: a coroutine, which is why it's not `create_task()`.
+        fetch_task = scope.fetch_tasks[resource.name] = asyncio.ensure_future(
+            resource.fetch(event),
+        )
+
+    # NOTE: Shielding the fetch so that cancelling one handler doesn't
+    # NOTE: break the other ones awaiting the same resource.
+    return await asyncio.shield(fetch_task)
+
+
+async def resolve_event_resources(
+        event: GitHubEvent,
+        resources: typing.Mapping[str, EventResource],
+) -> typing.Dict[str, typing.Any]:
+    """Fetch all the resources concurrently."""
+    resource_values = await asyncio.gather(
+        *(
+            get_event_resource(resource, event)
+            for resource in resources.values()
+        ),
+    )
+    return dict(zip(resources.keys(), resource_values))
+
+
+def inject_resources(**resources: EventResource):
+    """Pass the declared resources to the handler as keyword arguments.
+
+    Usage::
+
+        >>> from octomachinery.app.runtime.event_resources import (
+        ...     PULL_REQUEST, PULL_REQUEST_FILES, installation_config,
+        ... )
+        >>> from octomachinery.routing.routers import ConcurrentRouter
+        >>> from octomachinery.runtime.resources import inject_resources
+        >>> router = ConcurrentRouter()
+        >>> @router.register('pull_request', action='synchronize')
+        ... @inject_resources(
+        ...     config=installation_config(),
+        ...     pull_request=PULL_REQUEST,
+        ...     changed_files=PULL_REQUEST_FILES,
+        ... )
+        ... async def on_pr_sync(
+        ...         event, *, config, pull_request, changed_files,
+        ... ):
+        ...     ...
+    """
+    def decorator(wrapped_function):
+        @wraps(wrapped_function)
+        async def wrapper(event: GitHubEvent, *args, **kwargs):
+            resource_values = await resolve_event_resources(event, resources)
+            return await wrapped_function(
+                event, *args, **resource_values, **kwargs,
+            )
+        return wrapper
+    return decorator
@@ -0,0 +1,83 @@
+"""An LRU cache of values computed once for concurrent callers."""
+
+from __future__ import annotations
+
+import asyncio
+import typing
+from collections import OrderedDict
+
+
+__all__ = ('SharedResultsCache',)
+
+
+_KeyT = typing.TypeVar('_KeyT', bound=typing.Hashable)
+_ValueT = typing.TypeVar('_ValueT')
+
+
+class SharedResultsCache(typing.Generic[_KeyT, _ValueT]):
+    """The recently used results of the expensive computations.
+
+    Concurrent requests for the same key share one computation. Failed
+    computations aren't remembered.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        """Initialize SharedResultsCache.
+
+        :param int max_entries: the number of results to keep
+        """
+        self.max_entries = max_entries
+        self._results: typing.OrderedDict[_KeyT, _ValueT] = OrderedDict()
+        self._computations: typing.Dict[_KeyT, asyncio.Task[_ValueT]] = {}
+
+    def __len__(self) -> int:
+        """Return the number of the cached results."""
+        return len(self._results)
+
+    def get(self, key: _KeyT) -> typing.Optional[_ValueT]:
+        """Return the cached result if it's there."""
+        try:
+            self._results.move_to_end(key)
+        except KeyError:
+            return None
+        return self._results[key]
+
+    async def load(
+            self, key: _KeyT,
+            compute: typing.Callable[[], typing.Awaitable[_ValueT]],
+    ) -> _ValueT:
+        """Return the cached result, computing it if needed."""
+        try:
+            self._results.move_to_end(key)
+        except KeyError:
+            pass
+        else:
+            return self._results[key]
+
+        try:
+            compute_task = self._computations[key]
+        except KeyError:
+            compute_task = self._computations[key] = asyncio.ensure_future(
+                self._compute_and_remember(key, compute),
+            )
+            compute_task.add_done_callback(
+                lambda _task: self._computations.pop(key, None),
+            )
+
+        # NOTE: Shielding the computation so that cancelling one caller
+        # NOTE: doesn't break the other ones awaiting the same result.
+        return await asyncio.shield(compute_task)
+
+    async def _compute_and_remember(
+            self, key: _KeyT,
+            compute: typing.Callable[[], typing.Awaitable[_ValueT]],
+    ) -> _ValueT:
+        result = await compute()
+        self._results[key] = result
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+        return result
+
+    def clear(self) -> None:
+        """Forget all the results."""
+        self._results.clear()
@@ -0,0 +1,154 @@
+"""Indexes of the repository file paths at given commits.
+
+An index is built from the recursive Git tree of a commit. It holds the
+sorted paths of the files with their blob SHAs, so that existence,
+prefix and glob queries are answered locally with a binary search.
+"""
+
+from __future__ import annotations
+
+import typing
+from bisect import bisect_left
+
+# pylint: disable=relative-beyond-top-level
+from ..utils.pathtools import glob_sorted_paths, iter_sorted_paths_with_prefix
+from .shared_cache import SharedResultsCache
+
+
+__all__ = (
+    'REPO_TREE_INDEXES',
+    'RepoTreeIndex',
+    'RepoTreeIndexCache',
+)
+
+
+TreeIndexKey = typing.Tuple[str, str]
+"""Repository slug and commit SHA."""
+
+TreeEntries = typing.Iterable[typing.Mapping[str, typing.Any]]
+"""Entries of a tree as returned by the Git trees API."""
+
+FetchTreeEntries = typing.Callable[[], typing.Awaitable[TreeEntries]]
+
+
+class RepoTreeIndex:
+    """Paths of the files in a repository at a commit.
+
+    Only blobs are indexed. Directories are implied by the paths of
+    the files in them, and submodules are left out.
+    """
+
+    def __init__(
+            self, sha: str,
+            blobs: typing.Iterable[typing.Tuple[str, str]],
+    ):
+        """Initialize RepoTreeIndex.
+
+        :param str sha: the commit the tree belongs to
+        :param blobs: pairs of file paths and their blob SHAs
+        """
+        self.sha = sha
+        """The commit the index has been built for."""
+        sorted_blobs = sorted(blobs)
+        self._paths: typing.List[str] = [path for path, _ in sorted_blobs]
+        self._blob_shas: typing.List[str] = [sha for _, sha in sorted_blobs]
+
+    @classmethod
+    def from_tree_entries(
+            cls, sha: str,
+            tree_entries: TreeEntries,
+    ) -> RepoTreeIndex:
+        """Make an index out of the Git trees API entries."""
+        return cls(
+            sha,
+            (
+                (tree_entry['path'], tree_entry['sha'])
+                for tree_entry in tree_entries
+                if tree_entry['type'] == 'blob'
+            ),
+        )
+
+    def __repr__(self):
+        """Render a class instance representation."""
+        return (
+            f'{self.__class__.__name__}('
+            f'sha={self.sha!r}, files={len(self)!r})'
+        )
+
+    def __len__(self) -> int:
+        """Return the number of the indexed files."""
+        return len(self._paths)
+
+    def __iter__(self) -> typing.Iterator[str]:
+        """Iterate over the file paths in order."""
+        return iter(self._paths)
+
+    def __contains__(self, file_path: object) -> bool:
+        """Check whether there's a file under the given path."""
+        return (
+            isinstance(file_path, str)
+            and self.get_blob_sha(file_path) is not None
+        )
+
+    def get_blob_sha(self, file_path: str) -> typing.Optional[str]:
+        """Return the blob SHA of the file or ``None`` if it's missing."""
+        path_position = bisect_left(self._paths, file_path)
+        if (
+                path_position < len(self._paths)
+                and self._paths[path_position] == file_path
+        ):
+            return self._blob_shas[path_position]
+        return None
+
+    def is_dir(self, dir_path: str) -> bool:
+        """Check whether the directory has any files in it."""
+        dir_prefix = f'{dir_path.rstrip("/")!s}/'
+        return next(self.iter_prefix(dir_prefix), None) is not None
+
+    def iter_prefix(self, path_prefix: str) -> typing.Iterator[str]:
+        """Iterate over the file paths starting with the prefix in order.
+
+        Pass ``src/`` to walk all the files in the ``src`` directory.
+        """
+        return iter_sorted_paths_with_prefix(self._paths, path_prefix)
+
+    def glob(self, pattern: str) -> typing.List[str]:
+        """List the file paths matching a shell-style pattern.
+
+        Unlike in a shell, ``*`` matches ``/`` too so ``src/*.py``
+        lists the Python files in all the subdirectories of ``src``.
+        Only the paths sharing the literal prefix of the pattern are
+        checked.
+        """
+        return glob_sorted_paths(self._paths, pattern)
+
+    def has_match(self, pattern: str) -> bool:
+        """Check whether any of the file paths matches the pattern."""
+        return bool(self.glob(pattern))
+
+
+class RepoTreeIndexCache(SharedResultsCache[TreeIndexKey, RepoTreeIndex]):
+    """The recently used tree indexes.
+
+    Concurrent requests for the same index share one fetch.
+    """
+
+    async def load_index(
+            self, repo_slug: str, sha: str,
+            fetch_tree_entries: FetchTreeEntries,
+    ) -> RepoTreeIndex:
+        """Return the index, fetching the tree if needed.
+
+        :param fetch_tree_entries: a coroutine function returning all \
+                                   the entries of the recursive tree
+        """
+        async def build_index() -> RepoTreeIndex:
+            return RepoTreeIndex.from_tree_entries(
+                sha, await fetch_tree_entries(),
+            )
+
+        return await self.load((repo_slug, sha), build_index)
+
+
+REPO_TREE_INDEXES = RepoTreeIndexCache()
+"""The cache of the tree indexes shared by the handlers."""
@@ -1,9 +1,17 @@
 """Asynchronous tools set."""
 
-from functools import wraps
+import asyncio
+import contextvars
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, wraps
+from inspect import isawaitable as _inspect_isawaitable
 from inspect import signature as _inspect_signature
+from inspect import unwrap as _inspect_unwrap
 from logging import getLogger as _get_logger
 from operator import itemgetter
+from typing import Any, Callable, Dict, MutableMapping, Optional
 
 from anyio import create_queue
 from anyio import create_task_group as all_subtasks_awaited
@@ -112,3 +120,157 @@ def dict_to_kwargs_cb(callback):
             )
         return await try_await(callback(**filtered_args_dict))
     return callback_wrapper
+
+
+class BoundedThreadPool:
+    """A thread pool for blocking calls keeping saturation metrics."""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        """Initialize BoundedThreadPool.
+
+        :param int max_workers: the number of threads, defaults to \
+                                the :py:class:`ThreadPoolExecutor` one
+        """
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix='octomachinery-sync',
+        )
+        self._metrics_lock = threading.Lock()
+        self._queued_count = 0
+        self._running_count = 0
+        self._completed_count = 0
+        self._max_queued_count = 0
+
+    @property
+    def max_workers(self) -> int:
+        """Return the number of threads in the pool."""
+        # pylint: disable=protected-access
+        return self._executor._max_workers
+
+    def _run_tracked(self, func: Callable[..., Any], *args, **kwargs):
+        with self._metrics_lock:
+            self._queued_count -= 1
+            self._running_count += 1
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._metrics_lock:
+                self._running_count -= 1
+                self._completed_count += 1
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Call ``func`` in a thread with the current context vars."""
+        call_context = contextvars.copy_context()
+        with self._metrics_lock:
+            self._queued_count += 1
+            self._max_queued_count = max(
+                self._max_queued_count, self._queued_count,
+            )
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor,
+            partial(
+                call_context.run, self._run_tracked, func, *args, **kwargs,
+            ),
+        )
+
+    def metrics_snapshot(self) -> Dict[str, int]:
+        """Return the current saturation figures of the pool."""
+        with self._metrics_lock:
+            return {
+                'max_workers': self.max_workers,
+                'running': self._running_count,
+                'queued': self._queued_count,
+                'max_queued': self._max_queued_count,
+                'completed': self._completed_count,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the pool threads."""
+        self._executor.shutdown(wait=wait)
+
+
+_sync_thread_pool: Optional[BoundedThreadPool] = None
+
+
+def configure_sync_thread_pool(
+        max_workers: Optional[int] = None,
+) -> BoundedThreadPool:
+    """Replace the thread pool for sync handlers and ``run_sync()``."""
+    global _sync_thread_pool  # pylint: disable=global-statement
+    if _sync_thread_pool is not None:
+        _sync_thread_pool.shutdown(wait=False)
+    _sync_thread_pool = BoundedThreadPool(max_workers)
+    return _sync_thread_pool
+
+
+def get_sync_thread_pool() -> BoundedThreadPool:
+    """Return the thread pool for sync handlers, creating it if needed."""
+    if _sync_thread_pool is None:
+        return configure_sync_thread_pool()
+    return _sync_thread_pool
+
+
+async def run_sync(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking callable in the shared bounded thread pool.
+
+    The context vars (including ``RUNTIME_CONTEXT``) are visible to it.
+    """
+    return await get_sync_thread_pool().run(func, *args, **kwargs)
+
+
+def is_async_callable(func: Callable[..., Any]) -> bool:
+    """Check if the callable returns an awaitable.
+
+    Sync wrappers (made with :py:func:`functools.wraps`) around coroutine
+    functions are recognized as async too, and so are the partials of
+    them and the objects with an ``async def __call__()``.
+    """
+    while isinstance(func, partial):
+        func = func.func
+    return any(
+        asyncio.iscoroutinefunction(candidate_func)
+        for candidate_func in (
+            func, _inspect_unwrap(func), getattr(type(func), '__call__', None),
+        )
+    )
+
+
+_ASYNC_WRAPPERS: MutableMapping[
+    Callable[..., Any], Callable[..., Any],
+] = weakref.WeakKeyDictionary()
+"""Thread pool wrappers of the blocking callables by the wrapped ones."""
+
+
+def ensure_async_callable(func: Callable[..., Any]) -> Callable[..., Any]:
+    """Turn a blocking callable into one running in the thread pool.
+
+    If what the callable returns in the thread turns out to be awaitable
+    (like from a ``lambda`` calling a coroutine function), it's awaited
+    on the event loop. The same wrapper is returned for the same callable
+    every time so that the callable identity is kept, e.g. when it's
+    registered with several routers.
+    """
+    if is_async_callable(func):
+        return func
+
+    try:
+        return _ASYNC_WRAPPERS[func]
+    except KeyError:
+        pass
+    except TypeError:  # not weak-referenceable
+        return _make_thread_pool_wrapper(func)
+
+    async_wrapper = _ASYNC_WRAPPERS[func] = _make_thread_pool_wrapper(func)
+    return async_wrapper
+
+
+def _make_thread_pool_wrapper(
+        func: Callable[..., Any],
+) -> Callable[..., Any]:
+    @wraps(func)
+    async def run_in_thread_pool(*args, **kwargs):
+        call_result = await run_sync(func, *args, **kwargs)
+        if _inspect_isawaitable(call_result):
+            return await call_result
+        return call_result
+    return run_in_thread_pool
@@ -0,0 +1,290 @@
+"""Helpers for working with unified diffs."""
+
+from __future__ import annotations
+
+import re
+import typing
+
+import attr
+
+
+__all__ = (
+    'DiffFile',
+    'DiffHunk',
+    'UnifiedDiffParser',
+    'iter_diff_hunks',
+    'parse_patch_hunks',
+)
+
+
+_HUNK_HEADER_RE = re.compile(
+    r'^@@ -(?P<old_start>\d+)(?:,(?P<old_count>\d+))? '
+    r'\+(?P<new_start>\d+)(?:,(?P<new_count>\d+))? @@ ?(?P<section>.*)$',
+)
+
+
+@attr.dataclass(frozen=True)
+class DiffHunk:
+    """A hunk of changes of a single file."""
+
+    old_start: int
+    """The first line number of the hunk in the old file."""
+    old_count: int
+    """The number of the old file lines the hunk spans."""
+    new_start: int
+    """The first line number of the hunk in the new file."""
+    new_count: int
+    """The number of the new file lines the hunk spans."""
+    section: str
+    """The heading GitHub puts after the hunk range, like a function."""
+    lines: typing.Tuple[str, ...]
+    """The hunk lines prefixed with `` ``, ``-`` or ``+``."""
+
+    def iter_line_numbers(self) -> typing.Iterator[
+            typing.Tuple[typing.Optional[int], typing.Optional[int], str],
+    ]:
+        """Map the hunk lines to their numbers in the old and new files.
+
+        Removed lines have no new line number and added lines have no
+        old one. The new line numbers are what ``CheckAnnotation``
+        positions refer to.
+
+        :yields: old and new line numbers along with the hunk line
+        """
+        old_line_number, new_line_number = self.old_start, self.new_start
+        for hunk_line in self.lines:
+            line_kind = hunk_line[:1]
+            if line_kind == '\\':  # No newline at end of file
+                continue
+            yield (
+                None if line_kind == '+' else old_line_number,
+                None if line_kind == '-' else new_line_number,
+                hunk_line,
+            )
+            if line_kind != '+':
+                old_line_number += 1
+            if line_kind != '-':
+                new_line_number += 1
+
+    def iter_added_lines(self) -> typing.Iterator[typing.Tuple[int, str]]:
+        """Yield the new file line numbers and texts of the added lines."""
+        for old_line_number, new_line_number, hunk_line in (
+                self.iter_line_numbers()
+        ):
+            if old_line_number is None:
+                yield typing.cast(int, new_line_number), hunk_line[1:]
+
+
+def parse_patch_hunks(patch: str) -> typing.Iterator[DiffHunk]:
+    """Parse the hunks of a single file patch as the GitHub API has it.
+
+    :raises ValueError: if the patch doesn't start with a hunk header
+    """
+    hunk_header: typing.Optional[typing.Match[str]] = None
+    hunk_lines: typing.List[str] = []
+
+    def make_hunk() -> DiffHunk:
+        hunk_range = typing.cast(typing.Match[str], hunk_header).groupdict()
+        return DiffHunk(
+            old_start=int(hunk_range['old_start']),
+            old_count=int(hunk_range['old_count'] or 1),
+            new_start=int(hunk_range['new_start']),
+            new_count=int(hunk_range['new_count'] or 1),
+            section=hunk_range['section'],
+            lines=tuple(hunk_lines),
+        )
+
+    for patch_line in patch.splitlines():
+        next_hunk_header = _HUNK_HEADER_RE.match(patch_line)
+        if next_hunk_header is None:
+            if hunk_header is None:
+                raise ValueError(f'Unexpected patch line: {patch_line!r}')
+            hunk_lines.append(patch_line)
+            continue
+
+        if hunk_header is not None:
+            yield make_hunk()
+        hunk_header, hunk_lines = next_hunk_header, []
+
+    if hunk_header is not None:
+        yield make_hunk()
+
+
+@attr.dataclass(frozen=True)
+class DiffFile:
+    """A file changed in a multi-file unified diff."""
+
+    old_path: typing.Optional[str]
+    """The file path before the change, ``None`` for added files."""
+    new_path: typing.Optional[str]
+    """The file path after the change, ``None`` for deleted files."""
+
+    @property
+    def path(self) -> str:
+        """Return the current path of the file."""
+        return typing.cast(str, self.new_path or self.old_path)
+
+
+def _parse_diff_path(header_path: str) -> typing.Optional[str]:
+    """Turn a ``---``/``+++`` path into a repository path."""
+    header_path = header_path.split('\t', 1)[0]
+    if header_path == '/dev/null':
+        return None
+    if header_path.startswith('"') and header_path.endswith('"'):
+        header_path = header_path[1:-1]
+    return header_path[2:] if header_path[:2] in {'a/', 'b/'} else header_path
+
+
+_HUNK_LINE_COUNTS = {
+    '': (1, 1),
+    ' ': (1, 1),
+    '-': (1, 0),
+    '+': (0, 1),
+}
+"""How many old and new lines the hunk lines of each kind stand for.
+
+The others, like a "No newline at end of file" marker, stand for none.
+"""
+
+
+class UnifiedDiffParser:
+    """An incremental parser of multi-file unified diffs.
+
+    The diff is fed in arbitrary chunks of bytes. The hunks are handed
+    out as soon as their last line arrives so that only the current
+    hunk and an incomplete line are ever held in memory.
+
+    Usage::
+
+        >>> from octomachinery.utils.diffs import UnifiedDiffParser
+        >>> diff_parser = UnifiedDiffParser()
+        >>> diff_parser.feed(b'--- a/README\\n+++ b/README\\n@@ -1 +1 @@\\n')
+        []
+        >>> diff_parser.feed(b'-Hi')
+        []
+        >>> [
+        ...     (diff_file.new_path, diff_hunk.lines)
+        ...     for diff_file, diff_hunk in diff_parser.feed(b'\\n+Hey\\n')
+        ... ]
+        [('README', ('-Hi', '+Hey'))]
+        >>> diff_parser.close()
+        []
+    """
+
+    def __init__(self, encoding: str = 'utf-8'):
+        """Initialize UnifiedDiffParser."""
+        self._encoding = encoding
+        self._incomplete_line = b''
+        self._old_path: typing.Optional[str] = None
+        self._current_file: typing.Optional[DiffFile] = None
+        self._hunk_header: typing.Optional[typing.Match[str]] = None
+        self._hunk_lines: typing.List[str] = []
+        self._old_lines_left = 0
+        self._new_lines_left = 0
+
+    def feed(
+            self, diff_chunk: bytes,
+    ) -> typing.List[typing.Tuple[DiffFile, DiffHunk]]:
+        """Consume the next chunk of the diff.
+
+        :returns: the hunks completed by this chunk
+        """
+        *diff_lines, self._incomplete_line = (
+            self._incomplete_line + diff_chunk
+        ).split(b'\n')
+        return [
+            file_hunk
+            for diff_line in diff_lines
+            for file_hunk in self._parse_line(
+                diff_line.decode(self._encoding, errors='replace'),
+            )
+        ]
+
+    def close(self) -> typing.List[typing.Tuple[DiffFile, DiffHunk]]:
+        """Consume the rest of the diff.
+
+        :returns: the hunks completed by the end of the diff
+        """
+        trailing_line, self._incomplete_line = self._incomplete_line, b''
+        completed_hunks = [] if not trailing_line else list(
+            self._parse_line(
+                trailing_line.decode(self._encoding, errors='replace'),
+            ),
+        )
+        if self._hunk_header is not None:
+            # NOTE: A truncated diff, the hunk is given out as it is.
+            completed_hunks.append(self._complete_hunk())
+        return completed_hunks
+
+    def _complete_hunk(self) -> typing.Tuple[DiffFile, DiffHunk]:
+        hunk_range = typing.cast(
+            typing.Match[str], self._hunk_header,
+        ).groupdict()
+        diff_hunk = DiffHunk(
+            old_start=int(hunk_range['old_start']),
+            old_count=int(hunk_range['old_count'] or 1),
+            new_start=int(hunk_range['new_start']),
+            new_count=int(hunk_range['new_count'] or 1),
+            section=hunk_range['section'],
+            lines=tuple(self._hunk_lines),
+        )
+        self._hunk_header, self._hunk_lines = None, []
+        return typing.cast(DiffFile, self._current_file), diff_hunk
+
+    def _parse_line(
+            self, diff_line: str,
+    ) -> typing.Iterator[typing.Tuple[DiffFile, DiffHunk]]:
+        if self._hunk_header is not None:
+            self._parse_hunk_line(diff_line)
+        else:
+            self._parse_header_line(diff_line)
+        if (
+                self._hunk_header is not None
+                and self._old_lines_left <= 0
+                and self._new_lines_left <= 0
+        ):
+            yield self._complete_hunk()
+
+    def _parse_hunk_line(self, diff_line: str) -> None:
+        old_line_count, new_line_count = _HUNK_LINE_COUNTS.get(
+            diff_line[:1], (0, 0),
+        )
+        self._old_lines_left -= old_line_count
+        self._new_lines_left -= new_line_count
+        self._hunk_lines.append(diff_line or ' ')
+
+    def _parse_header_line(self, diff_line: str) -> None:
+        if diff_line.startswith('diff --git '):
+            self._old_path, self._current_file = None, None
+        elif diff_line.startswith('--- '):
+            self._old_path = _parse_diff_path(diff_line[4:])
+        elif diff_line.startswith('+++ '):
+            self._current_file = DiffFile(
+                old_path=self._old_path,
+                new_path=_parse_diff_path(diff_line[4:]),
+            )
+        elif self._current_file is not None:
+            # NOTE: Anything else, like a "No newline at end of file"
+            # NOTE: marker, is skipped.
+            self._start_hunk(_HUNK_HEADER_RE.match(diff_line))
+
+    def _start_hunk(
+            self, hunk_header: typing.Optional[typing.Match[str]],
+    ) -> None:
+        if hunk_header is None:
+            return
+        self._hunk_header = hunk_header
+        self._old_lines_left = int(hunk_header['old_count'] or 1)
+        self._new_lines_left = int(hunk_header['new_count'] or 1)
+
+
+async def iter_diff_hunks(
+        diff_chunks: typing.AsyncIterable[bytes],
+) -> typing.AsyncIterator[typing.Tuple[DiffFile, DiffHunk]]:
+    """Parse a streamed multi-file unified diff hunk by hunk."""
+    diff_parser = UnifiedDiffParser()
+    async for diff_chunk in diff_chunks:
+        for file_hunk in diff_parser.feed(diff_chunk):
+            yield file_hunk
+    for file_hunk in diff_parser.close():
+        yield file_hunk
@@ -0,0 +1,49 @@
+"""Queries over the sorted lists of repository paths."""
+
+import re
+import typing
+from bisect import bisect_left
+from fnmatch import fnmatchcase
+from itertools import takewhile
+
+
+__all__ = ('glob_sorted_paths', 'iter_sorted_paths_with_prefix')
+
+
+_GLOB_MAGIC_RE = re.compile(r'[*?[]')
+
+
+def iter_sorted_paths_with_prefix(
+        sorted_paths: typing.Sequence[str], path_prefix: str,
+) -> typing.Iterator[str]:
+    """Iterate over the paths starting with the prefix in order."""
+    first_position = bisect_left(sorted_paths, path_prefix)
+    return takewhile(
+        lambda file_path: file_path.startswith(path_prefix),
+        (
+            sorted_paths[path_position]
+            for path_position in range(first_position, len(sorted_paths))
+        ),
+    )
+
+
+def glob_sorted_paths(
+        sorted_paths: typing.Sequence[str], pattern: str,
+) -> typing.List[str]:
+    """List the paths matching a shell-style pattern.
+
+    Unlike in a shell, ``*`` matches ``/`` too so ``src/*.py`` matches
+    the Python files in all the subdirectories of ``src``. Only the
+    paths sharing the literal prefix of the pattern are checked.
+    """
+    magic_match = _GLOB_MAGIC_RE.search(pattern)
+    literal_prefix = pattern if magic_match is None else pattern[
+        :magic_match.start()
+    ]
+    return [
+        file_path
+        for file_path in iter_sorted_paths_with_prefix(
+            sorted_paths, literal_prefix,
+        )
+        if fnmatchcase(file_path, pattern)
+    ]
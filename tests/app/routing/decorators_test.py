@@ -1,9 +1,14 @@
 """Test event routing decorator helpers."""
 
+import asyncio
+
 import pytest
 
-from octomachinery.app.routing.decorators import process_webhook_payload
+from octomachinery.app.routing.decorators import (
+    extract_payload_args, process_webhook_payload,
+)
 from octomachinery.github.models.events import GitHubEvent
+from octomachinery.routing.decorators import coalesce_events
 
 
 @process_webhook_payload
@@ -39,3 +44,106 @@ def test_process_webhook_payload(incoming_event, is_successful):
         with pytest.raises(TypeError):
             # pylint: disable=missing-kwoa,too-many-function-args
             fake_event_handler(event)
+
+
+@extract_payload_args(
+    pr_number='pull_request.number',
+    head_sha='pull_request.head.sha',
+)
+def fake_pr_event_handler(
+        action, pr_number: int, head_sha: str, event, *,
+        draft: bool = False,
+):
+    """Process fake test pull request event."""
+    return action, pr_number, head_sha, event.name, draft
+
+
+@pytest.mark.parametrize(
+    ('incoming_event', 'expected_args'),
+    (
+        (
+            {
+                'action': 'opened',
+                'pull_request': {'number': '42', 'head': {'sha': 'f00'}},
+                'unrelated': 'field',
+            },
+            ('opened', 42, 'f00', 'pull_request', False),
+        ),
+        (
+            {
+                'action': 'closed', 'draft': 1,
+                'pull_request': {'number': 7, 'head': {'sha': 'ba7'}},
+            },
+            ('closed', 7, 'ba7', 'pull_request', True),
+        ),
+        (
+            {
+                'action': 'edited', 'draft': 'false',
+                'pull_request': {'number': 7, 'head': {'sha': None}},
+            },
+            ('edited', 7, None, 'pull_request', False),
+        ),
+        ({'action': 'opened', 'pull_request': {'number': 1}}, None),
+    ),
+)
+def test_extract_payload_args(incoming_event, expected_args):
+    """Test that only the declared arguments are taken from payload."""
+    event = GitHubEvent(name='pull_request', payload=incoming_event)
+
+    if expected_args is None:
+        with pytest.raises(TypeError, match='pull_request.head.sha'):
+            fake_pr_event_handler(event)  # pylint: disable=missing-kwoa
+    else:
+        assert (
+            # pylint: disable=missing-kwoa,no-value-for-parameter
+            fake_pr_event_handler(event) == expected_args
+        )
+
+
+def test_extract_payload_args_unknown_arg():
+    """Test that mapping paths to undeclared arguments is rejected."""
+    with pytest.raises(TypeError, match='no arguments named pr_number'):
+        @extract_payload_args(pr_number='pull_request.number')
+        def fake_handler(number):
+            """Process fake event."""
+
+
+@pytest.mark.parametrize(
+    ('cancel_superseded', 'expected_runs'),
+    (
+        (False, ['started 0', 'started 3', 'finished 0', 'finished 3']),
+        (True, ['started 0', 'started 3', 'finished 3']),
+    ),
+)
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_coalesce_events(cancel_superseded, expected_runs):
+    """Test that only the latest events within a window get handled."""
+    handler_runs = []
+
+    @coalesce_events(
+        lambda event: event.name,
+        window=0.05, cancel_superseded=cancel_superseded,
+    )
+    async def fake_event_handler(event):
+        handler_runs.append(f'started {event.payload["seq"]}')
+        await asyncio.sleep(0.2)
+        handler_runs.append(f'finished {event.payload["seq"]}')
+        return event.payload['seq']
+
+    async def send_event(seq, delay=0):
+        await asyncio.sleep(delay)
+        return await fake_event_handler(
+            GitHubEvent(name='push', payload={'seq': seq}),
+        )
+
+    results = await asyncio.gather(
+        send_event(0),
+        send_event(1, delay=0.1),
+        send_event(2, delay=0.11),
+        send_event(3, delay=0.12),
+        fake_event_handler(GitHubEvent(name='ping', payload={'seq': 4})),
+    )
+
+    assert [r for r in handler_runs if not r.endswith('4')] == expected_runs
+    assert results[1:] == [None, None, 3, 4]
@@ -0,0 +1,108 @@
+"""Test redelivered webhook events deduplication."""
+
+import os
+import uuid
+
+import pytest
+
+from octomachinery.app.routing.dedup import (
+    FileSystemDedupStore, InMemoryDedupStore, WebhookEventDeduplicator,
+)
+from octomachinery.github.models.events import GitHubWebhookEvent
+
+
+def make_webhook_event(payload=None, delivery_id=None):
+    """Construct a webhook event with a random delivery ID."""
+    return GitHubWebhookEvent(
+        name='ping',
+        payload={'zen': 'Hey zen!'} if payload is None else payload,
+        delivery_id=uuid.uuid4() if delivery_id is None else delivery_id,
+    )
+
+
+@pytest.fixture(params=('memory', 'fs'))
+def dedup_store(request, tmp_path):
+    """Return a seen keys storage instance."""
+    if request.param == 'fs':
+        return FileSystemDedupStore(tmp_path, ttl=60, max_size=3)
+    return InMemoryDedupStore(ttl=60, max_size=3)
+
+
+def test_delivery_redelivery_is_detected(dedup_store):
+    """Check that the same delivery ID is only dispatched once."""
+    deduplicator = WebhookEventDeduplicator(dedup_store)
+    event = make_webhook_event()
+
+    assert not deduplicator.is_duplicate(event)
+    assert deduplicator.is_duplicate(event)
+    assert not deduplicator.is_duplicate(make_webhook_event())
+
+    deduplicator.forget(event)
+    assert not deduplicator.is_duplicate(event)
+
+
+@pytest.mark.parametrize(
+    ('match_payload_content', 'is_duplicate'),
+    (
+        (True, True),
+        (False, False),
+    ),
+)
+def test_payload_content_matching(
+        dedup_store, match_payload_content, is_duplicate,
+):
+    """Check that same payloads under new delivery IDs are optional."""
+    deduplicator = WebhookEventDeduplicator(
+        dedup_store, match_payload_content=match_payload_content,
+    )
+    payload = {'action': 'opened', 'number': 1, 'nested': {'b': 1, 'a': 2}}
+
+    assert not deduplicator.is_duplicate(make_webhook_event(payload))
+    assert deduplicator.is_duplicate(
+        make_webhook_event(dict(reversed(payload.items()))),
+    ) is is_duplicate
+
+
+def test_fifo_eviction():
+    """Check that the first recorded keys are forgotten over the limit."""
+    dedup_store = InMemoryDedupStore(max_size=3)
+    for key_num in range(3):
+        dedup_store.remember(f'key-{key_num}')
+    assert dedup_store.remember('key-0')  # seeing it doesn't refresh it
+
+    dedup_store.remember('key-3')
+
+    assert not dedup_store.remember('key-0')
+    assert dedup_store.remember('key-3')
+
+
+def test_fs_store_pruning(tmp_path):
+    """Check that the oldest markers are removed over the size limit."""
+    dedup_store = FileSystemDedupStore(
+        tmp_path, ttl=float('inf'), max_size=30,
+    )
+    for key_num in range(5):
+        dedup_store.remember(f'key-{key_num}')
+        os.utime(
+            dedup_store._marker_path(f'key-{key_num}'),
+            (1_000_000_000 + key_num,) * 2,
+        )
+    dedup_store.max_size = 3
+    dedup_store.prune()
+
+    assert len(list(tmp_path.iterdir())) == 3
+    assert not dedup_store.remember('key-0')
+
+
+def test_ttl_expiry(tmp_path):
+    """Check that the stale keys are forgotten."""
+    assert not InMemoryDedupStore(ttl=0).remember('key')
+    fs_store = FileSystemDedupStore(tmp_path, ttl=0)
+    assert not fs_store.remember('key')
+    assert not fs_store.remember('key')
+
+
+def test_fs_store_is_shared(tmp_path):
+    """Check that separate workers see each others' keys."""
+    assert not FileSystemDedupStore(tmp_path).remember('key')
+    assert FileSystemDedupStore(tmp_path).remember('key')
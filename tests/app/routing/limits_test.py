@@ -0,0 +1,76 @@
+"""Test per-handler concurrency and rate limits."""
+
+import asyncio
+import time
+
+import pytest
+
+from octomachinery.app.routing.routers import ConcurrentRouter
+from octomachinery.github.models.events import GitHubEvent
+from octomachinery.routing.errors import EventShedError
+from octomachinery.routing.limits import TokenBucket, limit_handler
+
+
+PUSH_EVENT = GitHubEvent(name='push', payload={})
+
+
+@pytest.mark.parametrize(
+    ('route_options', 'expected_runs', 'expected_max_running'),
+    (
+        ({'max_concurrency': 2}, 5, 2),
+        ({'max_concurrency': 2, 'max_pending': 1}, 3, 2),
+        ({'max_concurrency': 2, 'overflow_policy': 'shed'}, 2, 2),
+    ),
+)
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_concurrency_limit(
+        route_options, expected_runs, expected_max_running,
+):
+    """Test that the excess invocations are queued or shed."""
+    router = ConcurrentRouter()
+    running_handlers = []
+    max_running_handlers = 0
+    handler_runs = 0
+
+    @router.register('push', **route_options)
+    async def heavy_event_handler(event):
+        nonlocal handler_runs, max_running_handlers
+        handler_runs += 1
+        running_handlers.append(event)
+        max_running_handlers = max(
+            max_running_handlers, len(running_handlers),
+        )
+        await asyncio.sleep(0.01)
+        running_handlers.remove(event)
+
+    await asyncio.gather(*(router.dispatch(PUSH_EVENT) for _ in range(5)))
+
+    assert handler_runs == expected_runs
+    assert max_running_handlers == expected_max_running
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_token_bucket():
+    """Test that the bucket lets bursts through and then paces calls."""
+    token_bucket = TokenBucket(rate=20, burst=2)
+    started_at = time.monotonic()
+
+    for _ in range(4):
+        await token_bucket.acquire()
+
+    assert 0.09 <= time.monotonic() - started_at < 0.5
+    assert not token_bucket.try_acquire()
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_handler_shed_errors_propagate():
+    """Test that only the limiter's own shedding is swallowed."""
+    @limit_handler(max_concurrency=1)
+    async def shedding_event_handler():
+        raise EventShedError('Shed by the handler')
+
+    with pytest.raises(EventShedError, match='Shed by the handler'):
+        await shedding_event_handler()
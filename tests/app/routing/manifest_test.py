@@ -0,0 +1,116 @@
+"""Test lazily loaded route manifests."""
+
+import json
+from typing import List, Tuple
+
+import pytest
+
+from octomachinery.app.routing import WEBHOOK_EVENTS_ROUTER
+from octomachinery.app.routing.routers import ConcurrentRouter
+from octomachinery.github.models.events import GitHubEvent
+from octomachinery.routing import manifest
+from octomachinery.routing.manifest import (
+    LazyRouter, generate_route_manifest, get_default_event_routers,
+    load_route_manifest,
+)
+
+
+HANDLED_EVENTS: List[Tuple[str, str]] = []
+
+
+async def on_any_pull_request(event):
+    """Record any pull request event."""
+    HANDLED_EVENTS.append(('any', event.payload['action']))
+
+
+def on_pull_request_opened(event):
+    """Record an opened pull request event, blocking."""
+    HANDLED_EVENTS.append(('opened', event.payload['action']))
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_lazy_router_from_generated_manifest(tmp_path):
+    """Test that a generated manifest routes events the same way."""
+    eager_router = ConcurrentRouter()
+    eager_router.register('pull_request')(on_any_pull_request)
+    eager_router.register('pull_request', action='opened')(
+        on_pull_request_opened,
+    )
+
+    manifest_path = tmp_path / 'routes.json'
+    manifest_path.write_text(
+        json.dumps(generate_route_manifest(eager_router)),
+        encoding='utf-8',
+    )
+    route_manifest = load_route_manifest(
+        manifest_path, entry_point_group=None,
+    )
+    assert route_manifest == {
+        'pull_request': [f'{__name__!s}:on_any_pull_request'],
+        'pull_request.opened': [f'{__name__!s}:on_pull_request_opened'],
+    }
+
+    lazy_router = LazyRouter(route_manifest)
+    # pylint: disable-next=protected-access
+    assert not lazy_router._imported_handlers
+
+    HANDLED_EVENTS.clear()
+    for action in 'opened', 'closed':
+        await lazy_router.dispatch(
+            GitHubEvent(name='pull_request', payload={'action': action}),
+        )
+
+    assert sorted(HANDLED_EVENTS) == [
+        ('any', 'closed'), ('any', 'opened'), ('opened', 'opened'),
+    ]
+
+
+def test_generate_route_manifest_rejects_local_handlers():
+    """Test that handlers that can't be imported aren't put in manifest."""
+    eager_router = ConcurrentRouter()
+
+    @eager_router.register('push')
+    async def on_push(event):  # pylint: disable=unused-argument
+        """Do nothing."""
+
+    with pytest.raises(ValueError, match='is not importable'):
+        generate_route_manifest(eager_router)
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_lazy_router_rejects_self_registered_handlers(monkeypatch):
+    """Test that handlers also routed globally aren't invoked twice."""
+    global_router = ConcurrentRouter()
+    global_router.register('pull_request', action='opened')(
+        on_pull_request_opened,
+    )
+    monkeypatch.setattr(manifest, 'WEBHOOK_EVENTS_ROUTER', global_router)
+
+    lazy_router = LazyRouter({
+        'pull_request': [f'{__name__!s}:on_pull_request_opened'],
+    })
+
+    HANDLED_EVENTS.clear()
+    with pytest.raises(ValueError, match='drop its @process_event'):
+        await lazy_router.dispatch(
+            GitHubEvent(name='pull_request', payload={'action': 'opened'}),
+        )
+    assert not HANDLED_EVENTS
+
+
+def test_default_event_routers(tmp_path):
+    """Test that a lazy router is only added if there are routes."""
+    assert get_default_event_routers() == {WEBHOOK_EVENTS_ROUTER}
+
+    manifest_path = tmp_path / 'routes.yaml'
+    manifest_path.write_text(
+        f'push: {__name__!s}:on_any_pull_request\n', encoding='utf-8',
+    )
+    global_router, lazy_router = sorted(
+        get_default_event_routers(manifest_path),
+        key=lambda router: isinstance(router, LazyRouter),
+    )
+    assert global_router is WEBHOOK_EVENTS_ROUTER
+    assert isinstance(lazy_router, LazyRouter)
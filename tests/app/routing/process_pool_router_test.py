@@ -0,0 +1,118 @@
+"""Test the process pool event router."""
+
+import asyncio
+import os
+from typing import Any, Awaitable, Callable
+
+import pytest
+
+from octomachinery.app.routing.routers import ProcessPoolRouter
+from octomachinery.github.api.raw_client import RawGitHubAPI
+from octomachinery.github.api.tokens import GitHubOAuthToken
+from octomachinery.github.models.events import GitHubEvent, GitHubWebhookEvent
+from octomachinery.github.models.utils import SecretStr
+from octomachinery.runtime.context import RUNTIME_CONTEXT
+
+
+PROCESS_POOL_ROUTER = ProcessPoolRouter(max_workers=1)
+
+
+@PROCESS_POOL_ROUTER.register('push', ref='refs/heads/main')
+async def cpu_heavy_event_handler(event, multiplier):
+    """Compute something in the worker process."""
+    return (
+        os.getpid(),
+        event.delivery_id,
+        RUNTIME_CONTEXT.github_event == event,
+        hasattr(RUNTIME_CONTEXT, 'app_installation_client'),
+        sum(range(event.payload['size'])) * multiplier,
+    )
+
+
+@PROCESS_POOL_ROUTER.register('ping')
+# pylint: disable-next=unused-argument
+async def token_reporting_event_handler(event):
+    """Report the token of the client provided in the worker."""
+    api_client = RUNTIME_CONTEXT.app_installation_client
+    return str(await api_client.get_token()), api_client.requester
+
+
+# pylint: disable-next=unused-argument
+def report_worker_pid(event):
+    """Return the process ID of the worker."""
+    return os.getpid()
+
+
+PROCESS_POOL_ROUTER.add(report_worker_pid, 'create')
+PROCESS_POOL_ROUTER.register('delete', deadline=60)(report_worker_pid)
+
+
+def get_route_callback(
+        github_event: GitHubEvent,
+) -> Callable[..., Awaitable[Any]]:
+    """Return the only route of the event."""
+    (route_callback, ) = PROCESS_POOL_ROUTER.emit_routes_for(
+        github_event.name, github_event.payload,
+    )
+    return route_callback
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_process_pool_router():
+    """Test that handlers run in a worker with the event."""
+    github_event = GitHubWebhookEvent(
+        name='push',
+        payload={'ref': 'refs/heads/main', 'size': 10},
+        delivery_id='4c2b3c1e-a8a3-4bbf-9d66-56b6f2b8f0c6',
+    )
+    await PROCESS_POOL_ROUTER.warm_up()
+    try:
+        worker_pid, delivery_id, has_event, has_client, result = (
+            await get_route_callback(github_event)(github_event, multiplier=2)
+        )
+    finally:
+        PROCESS_POOL_ROUTER.shutdown()
+
+    assert worker_pid != os.getpid()
+    assert delivery_id == github_event.delivery_id
+    assert has_event
+    assert not has_client  # there's no installation in the parent
+    assert result == 90
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_process_pool_router_passes_token():
+    """Test that the worker gets a client with the parent's token."""
+    github_event = GitHubEvent(name='ping', payload={})
+
+    async def handle_event():
+        # pylint: disable=assigning-non-slot
+        RUNTIME_CONTEXT.app_installation_client = RawGitHubAPI(
+            token=GitHubOAuthToken(SecretStr('ghs_installation')),
+            session=None,
+            user_agent='Test-Bot',
+        )
+        return await get_route_callback(github_event)(github_event)
+
+    try:
+        assert await asyncio.create_task(handle_event()) == (
+            'ghs_installation', 'Test-Bot',
+        )
+    finally:
+        PROCESS_POOL_ROUTER.shutdown()
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+@pytest.mark.parametrize('event_name', ('create', 'delete'))
+async def test_process_pool_router_offloads_all_routes(event_name):
+    """Test that both added and registered handlers run in a worker."""
+    github_event = GitHubEvent(name=event_name, payload={})
+    try:
+        worker_pid = await get_route_callback(github_event)(github_event)
+    finally:
+        PROCESS_POOL_ROUTER.shutdown()
+
+    assert worker_pid != os.getpid()
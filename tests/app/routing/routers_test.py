@@ -0,0 +1,126 @@
+"""Test event routers."""
+
+import asyncio
+import threading
+from functools import partial
+from typing import List, Tuple
+
+import pytest
+
+from octomachinery.app.routing.routers import (
+    ConcurrentRouter, KeyedSerialRouter,
+)
+from octomachinery.github.models.events import GitHubEvent
+from octomachinery.routing.errors import EventShedError
+
+
+def make_repo_event(repo_slug, seq):
+    """Construct a push event for the given repository."""
+    return GitHubEvent(
+        name='push',
+        payload={'repository': {'full_name': repo_slug}, 'seq': seq},
+    )
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_keyed_serial_router_ordering():
+    """Test that only events sharing a key are handled one by one."""
+    router = KeyedSerialRouter()
+    handler_runs = []
+
+    @router.register('push')
+    async def fake_event_handler(event):
+        repo_slug = event.payload['repository']['full_name']
+        handler_runs.append(f'{repo_slug} started {event.payload["seq"]}')
+        await asyncio.sleep(0.05)
+        handler_runs.append(f'{repo_slug} finished {event.payload["seq"]}')
+
+    await asyncio.gather(
+        router.dispatch(make_repo_event('o/a', 0)),
+        router.dispatch(make_repo_event('o/a', 1)),
+        router.dispatch(make_repo_event('o/b', 0)),
+    )
+
+    assert handler_runs[:2] == ['o/a started 0', 'o/b started 0']
+    assert handler_runs.index('o/a finished 0') < handler_runs.index(
+        'o/a started 1',
+    )
+    assert not router._key_slots  # pylint: disable=protected-access
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_keyed_serial_router_sheds_overflow():
+    """Test that events over the per-key queue limit are shed."""
+    router = KeyedSerialRouter(max_pending_per_key=1)
+
+    @router.register('push')
+    async def fake_event_handler(event):
+        await asyncio.sleep(0.01)
+
+    dispatch_results = await asyncio.gather(
+        router.dispatch(make_repo_event('o/a', 0)),
+        router.dispatch(make_repo_event('o/a', 1)),
+        return_exceptions=True,
+    )
+
+    assert dispatch_results[0] is None
+    assert isinstance(dispatch_results[1], EventShedError)
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_sync_handlers_run_in_threads():
+    """Test that blocking handlers are dispatched off the event loop."""
+    router = KeyedSerialRouter()
+    handler_threads = []
+
+    @router.register('push')
+    def blocking_event_handler(event):
+        handler_threads.append(threading.current_thread())
+
+    await router.dispatch(make_repo_event('o/a', 0))
+
+    assert handler_threads
+    assert handler_threads[0] is not threading.current_thread()
+
+
+class CallableEventHandler:
+    """An event handler object with an asynchronous ``__call__()``."""
+
+    def __init__(self, handled_events):
+        """Initialize CallableEventHandler."""
+        self.handled_events = handled_events
+
+    async def __call__(self, event):
+        """Record the handled event."""
+        self.handled_events.append(('callable', event.payload['seq']))
+
+
+async def record_handled_event(handled_events, handler_name, event):
+    """Record the handled event on behalf of the given handler."""
+    handled_events.append((handler_name, event.payload['seq']))
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_awaitable_returning_handlers_are_awaited():
+    """Test that handlers returning coroutines aren't left unawaited."""
+    router = ConcurrentRouter()
+    handled_events: List[Tuple[str, int]] = []
+
+    router.add(CallableEventHandler(handled_events), 'push')
+    router.add(
+        partial(record_handled_event, handled_events, 'partial'), 'push',
+    )
+
+    def coroutine_returning_event_handler(event):
+        return record_handled_event(handled_events, 'sync', event)
+    router.add(coroutine_returning_event_handler, 'push')
+
+    await router.dispatch(make_repo_event('o/a', 0))
+
+    assert sorted(handled_events) == [
+        ('callable', 0), ('partial', 0), ('sync', 0),
+    ]
@@ -0,0 +1,153 @@
+"""Test webhook events dispatch scheduling."""
+
+import asyncio
+from typing import List
+
+import pytest
+
+from octomachinery.app.routing.scheduler import (
+    EventDispatchScheduler, EventPriority, parse_event_priorities,
+)
+from octomachinery.github.models.events import GitHubEvent
+
+
+EVENT_PRIORITIES = parse_event_priorities(
+    'check_run.rerequested=high,issue_comment=high,push=low',
+)
+
+
+def make_dispatch_recorder(dispatched_events, github_event):
+    """Return a dispatch callable recording the handled event."""
+    async def dispatch():
+        dispatched_events.append(github_event.name)
+        await asyncio.sleep(0)
+    return dispatch
+
+
+@pytest.mark.parametrize(
+    ('event_name', 'event_action', 'expected_priority'),
+    (
+        ('check_run', 'rerequested', EventPriority.HIGH),
+        ('check_run', 'created', EventPriority.NORMAL),
+        ('issue_comment', 'created', EventPriority.HIGH),
+        ('push', None, EventPriority.LOW),
+        ('ping', None, EventPriority.NORMAL),
+    ),
+)
+def test_classify(event_name, event_action, expected_priority):
+    """Test that events are assigned to the configured classes."""
+    payload = {} if event_action is None else {'action': event_action}
+    scheduler = EventDispatchScheduler(event_priorities=EVENT_PRIORITIES)
+
+    assert scheduler.classify(
+        GitHubEvent(name=event_name, payload=payload),
+    ) is expected_priority
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_priority_order_and_shedding():
+    """Test that urgent events go first and low ones get shed."""
+    scheduler = EventDispatchScheduler(
+        max_concurrency=1, max_queue_size=2,
+        event_priorities=EVENT_PRIORITIES,
+    )
+    dispatched_events: List[str] = []
+
+    submit_results = [
+        scheduler.submit(
+            github_event,
+            make_dispatch_recorder(dispatched_events, github_event),
+        )
+        for github_event in (
+            GitHubEvent(name='ping', payload={}),  # takes the only slot
+            GitHubEvent(name='push', payload={}),
+            GitHubEvent(name='pull_request', payload={}),
+            GitHubEvent(name='issue_comment', payload={}),  # evicts push
+            GitHubEvent(name='push', payload={}),  # gets shed itself
+        )
+    ]
+    while scheduler.queued_count or scheduler._running_tasks:
+        await asyncio.sleep(0)
+
+    assert submit_results == [True, True, True, True, False]
+    assert dispatched_events == ['ping', 'issue_comment', 'pull_request']
+
+    metrics = scheduler.metrics_snapshot()
+    assert metrics['low']['shed'] == 2
+    assert metrics['high']['dispatched'] == 1
+    assert metrics['normal']['dispatched'] == 2
+
+
+@pytest.mark.parametrize(
+    ('scheduler_kwargs', 'expected_order'),
+    (
+        ({'max_concurrency': 1}, ['a', 'a', 'b', 'a', 'b', 'a']),
+        (
+            {'max_concurrency': 1, 'installation_weights': {2: 2}},
+            ['a', 'a', 'b', 'b', 'a', 'a'],
+        ),
+        (
+            {'max_concurrency': 2, 'max_concurrency_per_installation': 1},
+            ['a', 'b', 'a', 'b', 'a', 'a'],
+        ),
+    ),
+)
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_installation_fairness(scheduler_kwargs, expected_order):
+    """Test that a busy installation doesn't starve the others."""
+    scheduler = EventDispatchScheduler(**scheduler_kwargs)
+    dispatched_events: List[str] = []
+
+    for installation_id, event_name in (
+            (1, 'a'), (1, 'a'), (1, 'a'), (1, 'a'),
+            (2, 'b'), (2, 'b'),
+    ):
+        github_event = GitHubEvent(
+            name=event_name, payload={'installation': {'id': installation_id}},
+        )
+        scheduler.submit(
+            github_event,
+            make_dispatch_recorder(dispatched_events, github_event),
+        )
+    while scheduler.queued_count or scheduler._running_tasks:
+        await asyncio.sleep(0)
+
+    assert dispatched_events == expected_order
+    assert not scheduler._installations
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_drain():
+    """Test that drain waits for quick events and abandons slow ones."""
+    scheduler = EventDispatchScheduler(max_concurrency=1)
+    slow_event = GitHubEvent(name='push', payload={})
+    queued_event = GitHubEvent(name='ping', payload={})
+    dispatched_events: List[str] = []
+
+    async def dispatch_slowly():
+        await asyncio.sleep(10)
+
+    scheduler.submit(
+        GitHubEvent(name='issues', payload={}),
+        make_dispatch_recorder(dispatched_events, GitHubEvent(
+            name='issues', payload={},
+        )),
+    )
+    scheduler.submit(slow_event, dispatch_slowly)
+    scheduler.submit(
+        queued_event, make_dispatch_recorder(dispatched_events, queued_event),
+    )
+
+    drain_report = await scheduler.drain(0.05)
+
+    assert dispatched_events == ['issues']
+    assert drain_report.completed_count == 1
+    assert [
+        github_event.name for github_event in drain_report.abandoned_events
+    ] == ['ping', 'push']
+    assert not scheduler.running_count
+    assert not scheduler.queued_count
+    assert not scheduler.submit(queued_event, dispatch_slowly)
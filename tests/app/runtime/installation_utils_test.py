@@ -0,0 +1,206 @@
+"""Test installation runtime helpers."""
+
+import asyncio
+import base64
+import json
+
+import pytest
+
+from octomachinery.app.runtime.installation_utils import (
+    FileContentsSource, get_installation_config, get_repo_tree_index,
+    read_files_contents_from_repo,
+)
+from octomachinery.github.models.events import GitHubEvent
+from octomachinery.runtime.config_cache import INSTALLATION_CONFIG_CACHE
+from octomachinery.runtime.context import RUNTIME_CONTEXT
+from octomachinery.runtime.memo import DeliveryMemoStore
+
+
+CONFIG_RESPONSE = json.dumps({
+    'encoding': 'base64',
+    'content': base64.b64encode(b'checks:\n  enabled: true\n').decode(),
+}).encode()
+
+
+# pylint: disable-next=unused-argument
+def respond_with_config(method, url, headers, body):
+    """Serve the config with an ETag."""
+    if headers.get('if-none-match') == '"v1"':
+        return 304, {'etag': '"v1"'}, b''
+    return 200, {
+        'content-type': 'application/json', 'etag': '"v1"',
+    }, CONFIG_RESPONSE
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_get_installation_config_revalidates_cache(
+        make_fake_github_api,
+):
+    """Test that the cached config is reused until it's modified."""
+    INSTALLATION_CONFIG_CACHE.clear()
+    sent_etags = []
+
+    def respond_recording_etags(method, url, headers, body):
+        sent_etags.append(headers.get('if-none-match'))
+        return respond_with_config(method, url, headers, body)
+
+    github_api = make_fake_github_api(respond_recording_etags)
+
+    async def handle_event():
+        # pylint: disable=assigning-non-slot
+        RUNTIME_CONTEXT.IS_GITHUB_ACTION = False
+        # pylint: disable=assigning-non-slot
+        RUNTIME_CONTEXT.app_installation_client = github_api
+        # pylint: disable=assigning-non-slot
+        RUNTIME_CONTEXT.github_event = GitHubEvent(
+            name='issues', payload={'repository': {'full_name': 'o/r'}},
+        )
+        # pylint: disable=assigning-non-slot
+        RUNTIME_CONTEXT.delivery_memo = DeliveryMemoStore()
+        installation_config = await get_installation_config()
+        installation_config['checks']['enabled'] = 'mutated'
+        return await get_installation_config()
+
+    for _ in range(2):
+        assert await asyncio.create_task(handle_event()) == {
+            'checks': {'enabled': True},
+        }
+
+    assert sent_etags == [None, '"v1"']
+    INSTALLATION_CONFIG_CACHE.clear()
+
+
+def make_repo_files_responder(graphql_status):
+    """Return a callable serving repository files."""
+    # pylint: disable-next=unused-argument
+    def respond_with_repo_files(method, url, headers, body):
+        json_headers = {'content-type': 'application/json'}
+        if method == 'POST':
+            assert headers['authorization'] == 'token fake-token'
+            expressions = json.loads(body)['variables']
+            return graphql_status, json_headers, json.dumps({'data': {
+                'repository': {
+                    'file0': {
+                        'text': 'a', 'isBinary': False, 'isTruncated': False,
+                    },
+                    'file1': None,
+                    'file2': {
+                        'text': 'c', 'isBinary': False, 'isTruncated': True,
+                    },
+                    'file3': {},  # a directory
+                },
+            }}).encode() if expressions['expr0'] == 'HEAD:a' else b''
+
+        return 200, json_headers, json.dumps({
+            'encoding': 'base64',
+            'content': base64.b64encode(url[-1].encode()).decode(),
+        }).encode()
+    return respond_with_repo_files
+
+
+@pytest.mark.parametrize(
+    ('graphql_status', 'expected_sources', 'expected_rest_urls'),
+    (
+        (
+            200,
+            {
+                'a': FileContentsSource.GRAPHQL,
+                'b': FileContentsSource.GRAPHQL,
+                'c': FileContentsSource.REST,
+                'd': FileContentsSource.GRAPHQL,
+            },
+            ['https://api.github.com/repos/o/r/contents/c'],
+        ),
+        (
+            502,
+            dict.fromkeys('abcd', FileContentsSource.REST),
+            [
+                f'https://api.github.com/repos/o/r/contents/{file_path}'
+                for file_path in 'abcd'
+            ],
+        ),
+    ),
+)
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_read_files_contents_from_repo(
+        graphql_status, expected_sources, expected_rest_urls,
+        make_fake_github_api,
+):
+    """Test that files GraphQL can't serve are read via REST API.
+
+    The directories are reported as missing files.
+    """
+    github_api = make_fake_github_api(
+        make_repo_files_responder(graphql_status),
+    )
+
+    async def handle_event():
+        # pylint: disable=assigning-non-slot
+        RUNTIME_CONTEXT.IS_GITHUB_ACTION = False
+        # pylint: disable=assigning-non-slot
+        RUNTIME_CONTEXT.app_installation_client = github_api
+        # pylint: disable=assigning-non-slot
+        RUNTIME_CONTEXT.github_event = GitHubEvent(
+            name='issues', payload={'repository': {'full_name': 'o/r'}},
+        )
+        return await read_files_contents_from_repo(file_paths='abcda')
+
+    repo_files = await asyncio.create_task(handle_event())
+
+    assert repo_files.sources == expected_sources
+    assert sorted(
+        url for method, url in github_api.requests if method == 'GET'
+    ) == expected_rest_urls
+    if graphql_status == 200:
+        assert repo_files.contents == {
+            'a': 'a', 'b': None, 'c': 'c', 'd': None,
+        }
+    else:
+        assert repo_files.contents == {'a': 'a', 'b': 'b', 'c': 'c', 'd': 'd'}
+
+
+# pylint: disable-next=unused-argument
+def respond_with_huge_tree(method, url, headers, body):
+    """Serve Git trees, truncating the recursive root one."""
+    tree_sha, _sep, query = url.rpartition('/')[-1].partition('?')
+    git_trees = {
+        'c' * 40: {
+            'truncated': bool(query),
+            'tree': [
+                {'path': 'src', 'type': 'tree', 'sha': 'd' * 40},
+                {'path': 'setup.cfg', 'type': 'blob', 'sha': 'b1'},
+            ],
+        },
+        'd' * 40: {
+            'truncated': False,
+            'tree': [{'path': 'app.py', 'type': 'blob', 'sha': 'b2'}],
+        },
+    }
+    return 200, {'content-type': 'application/json'}, json.dumps(
+        git_trees[tree_sha],
+    ).encode()
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_get_repo_tree_index_walks_truncated_trees(
+        make_fake_github_api,
+):
+    """Test that truncated recursive trees are walked level by level."""
+    async def handle_event():
+        # pylint: disable=assigning-non-slot
+        RUNTIME_CONTEXT.app_installation_client = make_fake_github_api(
+            respond_with_huge_tree,
+        )
+        # pylint: disable=assigning-non-slot
+        RUNTIME_CONTEXT.github_event = GitHubEvent(
+            name='push', payload={'repository': {'full_name': 'o/r'}},
+        )
+        return await get_repo_tree_index(sha='c' * 40)
+
+    repo_tree = await asyncio.create_task(handle_event())
+
+    assert list(repo_tree) == ['setup.cfg', 'src/app.py']
+    assert repo_tree.get_blob_sha('src/app.py') == 'b2'
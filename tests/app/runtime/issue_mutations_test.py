@@ -0,0 +1,81 @@
+"""Test the batched changes of the current issue or pull request."""
+
+import asyncio
+from http import HTTPStatus
+
+import gidgethub
+
+import pytest
+
+from octomachinery.app.runtime.issue_mutations import add_labels
+from octomachinery.github.models.events import GitHubEvent
+from octomachinery.runtime.context import RUNTIME_CONTEXT
+from octomachinery.runtime.mutations import MutationBatch
+
+
+class FakeLabelsAPI:
+    """A GitHub API client recording the added labels."""
+
+    def __init__(self):
+        """Initialize FakeLabelsAPI."""
+        self.api_calls = []
+
+    async def post(self, url, *, url_vars, data):
+        """Record the request, failing for the forbidden labels."""
+        self.api_calls.append((url, data))
+        if 'forbidden' in data['labels']:
+            raise gidgethub.BadRequest(HTTPStatus.FORBIDDEN)
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+@pytest.mark.parametrize('is_in_delivery', (True, False))
+@pytest.mark.parametrize(
+    ('label', 'expected_exception'),
+    (
+        ('bug', None),
+        ('forbidden', gidgethub.BadRequest),
+    ),
+)
+async def test_add_labels(is_in_delivery, label, expected_exception):
+    """Test that the changes report their outcomes to the callers."""
+    github_api = FakeLabelsAPI()
+    mutation_batch = MutationBatch()
+
+    async def handle_event():
+        # pylint: disable=assigning-non-slot
+        RUNTIME_CONTEXT.app_installation_client = github_api
+        # pylint: disable=assigning-non-slot
+        RUNTIME_CONTEXT.github_event = GitHubEvent(
+            name='issues',
+            payload={
+                'repository': {'full_name': 'o/r'},
+                'issue': {'number': 1},
+            },
+        )
+        if is_in_delivery:
+            # pylint: disable=assigning-non-slot
+            RUNTIME_CONTEXT.delivery_mutations = mutation_batch
+        return await add_labels(label)
+
+    handler_task = asyncio.create_task(handle_event())
+    if is_in_delivery:
+        # NOTE: Awaiting a change never waits for the delivery end.
+        labels_change = await asyncio.wait_for(handler_task, timeout=1)
+        assert not github_api.api_calls
+        assert not labels_change.done()
+        await mutation_batch.flush(github_api)
+        change_failure = labels_change.exception()
+    else:
+        try:
+            change_failure = (await handler_task).exception()
+        except gidgethub.BadRequest as http_bad_req:
+            change_failure = http_bad_req
+
+    assert github_api.api_calls == [
+        ('/repos/o/r/issues/1/labels', {'labels': [label]}),
+    ]
+    if expected_exception is None:
+        assert change_failure is None
+    else:
+        assert isinstance(change_failure, expected_exception)
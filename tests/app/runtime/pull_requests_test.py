@@ -0,0 +1,78 @@
+"""Test pull request runtime helpers."""
+
+import asyncio
+import json
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from octomachinery.app.runtime.pull_requests import (
+    get_pull_request_files_index,
+)
+from octomachinery.github.models.events import GitHubEvent
+from octomachinery.runtime.context import RUNTIME_CONTEXT
+
+
+def get_page_number(url):
+    """Extract the page number from the URL query."""
+    return int(parse_qs(urlsplit(url).query)['page'][0])
+
+
+# pylint: disable-next=unused-argument
+def respond_with_changed_files(method, url, headers, body):
+    """Return a page of the 250 changed files."""
+    page_number = get_page_number(url)
+    files_page = [
+        {
+            'filename': f'src/file{file_number:03d}.py',
+            'patch': f'@@ -0,0 +1 @@\n+line {file_number:d}',
+        }
+        for file_number in range(
+            (page_number - 1) * 100, min(page_number * 100, 250),
+        )
+    ]
+    return 200, {'content-type': 'application/json'}, json.dumps(
+        files_page,
+    ).encode()
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_get_pull_request_files_index(make_fake_github_api):
+    """Test that the files are paginated once per head commit."""
+    github_api = make_fake_github_api(respond_with_changed_files)
+
+    async def handle_event():
+        # pylint: disable=assigning-non-slot
+        RUNTIME_CONTEXT.app_installation_client = github_api
+        # pylint: disable=assigning-non-slot
+        RUNTIME_CONTEXT.github_event = GitHubEvent(
+            name='pull_request',
+            payload={
+                'repository': {'full_name': 'o/r'},
+                'pull_request': {
+                    'number': 1,
+                    'head': {'sha': 'e' * 40},
+                    'changed_files': 250,
+                },
+            },
+        )
+        return await asyncio.gather(
+            get_pull_request_files_index(),
+            get_pull_request_files_index(),
+        )
+
+    first_index, second_index = await asyncio.create_task(handle_event())
+
+    assert first_index is second_index
+    assert sorted(
+        get_page_number(url) for _method, url in github_api.requests
+    ) == [1, 2, 3]
+    assert len(first_index) == 250
+    assert 'src/file249.py' in first_index
+    assert first_index.glob('src/file24?.py') == [
+        f'src/file24{file_number:d}.py' for file_number in range(10)
+    ]
+    assert len(list(first_index.iter_prefix('src/file1'))) == 100
+    (first_hunk, ) = first_index.get_patch_hunks('src/file007.py')
+    assert list(first_hunk.iter_added_lines()) == [(1, 'line 7')]
@@ -11,7 +11,10 @@ import pytest
 
 from octomachinery.app.config import BotAppConfig
 from octomachinery.app.routing import WEBHOOK_EVENTS_ROUTER
-from octomachinery.app.server.machinery import setup_server_runner
+from octomachinery.app.routing.scheduler import EventDispatchScheduler
+from octomachinery.app.server.machinery import (
+    log_dispatch_metrics, setup_server_runner,
+)
 from octomachinery.github.api.app_client import GitHubApp
 
 
@@ -154,3 +157,18 @@ async def test_ping_response(send_webhook_event, github_app_id):
 
     assert resp_content_type == 'text/plain; charset=utf-8'
     assert resp_body.startswith(expected_response_start)
+
+
+def test_log_dispatch_metrics(caplog):
+    """Test that the queueing stats are logged per priority class."""
+    with caplog.at_level('INFO'):
+        log_dispatch_metrics(EventDispatchScheduler())
+
+    assert [
+        log_record.getMessage().split(':')[0]
+        for log_record in caplog.records
+    ] == [
+        'Dispatch queue of high priority',
+        'Dispatch queue of normal priority',
+        'Dispatch queue of low priority',
+    ]
@@ -1,4 +1,7 @@
 """Shared fixtures for tests."""
+import asyncio
+from typing import Any, Callable, List, Mapping, Optional, Tuple, Type
+
 import pytest
 
 from cryptography.hazmat.backends import default_backend
@@ -7,6 +10,40 @@ from cryptography.hazmat.primitives.serialization import (
     Encoding, NoEncryption, PrivateFormat,
 )
 
+from octomachinery.github.api.raw_client import RawGitHubAPI
+from octomachinery.github.api.tokens import GitHubOAuthToken
+from octomachinery.github.models.utils import SecretStr
+
+
+FakeResponse = Tuple[int, Mapping[str, str], bytes]
+"""HTTP status, headers and body of a faked GitHub API response."""
+
+FakeResponder = Callable[[str, str, Mapping[str, str], bytes], FakeResponse]
+"""A callable making a response out of the method, URL, headers and body."""
+
+
+class FakeGitHubAPI(RawGitHubAPI):
+    """A GitHub API client responding without the network."""
+
+    def __init__(
+            self, respond: FakeResponder, *,
+            token: str = 'fake-token', session: Any = None,
+            requests: Optional[List[Tuple[str, str]]] = None,
+    ):
+        """Initialize FakeGitHubAPI."""
+        super().__init__(
+            GitHubOAuthToken(SecretStr(token)),
+            session=session, user_agent='test',
+        )
+        self._respond = respond
+        self.requests = [] if requests is None else requests
+        """Methods and URLs of the requests made, in order."""
+
+    async def _request(self, method, url, headers, body=b''):
+        self.requests.append((method, url))
+        await asyncio.sleep(0)  # let the concurrent requests interleave
+        return self._respond(method, url, headers, body)
+
 
 @pytest.fixture
 def rsa_private_key():
@@ -34,3 +71,14 @@ def rsa_private_key_bytes(rsa_private_key) -> bytes:
         format=PrivateFormat.TraditionalOpenSSL,  # A.K.A. PKCS#1
         encryption_algorithm=NoEncryption(),
     )
+
+
+@pytest.fixture
+def make_fake_github_api() -> Type[FakeGitHubAPI]:
+    """Return a factory of GitHub API clients with faked responses.
+
+    It takes a callable producing the responses out of the requests
+    and, optionally, a ``token``, an HTTP client ``session`` and
+    a ``requests`` log to share between several clients.
+    """
+    return FakeGitHubAPI
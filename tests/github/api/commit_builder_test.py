@@ -0,0 +1,114 @@
+"""Test committing many file changes at once."""
+
+import base64
+import json
+
+import pytest
+
+from octomachinery.github.api.commit_builder import (
+    GitCommitBuilder, GitFileMode,
+)
+
+
+class FakeGitDataAPI:
+    """A GitHub API client recording the Git Data API requests."""
+
+    def __init__(self):
+        """Initialize FakeGitDataAPI."""
+        self.api_calls = []
+
+    async def getitem(self, url):
+        """Record a GET request and return the ref or the commit."""
+        self.api_calls.append(('GET', url, None))
+        if '/git/ref/' in url:
+            return {'object': {'sha': 'parent-sha'}}
+        return {'tree': {'sha': 'base-tree-sha'}}
+
+    async def post(self, url, *, data):
+        """Record a POST request and return the created object."""
+        self.api_calls.append(('POST', url, data))
+        return {'sha': f'new-{url.rsplit("/", 1)[-1]!s}-sha'}
+
+    async def post_streamed(self, url, *, body_chunks):
+        """Record a streamed POST request and return the blob."""
+        streamed_body = b''.join([chunk async for chunk in body_chunks])
+        self.api_calls.append(('POST', url, json.loads(streamed_body)))
+        return {'sha': 'streamed-blob-sha'}
+
+    async def patch(self, url, *, data):
+        """Record a PATCH request."""
+        self.api_calls.append(('PATCH', url, data))
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_commit(tmp_path):
+    """Test that all the changes end up in one tree and one commit."""
+    big_file = tmp_path / 'big.bin'
+    big_file_contents = bytes(range(256)) * 1000
+    big_file.write_bytes(big_file_contents)
+
+    github_api = FakeGitDataAPI()
+    commit_builder = GitCommitBuilder(github_api, 'o/r')
+    commit_builder.put_file('/README.md', '# Hello\n')
+    commit_builder.put_file(
+        'run.sh', b'\xff\xfe', mode=GitFileMode.EXECUTABLE,
+    )
+    commit_builder.put_file_from_disk('big.bin', big_file)
+    commit_builder.remove_file('obsolete.txt')
+
+    new_commit = await commit_builder.commit('Update', branch='main')
+
+    assert new_commit == {'sha': 'new-commits-sha'}
+    assert not commit_builder
+    assert github_api.api_calls == [
+        ('GET', '/repos/o/r/git/ref/heads/main', None),
+        ('GET', '/repos/o/r/git/commits/parent-sha', None),
+        ('POST', '/repos/o/r/git/blobs', {
+            'encoding': 'base64',
+            'content': base64.b64encode(b'\xff\xfe').decode(),
+        }),
+        ('POST', '/repos/o/r/git/blobs', {
+            'encoding': 'base64',
+            'content': base64.b64encode(big_file_contents).decode(),
+        }),
+        ('POST', '/repos/o/r/git/trees', {
+            'base_tree': 'base-tree-sha',
+            'tree': [
+                {
+                    'path': 'README.md', 'mode': GitFileMode.FILE,
+                    'type': 'blob', 'content': '# Hello\n',
+                },
+                {
+                    'path': 'run.sh', 'mode': GitFileMode.EXECUTABLE,
+                    'type': 'blob', 'sha': 'new-blobs-sha',
+                },
+                {
+                    'path': 'big.bin', 'mode': GitFileMode.FILE,
+                    'type': 'blob', 'sha': 'streamed-blob-sha',
+                },
+                {
+                    'path': 'obsolete.txt', 'mode': GitFileMode.FILE,
+                    'type': 'blob', 'sha': None,
+                },
+            ],
+        }),
+        ('POST', '/repos/o/r/git/commits', {
+            'message': 'Update',
+            'tree': 'new-trees-sha',
+            'parents': ['parent-sha'],
+        }),
+        ('PATCH', '/repos/o/r/git/refs/heads/main', {
+            'sha': 'new-commits-sha', 'force': False,
+        }),
+    ]
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_commit_nothing():
+    """Test that there must be changes to commit."""
+    with pytest.raises(ValueError):
+        await GitCommitBuilder(FakeGitDataAPI(), 'o/r').commit(
+            'Nothing', branch='main',
+        )
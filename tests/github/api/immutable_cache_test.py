@@ -0,0 +1,111 @@
+"""Test the immutable GitHub API responses cache."""
+
+import json
+
+import pytest
+
+from octomachinery.github.api.immutable_cache import (
+    IMMUTABLE_RESPONSES, ImmutableResponseCache, is_immutable_url,
+)
+
+
+SHA = '0123456789abcdef0123456789abcdef01234567'
+
+
+@pytest.mark.parametrize(
+    ('api_url', 'is_immutable'),
+    (
+        (f'https://api.github.com/repos/o/r/git/blobs/{SHA}', True),
+        (
+            f'https://api.github.com/repos/o/r/git/trees/{SHA}?recursive=1',
+            True,
+        ),
+        (f'https://api.github.com/repos/o/r/commits/{SHA}', True),
+        (f'https://ghe.example/api/v3/repos/o/r/git/commits/{SHA}', True),
+        (f'https://api.github.com/repos/o/r/compare/{SHA}...{SHA}', True),
+        (f'https://api.github.com/repos/o/r/contents/a.md?ref={SHA}', True),
+        ('https://api.github.com/repos/o/r/contents/a.md?ref=main', False),
+        ('https://api.github.com/repos/o/r/commits/main', False),
+        (f'https://api.github.com/repos/o/r/commits/{SHA}/status', False),
+        (f'https://api.github.com/repos/o/r/compare/main...{SHA}', False),
+    ),
+)
+def test_is_immutable_url(api_url, is_immutable):
+    """Test that only SHA-addressed resources are deemed immutable."""
+    assert is_immutable_url(api_url) is is_immutable
+
+
+# pylint: disable-next=unused-argument
+def respond_with_url(method, url, headers, body):
+    """Return an object pointing at the requested URL."""
+    return 200, {'content-type': 'application/json'}, json.dumps(
+        {'url': url},
+    ).encode()
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_sha_addressed_reads_skip_network(make_fake_github_api):
+    """Test that immutable resources are only requested once."""
+    IMMUTABLE_RESPONSES.clear()
+    github_api = make_fake_github_api(respond_with_url)
+
+    for _ in range(2):
+        git_commit = await github_api.getitem(f'/repos/o/r/git/commits/{SHA}')
+        git_commit['url'] = 'mutated'
+        await github_api.getitem('/repos/o/r/commits/main')
+
+    assert git_commit == {'url': 'mutated'}
+    assert await github_api.getitem(f'/repos/o/r/git/commits/{SHA}') == {
+        'url': f'https://api.github.com/repos/o/r/git/commits/{SHA}',
+    }
+    assert github_api.requests == [
+        ('GET', f'https://api.github.com/repos/o/r/git/commits/{SHA}'),
+        ('GET', 'https://api.github.com/repos/o/r/commits/main'),
+        ('GET', 'https://api.github.com/repos/o/r/commits/main'),
+    ]
+
+    other_github_api = make_fake_github_api(
+        respond_with_url, token='other-token',
+    )
+    await other_github_api.getitem(f'/repos/o/r/git/commits/{SHA}')
+    assert other_github_api.requests == [
+        ('GET', f'https://api.github.com/repos/o/r/git/commits/{SHA}'),
+    ]
+    IMMUTABLE_RESPONSES.clear()
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_disk_store_survives_restarts(tmp_path):
+    """Test that the persisted responses are found by a new cache."""
+    await ImmutableResponseCache(cache_dir=tmp_path).put('key', [{'a': 1}])
+
+    restarted_cache = ImmutableResponseCache(cache_dir=tmp_path)
+    assert await restarted_cache.get('key') == [{'a': 1}]
+    assert len(restarted_cache) == 1
+    with pytest.raises(KeyError):
+        await restarted_cache.get('missing-key')
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_disk_store_eviction(tmp_path):
+    """Test that the disk store is bounded by its size."""
+    response_cache = ImmutableResponseCache(
+        cache_dir=tmp_path, max_disk_size=30,
+    )
+    for cache_key in 'abc':
+        await response_cache.put(cache_key, 'x' * 10)
+    assert len(list(tmp_path.iterdir())) == 2
+
+    restarted_cache = ImmutableResponseCache(
+        cache_dir=tmp_path, max_disk_size=30,
+    )
+    assert await restarted_cache.get('b') == 'x' * 10
+    await restarted_cache.put('d', 'x' * 10)
+
+    restarted_cache.clear()
+    with pytest.raises(KeyError):
+        await restarted_cache.get('c')
+    assert await restarted_cache.get('b') == 'x' * 10
@@ -0,0 +1,53 @@
+"""Test GitHub event containers."""
+
+import pytest
+
+from octomachinery.app.routing.routers import ConcurrentRouter
+from octomachinery.github.models.events import GitHubEvent
+
+
+@pytest.mark.parametrize(
+    ('flatten', 'expected_calls'),
+    (
+        (
+            False,
+            [
+                'shared', 'first', 'blocking',
+                'shared', 'second', 'blocking', 'first',
+            ],
+        ),
+        (True, ['shared', 'first', 'blocking', 'second']),
+    ),
+)
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_dispatch_via(flatten, expected_calls):
+    """Test that flat dispatch invokes shared handlers only once."""
+    first_router, second_router = ConcurrentRouter(), ConcurrentRouter()
+    handler_calls = []
+
+    async def shared_event_handler(event):
+        handler_calls.append('shared')
+
+    def blocking_event_handler(event):
+        handler_calls.append('blocking')
+
+    async def first_event_handler(event):
+        handler_calls.append('first')
+
+    async def second_event_handler(event):
+        handler_calls.append('second')
+
+    first_router.add(shared_event_handler, 'push')
+    first_router.add(first_event_handler, 'push')
+    first_router.add(blocking_event_handler, 'push')
+    second_router.add(shared_event_handler, 'push')
+    second_router.add(second_event_handler, 'push')
+    second_router.add(blocking_event_handler, 'push')
+    second_router.register('push', deadline=60)(first_event_handler)
+
+    await GitHubEvent(name='push', payload={}).dispatch_via(
+        first_router, second_router, flatten=flatten,
+    )
+
+    assert sorted(handler_calls) == sorted(expected_calls)
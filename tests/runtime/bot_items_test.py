@@ -0,0 +1,163 @@
+"""Test the index of the bot-owned comments and statuses."""
+
+import pytest
+
+from octomachinery.github.models.events import GitHubEvent
+from octomachinery.runtime.bot_items import (
+    BotItemsIndex, UpsertOutcome, make_comment_marker,
+)
+
+
+class FakeCommentsAPI:
+    """A GitHub API client recording the requests."""
+
+    def __init__(self, existing_comments=()):
+        """Initialize FakeCommentsAPI."""
+        self.existing_comments = list(existing_comments)
+        self.api_calls = []
+
+    async def getiter(self, url):
+        """Record a GET request and list the existing comments."""
+        self.api_calls.append(('GET', url))
+        for comment in self.existing_comments:
+            yield comment
+
+    async def post(self, url, *, data):
+        """Record a POST request and return the created comment."""
+        self.api_calls.append(('POST', url))
+        return {'id': 42}
+
+    async def patch(self, url, *, data):
+        """Record a PATCH request."""
+        self.api_calls.append(('PATCH', url))
+
+
+BOT_LOGIN = 'octomachinery-bot[bot]'
+
+
+def make_comment_event(action, comment_id, body, login=BOT_LOGIN):
+    """Make an ``issue_comment`` event of a bot."""
+    return GitHubEvent(
+        name='issue_comment',
+        payload={
+            'action': action,
+            'repository': {'full_name': 'o/r'},
+            'issue': {'number': 1},
+            'comment': {'id': comment_id, 'body': body, 'user': {
+                'login': login, 'type': 'Bot',
+            }},
+        },
+    )
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_upsert_comment():
+    """Test that comments are only listed once and no-ops are skipped."""
+    bot_items = BotItemsIndex()
+    github_api = FakeCommentsAPI(existing_comments=[
+        {'id': 7, 'body': make_comment_marker('summary'), 'user': {
+            'login': 'octocat', 'type': 'User',
+        }},
+    ])
+
+    upsert_outcomes = [
+        await bot_items.upsert_comment(
+            github_api, 'o/r', 1, 'summary', body, bot_login=BOT_LOGIN,
+        )
+        for body in ('v1', 'v1', 'v2')
+    ]
+
+    assert upsert_outcomes == [
+        UpsertOutcome.CREATED, UpsertOutcome.UNCHANGED, UpsertOutcome.UPDATED,
+    ]
+    assert github_api.api_calls == [
+        ('GET', '/repos/o/r/issues/1/comments'),
+        ('POST', '/repos/o/r/issues/1/comments'),
+        ('PATCH', '/repos/o/r/issues/comments/42'),
+    ]
+
+    bot_items.observe_event(make_comment_event('deleted', 42, ''))
+    github_api.api_calls.clear()
+    assert await bot_items.upsert_comment(
+        github_api, 'o/r', 1, 'summary', 'v2', bot_login=BOT_LOGIN,
+    ) is UpsertOutcome.CREATED
+    assert github_api.api_calls == [('POST', '/repos/o/r/issues/1/comments')]
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_upsert_comment_seen_in_webhook():
+    """Test that the comments seen in webhooks need no listing."""
+    bot_items = BotItemsIndex()
+    github_api = FakeCommentsAPI()
+    bot_items.observe_event(make_comment_event(
+        'created', 5, f'v1\n\n{make_comment_marker("summary")!s}',
+    ))
+
+    assert await bot_items.upsert_comment(
+        github_api, 'o/r', 1, 'summary', 'v1', bot_login=BOT_LOGIN,
+    ) is UpsertOutcome.UNCHANGED
+    assert await bot_items.upsert_comment(
+        github_api, 'o/r', 1, 'summary', 'v2', bot_login=BOT_LOGIN,
+    ) is UpsertOutcome.UPDATED
+    assert github_api.api_calls == [('PATCH', '/repos/o/r/issues/comments/5')]
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_upsert_comment_ignores_other_bots():
+    """Test that the sticky comments of other apps are left alone."""
+    bot_items = BotItemsIndex()
+    github_api = FakeCommentsAPI(existing_comments=[
+        {'id': 7, 'body': make_comment_marker('summary'), 'user': {
+            'login': 'other-bot[bot]', 'type': 'Bot',
+        }},
+    ])
+    bot_items.observe_event(make_comment_event(
+        'created', 5, make_comment_marker('summary'),
+        login='another-bot[bot]',
+    ))
+
+    assert await bot_items.upsert_comment(
+        github_api, 'o/r', 1, 'summary', 'v1', bot_login=BOT_LOGIN,
+    ) is UpsertOutcome.CREATED
+    assert await bot_items.upsert_comment(
+        github_api, 'o/r', 1, 'summary', 'v2', bot_login=BOT_LOGIN,
+    ) is UpsertOutcome.UPDATED
+    assert github_api.api_calls == [
+        ('GET', '/repos/o/r/issues/1/comments'),
+        ('POST', '/repos/o/r/issues/1/comments'),
+        ('PATCH', '/repos/o/r/issues/comments/42'),
+    ]
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_upsert_commit_status():
+    """Test that statuses already set are not posted again."""
+    bot_items = BotItemsIndex()
+    github_api = FakeCommentsAPI()
+    bot_items.observe_event(GitHubEvent(
+        name='status',
+        payload={
+            'repository': {'full_name': 'o/r'},
+            'sha': 'a' * 40, 'context': 'ci', 'state': 'pending',
+            'description': None, 'target_url': None,
+        },
+    ))
+
+    upsert_outcomes = [
+        await bot_items.upsert_commit_status(
+            github_api, 'o/r', 'a' * 40, 'ci', state=state,
+        )
+        for state in ('pending', 'success', 'success')
+    ]
+
+    assert upsert_outcomes == [
+        UpsertOutcome.UNCHANGED, UpsertOutcome.UPDATED,
+        UpsertOutcome.UNCHANGED,
+    ]
+    assert github_api.api_calls == [
+        ('POST', f'/repos/o/r/statuses/{"a" * 40!s}'),
+    ]
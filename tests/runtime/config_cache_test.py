@@ -0,0 +1,67 @@
+"""Test the parsed config cache."""
+
+import pytest
+
+from octomachinery.github.models.events import GitHubEvent
+from octomachinery.runtime.config_cache import CachedConfig, ConfigCache
+
+
+def make_push_event(ref, changed_paths, **payload_extras):
+    """Construct a push event changing given paths."""
+    return GitHubEvent(
+        name='push',
+        payload={
+            'ref': ref,
+            'repository': {'full_name': 'o/r', 'default_branch': 'main'},
+            'commits': [{'added': [], 'modified': changed_paths}],
+            **payload_extras,
+        },
+    )
+
+
+def test_lru_eviction_by_size():
+    """Test that the least recently used configs are evicted first."""
+    config_cache = ConfigCache(max_size=10)
+    for config_path in 'a', 'b', 'c':
+        config_cache.put(
+            ('o/r', None, config_path),
+            CachedConfig(config={}, etag=None, size=4),
+        )
+        config_cache.get(('o/r', None, 'a'))
+
+    assert config_cache.get(('o/r', None, 'b')) is None
+    assert config_cache.get(('o/r', None, 'a')) is not None
+    assert config_cache.total_size == 8
+
+
+@pytest.mark.parametrize(
+    ('push_event', 'expected_remaining_refs'),
+    (
+        (make_push_event('refs/heads/main', ['README.md']), {None, 'dev'}),
+        (make_push_event('refs/heads/main', ['.github/config.yml']), {'dev'}),
+        (make_push_event('refs/heads/dev', ['.github/config.yml']), {None}),
+        (
+            make_push_event('refs/heads/main', [], forced=True),
+            {'dev'},
+        ),
+        (
+            make_push_event('refs/tags/v1', ['.github/config.yml']),
+            {None, 'dev'},
+        ),
+    ),
+)
+def test_push_invalidation(push_event, expected_remaining_refs):
+    """Test that pushes changing the config file invalidate it."""
+    config_cache = ConfigCache()
+    for ref in None, 'dev':
+        config_cache.put(
+            ('o/r', ref, '.github/config.yml'),
+            CachedConfig(config={}, etag=None, size=1),
+        )
+
+    config_cache.observe_event(push_event)
+
+    assert {
+        ref for ref in (None, 'dev')
+        if config_cache.get(('o/r', ref, '.github/config.yml'))
+    } == expected_remaining_refs
@@ -0,0 +1,82 @@
+"""Test handler deadlines."""
+
+import asyncio
+from typing import List, Optional
+
+import pytest
+
+from octomachinery.app.routing.routers import ConcurrentRouter
+from octomachinery.github.models.events import GitHubEvent
+from octomachinery.runtime.deadlines import (
+    deadline_scope, get_remaining_time, get_timeout_counts, with_deadline,
+)
+
+
+def get_bounded_remaining_time() -> float:
+    """Return the remaining time, asserting that there's a deadline."""
+    remaining_time = get_remaining_time()
+    assert remaining_time is not None
+    return remaining_time
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_nested_deadline_scopes():
+    """Test that inner scopes can only shorten the remaining budget."""
+    assert get_remaining_time() is None
+
+    async with deadline_scope(10):
+        async with deadline_scope(100):
+            assert 9 < get_bounded_remaining_time() <= 10
+        async with deadline_scope(1):
+            assert get_bounded_remaining_time() <= 1
+        assert 1 < get_bounded_remaining_time() <= 10
+
+    assert get_remaining_time() is None
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_route_deadline_cancels_handler():
+    """Test that a slow handler is cancelled and counted."""
+    router = ConcurrentRouter()
+    handler_runs: List[Optional[float]] = []
+    finished_handlers: List[str] = []
+
+    @router.register('push', deadline=0.05)
+    async def slow_event_handler(event):
+        handler_runs.append(get_remaining_time())
+        await asyncio.sleep(10)
+        finished_handlers.append('slow_event_handler')
+
+    @router.register('push')
+    async def quick_event_handler(event):
+        handler_runs.append(get_remaining_time())
+
+    timeout_key = slow_event_handler.__qualname__
+    timeouts_before = get_timeout_counts().get(timeout_key, 0)
+
+    await router.dispatch(GitHubEvent(name='push', payload={}))
+
+    slow_remaining_time, quick_remaining_time = handler_runs
+    assert slow_remaining_time is not None
+    assert 0 < slow_remaining_time <= 0.05
+    assert quick_remaining_time is None
+    assert not finished_handlers
+    assert get_timeout_counts()[timeout_key] == timeouts_before + 1
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_foreign_timeout_errors_propagate():
+    """Test that only hitting the deadline itself is deemed a time-out."""
+    @with_deadline(10)
+    async def timing_out_event_handler():
+        raise TimeoutError('Not a deadline')
+
+    with pytest.raises(TimeoutError, match='Not a deadline'):
+        await timing_out_event_handler()
+
+    async with deadline_scope(10) as handler_deadline:
+        pass
+    assert not handler_deadline.has_expired
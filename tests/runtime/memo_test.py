@@ -0,0 +1,185 @@
+"""Test per-delivery memoization."""
+
+import asyncio
+import contextlib
+from types import SimpleNamespace
+from typing import Any, List, Tuple
+
+import pytest
+
+from octomachinery.runtime.context import RUNTIME_CONTEXT
+from octomachinery.runtime.memo import (
+    DeliveryMemoStore, memoize_in_delivery, memoized_per_delivery,
+)
+
+
+class FakeStreamingSession:  # pylint: disable=too-few-public-methods
+    """An HTTP client session consuming streamed uploads."""
+
+    def __init__(self, requests):
+        """Initialize FakeStreamingSession."""
+        self.requests = requests
+
+    @contextlib.asynccontextmanager
+    # pylint: disable-next=unused-argument
+    async def post(self, url, *, headers, data):
+        """Consume a streamed POST request body."""
+        self.requests.append(('POST', url))
+        async for _chunk in data:
+            await asyncio.sleep(0)
+        yield SimpleNamespace(
+            status=201, headers={'content-type': 'application/json'},
+            read=lambda: asyncio.sleep(0, b'{}'),
+        )
+
+
+# pylint: disable-next=unused-argument
+def respond_with_no_items(method, url, headers, body):
+    """Return an empty listing."""
+    return 200, {'content-type': 'application/json'}, b'{"items": []}'
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_memo_store_shares_and_forgets_failures():
+    """Test that concurrent lookups share one computation."""
+    delivery_memo = DeliveryMemoStore()
+    compute_calls: List[Any] = []
+
+    async def compute():
+        compute_calls.append(None)
+        await asyncio.sleep(0)
+        if len(compute_calls) == 1:
+            raise RuntimeError('Transient failure')
+        return {'value': len(compute_calls)}
+
+    with pytest.raises(RuntimeError):
+        await delivery_memo.memoize('key', compute)
+    results = await asyncio.gather(
+        delivery_memo.memoize('key', compute, copy_result=True),
+        delivery_memo.memoize('key', compute, copy_result=True),
+    )
+
+    assert results == [{'value': 2}, {'value': 2}]
+    assert results[0] is not results[1]
+    assert len(compute_calls) == 2
+    assert (delivery_memo.hits, delivery_memo.misses) == (1, 2)
+
+    delivery_memo.clear()
+    assert not delivery_memo
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_api_reads_memoized_within_delivery(make_fake_github_api):
+    """Test that only GET requests are shared within a delivery."""
+    github_api = make_fake_github_api(respond_with_no_items)
+
+    async def run_delivery():
+        # pylint: disable=assigning-non-slot
+        RUNTIME_CONTEXT.delivery_memo = DeliveryMemoStore()
+
+        first_read = await github_api.getitem('/repos/o/r')
+        first_read['items'].append('mutated')
+        second_read = await github_api.getitem('/repos/o/r')
+        await github_api.post('/repos/o/r/issues', data={})
+        await github_api.post('/repos/o/r/issues', data={})
+        return second_read
+
+    assert await asyncio.create_task(run_delivery()) == {'items': []}
+    await asyncio.create_task(run_delivery())
+
+    assert github_api.requests == [
+        ('GET', 'https://api.github.com/repos/o/r'),
+        ('POST', 'https://api.github.com/repos/o/r/issues'),
+        ('POST', 'https://api.github.com/repos/o/r/issues'),
+    ] * 2
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_api_reads_forgotten_after_writes(make_fake_github_api):
+    """Test that reads after a write and with other tokens are made."""
+    api_requests: List[Tuple[str, str]] = []
+    github_api = make_fake_github_api(
+        respond_with_no_items, requests=api_requests,
+    )
+    other_github_api = make_fake_github_api(
+        respond_with_no_items, token='other-token', requests=api_requests,
+    )
+
+    async def run_delivery():
+        # pylint: disable=assigning-non-slot
+        RUNTIME_CONTEXT.delivery_memo = DeliveryMemoStore()
+
+        await github_api.getitem('/repos/o/r')
+        await other_github_api.getitem('/repos/o/r')
+        await github_api.getitem('/repos/o/r')
+        await github_api.patch('/repos/o/r', data={})
+        await github_api.getitem('/repos/o/r')
+
+    await asyncio.create_task(run_delivery())
+
+    assert api_requests == [
+        ('GET', 'https://api.github.com/repos/o/r'),
+        ('GET', 'https://api.github.com/repos/o/r'),
+        ('PATCH', 'https://api.github.com/repos/o/r'),
+        ('GET', 'https://api.github.com/repos/o/r'),
+    ]
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_api_reads_forgotten_after_streamed_writes(
+        make_fake_github_api,
+):
+    """Test that streamed uploads also invalidate the memoized reads."""
+    api_requests: List[Tuple[str, str]] = []
+    github_api = make_fake_github_api(
+        respond_with_no_items,
+        session=FakeStreamingSession(api_requests),
+        requests=api_requests,
+    )
+
+    async def iter_body_chunks():
+        yield b'{}'
+
+    async def run_delivery():
+        # pylint: disable=assigning-non-slot
+        RUNTIME_CONTEXT.delivery_memo = DeliveryMemoStore()
+
+        await github_api.getitem('/repos/o/r')
+        await github_api.post_streamed(
+            '/repos/o/r/git/blobs', body_chunks=iter_body_chunks(),
+        )
+        await github_api.getitem('/repos/o/r')
+
+    await asyncio.create_task(run_delivery())
+
+    assert api_requests == [
+        ('GET', 'https://api.github.com/repos/o/r'),
+        ('POST', 'https://api.github.com/repos/o/r/git/blobs'),
+        ('GET', 'https://api.github.com/repos/o/r'),
+    ]
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_memoized_per_delivery():
+    """Test that derived computations are only memoized in a delivery."""
+    compute_calls: List[Any] = []
+
+    @memoized_per_delivery
+    async def compute(arg):
+        compute_calls.append(arg)
+        return arg * 2
+
+    async def run_delivery():
+        # pylint: disable=assigning-non-slot
+        RUNTIME_CONTEXT.delivery_memo = DeliveryMemoStore()
+        return [await compute(2), await compute(2), await compute(3)]
+
+    assert await asyncio.create_task(run_delivery()) == [4, 4, 6]
+    assert compute_calls == [2, 3]
+
+    assert await memoize_in_delivery('key', lambda: compute(5)) == 10
@@ -0,0 +1,83 @@
+"""Test the per-delivery mutation batching."""
+
+from http import HTTPStatus
+
+import gidgethub
+from gidgethub.sansio import format_url
+
+import pytest
+
+from octomachinery.runtime.mutations import MutationBatch
+
+
+class FakeIssuesAPI:
+    """A GitHub API client recording the mutations."""
+
+    def __init__(self):
+        """Initialize FakeIssuesAPI."""
+        self.api_calls = []
+
+    async def post(self, url, *, url_vars, data):
+        """Record a POST request."""
+        url = format_url(url, url_vars, base_url='')
+        self.api_calls.append(('POST', url, data))
+
+    async def delete(self, url, *, url_vars, data=None):
+        """Record a DELETE request, failing for the missing items."""
+        url = format_url(url, url_vars, base_url='')
+        self.api_calls.append(('DELETE', url, data))
+        if url.endswith('/labels/absent'):
+            raise gidgethub.BadRequest(HTTPStatus.NOT_FOUND)
+        if url.endswith('/assignees'):
+            raise gidgethub.BadRequest(HTTPStatus.UNPROCESSABLE_ENTITY)
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_flush_merges_changes():
+    """Test that the changes are merged into the minimal set of calls."""
+    github_api = FakeIssuesAPI()
+    mutation_batch = MutationBatch()
+
+    label_waiters = [
+        mutation_batch.add_labels('o/r', 1, 'bug'),
+        mutation_batch.add_labels('o/r', 1, 'bug', 'ci'),
+        mutation_batch.add_labels('o/r', 1, 'wip'),
+        mutation_batch.remove_labels('o/r', 1, 'wip', 'absent', 'needs/ci?'),
+    ]
+    reviewers_waiter = mutation_batch.request_reviewers(
+        'o/r', 1, reviewers=('alice', ), team_reviewers=('core', ),
+    )
+    assignees_waiter = mutation_batch.remove_assignees('o/r', 1, 'bob')
+
+    await mutation_batch.flush(github_api)
+
+    assert sorted(github_api.api_calls) == [
+        ('DELETE', '/repos/o/r/issues/1/assignees', {'assignees': ['bob']}),
+        ('DELETE', '/repos/o/r/issues/1/labels/absent', None),
+        ('DELETE', '/repos/o/r/issues/1/labels/needs%2Fci%3F', None),
+        ('DELETE', '/repos/o/r/issues/1/labels/wip', None),
+        ('POST', '/repos/o/r/issues/1/labels', {'labels': ['bug', 'ci']}),
+        (
+            'POST', '/repos/o/r/pulls/1/requested_reviewers',
+            {'reviewers': ['alice'], 'team_reviewers': ['core']},
+        ),
+    ]
+    assert all(waiter.result() is None for waiter in label_waiters)
+    assert reviewers_waiter.result() is None
+    assert isinstance(assignees_waiter.exception(), gidgethub.BadRequest)
+    with pytest.raises(RuntimeError):
+        mutation_batch.add_labels('o/r', 1, 'late')
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_discard_cancels_waiters():
+    """Test that the discarded changes are never applied."""
+    mutation_batch = MutationBatch()
+    label_waiter = mutation_batch.add_labels('o/r', 1, 'bug')
+
+    mutation_batch.discard()
+
+    assert label_waiter.cancelled()
+    assert not mutation_batch
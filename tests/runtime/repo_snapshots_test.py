@@ -0,0 +1,119 @@
+"""Test the repository snapshots cache."""
+
+import asyncio
+import gc
+import gzip
+import io
+import tarfile
+import weakref
+
+import pytest
+
+from octomachinery.runtime.repo_snapshots import RepoSnapshotCache
+
+
+def make_tarball(repo_files):
+    """Pack the files the way GitHub does."""
+    tar_buffer = io.BytesIO()
+    with tarfile.open(fileobj=tar_buffer, mode='w') as tar_archive:
+        for file_path, file_contents in repo_files.items():
+            tar_member = tarfile.TarInfo(f'o-r-deadbee/{file_path!s}')
+            tar_member.size = len(file_contents)
+            tar_archive.addfile(tar_member, io.BytesIO(file_contents))
+    return gzip.compress(tar_buffer.getvalue())
+
+
+REPO_FILES = {
+    'README.md': b'# Hello\n',
+    'pkg/a/package.json': b'{"name": "a"}',
+    'pkg/b/package.json': b'{"name": "b"}',
+}
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_load_shares_download(tmp_path):
+    """Test that concurrent loads download the tarball once."""
+    snapshot_cache = RepoSnapshotCache(cache_dir=tmp_path)
+    gzipped_tarball = make_tarball(REPO_FILES)
+    downloads_count = 0
+
+    async def fetch_tarball():
+        nonlocal downloads_count
+        downloads_count += 1
+        for chunk_start in range(0, len(gzipped_tarball), 7):
+            await asyncio.sleep(0)
+            yield gzipped_tarball[chunk_start:chunk_start + 7]
+
+    first_snapshot, second_snapshot = await asyncio.gather(
+        snapshot_cache.load('o/r', 'a' * 40, fetch_tarball),
+        snapshot_cache.load('o/r', 'a' * 40, fetch_tarball),
+    )
+
+    assert downloads_count == 1
+    assert first_snapshot is second_snapshot
+    assert snapshot_cache.get('o/r', 'a' * 40) is first_snapshot
+    assert first_snapshot.read_text('/README.md') == '# Hello\n'
+    assert first_snapshot.read_bytes('missing.txt') is None
+    assert 'pkg/a/package.json' in first_snapshot
+    assert first_snapshot.glob('*/package.json') == [
+        'pkg/a/package.json', 'pkg/b/package.json',
+    ]
+    assert [archive.name for archive in tmp_path.iterdir()] == [
+        f'o__r@{"a" * 40!s}.tar',
+    ]
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_eviction_keeps_mapped_snapshots_readable(tmp_path):
+    """Test that the least recently used archives are deleted."""
+    snapshot_cache = RepoSnapshotCache(cache_dir=tmp_path, max_size=1)
+    gzipped_tarball = make_tarball(REPO_FILES)
+
+    async def fetch_tarball():
+        yield gzipped_tarball
+
+    old_snapshot = await snapshot_cache.load('o/r', 'a' * 40, fetch_tarball)
+    await snapshot_cache.load('o/r', 'b' * 40, fetch_tarball)
+
+    assert snapshot_cache.get('o/r', 'a' * 40) is None
+    assert len(snapshot_cache) == 1
+    assert not old_snapshot.archive_path.exists()
+    assert old_snapshot.read_text('README.md') == '# Hello\n'
+
+    old_snapshot_ref = weakref.ref(old_snapshot)
+    del old_snapshot
+    gc.collect()
+    assert old_snapshot_ref() is None  # the cache doesn't hold the mapping
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_leftover_archives_count_towards_limit(tmp_path):
+    """Test that the archives of the earlier runs are evicted first."""
+    gzipped_tarball = make_tarball(REPO_FILES)
+
+    async def fetch_tarball():
+        yield gzipped_tarball
+
+    previous_run_cache = RepoSnapshotCache(cache_dir=tmp_path)
+    await previous_run_cache.load('o/r', 'a' * 40, fetch_tarball)
+    await previous_run_cache.load('o/r', 'b' * 40, fetch_tarball)
+    archive_size = previous_run_cache.total_size // 2
+
+    snapshot_cache = RepoSnapshotCache(
+        cache_dir=tmp_path, max_size=archive_size * 2,
+    )
+    reused_snapshot = await snapshot_cache.load(
+        'o/r', 'b' * 40, fetch_tarball,
+    )
+    assert snapshot_cache.total_size == archive_size * 2
+
+    await snapshot_cache.load('o/r', 'c' * 40, fetch_tarball)
+
+    assert sorted(archive.name for archive in tmp_path.iterdir()) == [
+        f'o__r@{"b" * 40!s}.tar', f'o__r@{"c" * 40!s}.tar',
+    ]
+    assert snapshot_cache.total_size == archive_size * 2
+    assert reused_snapshot.archive_path.exists()
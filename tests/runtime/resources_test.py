@@ -0,0 +1,54 @@
+"""Test event resources sharing."""
+
+import asyncio
+from typing import List, Tuple
+
+import pytest
+
+from octomachinery.app.routing.routers import ConcurrentRouter
+from octomachinery.github.models.events import GitHubEvent
+from octomachinery.runtime.resources import (
+    EventResource, event_resources_scope, inject_resources,
+)
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_resources_are_shared_and_fetched_concurrently():
+    """Test that handlers of one event share concurrent fetches."""
+    fetch_calls = []
+
+    def make_resource(name):
+        async def fetch(event):
+            fetch_calls.append(name)
+            await asyncio.sleep(0.05)
+            return f'{name} of {event.name}'
+        return EventResource(name=name, fetch=fetch)
+
+    config_resource = make_resource('config')
+    pr_resource = make_resource('pr')
+    router = ConcurrentRouter()
+    injected_resources: List[Tuple[str, ...]] = []
+
+    @router.register('pull_request')
+    @inject_resources(config=config_resource, pr=pr_resource)
+    async def first_event_handler(event, *, config, pr):
+        injected_resources.append((config, pr))
+
+    @router.register('pull_request')
+    @inject_resources(pr=pr_resource)
+    async def second_event_handler(event, *, pr):
+        injected_resources.append((pr, ))
+
+    github_event = GitHubEvent(name='pull_request', payload={})
+    loop = asyncio.get_running_loop()
+    started_at = loop.time()
+    with event_resources_scope(github_event):
+        await router.dispatch(github_event)
+
+    assert loop.time() - started_at < 0.1
+    assert sorted(fetch_calls) == ['config', 'pr']
+    assert sorted(injected_resources) == [
+        ('config of pull_request', 'pr of pull_request'),
+        ('pr of pull_request', ),
+    ]
@@ -0,0 +1,83 @@
+"""Test the repository tree indexes."""
+
+import asyncio
+
+import pytest
+
+from octomachinery.runtime.tree_index import RepoTreeIndex, RepoTreeIndexCache
+
+
+TREE_ENTRIES = [
+    {'path': 'src', 'type': 'tree', 'sha': 't1'},
+    {'path': 'src/pkg/__init__.py', 'type': 'blob', 'sha': 'b1'},
+    {'path': 'src/pkg/data.json', 'type': 'blob', 'sha': 'b2'},
+    {'path': 'setup.cfg', 'type': 'blob', 'sha': 'b3'},
+    {'path': 'vendor/lib', 'type': 'commit', 'sha': 'c1'},
+    {'path': 'docs/conf.py', 'type': 'blob', 'sha': 'b4'},
+]
+
+
+@pytest.fixture
+def tree_index():
+    """Return an index of a small repo."""
+    return RepoTreeIndex.from_tree_entries('0' * 40, TREE_ENTRIES)
+
+
+def test_lookups(tree_index):
+    """Test existence checks and blob SHA lookups."""
+    assert len(tree_index) == 4
+    assert 'setup.cfg' in tree_index
+    assert 'src' not in tree_index
+    assert 'vendor/lib' not in tree_index
+    assert tree_index.get_blob_sha('src/pkg/data.json') == 'b2'
+    assert tree_index.get_blob_sha('setup.py') is None
+    assert tree_index.is_dir('src/pkg/')
+    assert not tree_index.is_dir('src/pk')
+
+
+@pytest.mark.parametrize(
+    ('pattern', 'expected_paths'),
+    (
+        ('*.py', ['docs/conf.py', 'src/pkg/__init__.py']),
+        ('src/*.py', ['src/pkg/__init__.py']),
+        ('setup.cfg', ['setup.cfg']),
+        ('setup.py', []),
+        ('[ds]*/*.json', ['src/pkg/data.json']),
+    ),
+)
+def test_glob(tree_index, pattern, expected_paths):
+    """Test that globs match the indexed paths."""
+    assert tree_index.glob(pattern) == expected_paths
+    assert tree_index.has_match(pattern) is bool(expected_paths)
+
+
+def test_iter_prefix(tree_index):
+    """Test that the paths under a prefix are listed in order."""
+    assert list(tree_index.iter_prefix('src/')) == [
+        'src/pkg/__init__.py', 'src/pkg/data.json',
+    ]
+    assert not list(tree_index.iter_prefix('z'))
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_cache_shares_fetch():
+    """Test that concurrent loads of an index fetch the tree once."""
+    index_cache = RepoTreeIndexCache(max_entries=1)
+    fetches_count = 0
+
+    async def fetch_tree_entries():
+        nonlocal fetches_count
+        fetches_count += 1
+        await asyncio.sleep(0)
+        return TREE_ENTRIES
+
+    first_index, second_index = await asyncio.gather(
+        index_cache.load_index('o/r', 'a' * 40, fetch_tree_entries),
+        index_cache.load_index('o/r', 'a' * 40, fetch_tree_entries),
+    )
+    assert first_index is second_index
+    assert fetches_count == 1
+
+    await index_cache.load_index('o/r', 'b' * 40, fetch_tree_entries)
+    assert len(index_cache) == 1
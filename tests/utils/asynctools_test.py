@@ -1,8 +1,15 @@
 """Test for asynchronous operations utility functions."""
 
+import asyncio
+import contextvars
+import threading
+
 import pytest
 
-from octomachinery.utils.asynctools import amap, dict_to_kwargs_cb, try_await
+from octomachinery.utils.asynctools import (
+    BoundedThreadPool, amap, dict_to_kwargs_cb, ensure_async_callable,
+    try_await,
+)
 
 
 def sync_power2(val):
@@ -86,3 +93,48 @@ async def test_try_await_bypass_errors():
 
     with pytest.raises(TypeError, match='It is broken'):
         await try_await(break_callback())
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_run_sync_propagates_context():
+    """Test that blocking calls see the caller's context vars."""
+    thread_pool = BoundedThreadPool(max_workers=1)
+    ctx_var: contextvars.ContextVar[str] = contextvars.ContextVar('ctx_var')
+    ctx_var.set('outer value')
+    release_calls = threading.Event()
+
+    def blocking_call():
+        release_calls.wait(1)
+        return ctx_var.get(), threading.current_thread().name
+
+    try:
+        calls = [
+            asyncio.ensure_future(thread_pool.run(blocking_call))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0.01)
+        saturated_metrics = thread_pool.metrics_snapshot()
+        release_calls.set()
+        call_results = await asyncio.gather(*calls)
+    finally:
+        thread_pool.shutdown()
+
+    assert saturated_metrics['running'] == 1
+    assert saturated_metrics['queued'] == 2
+    assert thread_pool.metrics_snapshot()['completed'] == 3
+    assert all(
+        ctx_value == 'outer value'
+        and thread_name.startswith('octomachinery-sync')
+        for ctx_value, thread_name in call_results
+    )
+
+
+def test_ensure_async_callable():
+    """Test that only blocking callables get wrapped."""
+    assert ensure_async_callable(async_power2) is async_power2
+    assert asyncio.iscoroutinefunction(ensure_async_callable(sync_power2))
+    assert (
+        ensure_async_callable(sync_power2)
+        is ensure_async_callable(sync_power2)
+    )
@@ -0,0 +1,116 @@
+"""Test unified diff helpers."""
+
+import pytest
+
+from octomachinery.utils.diffs import (
+    DiffFile, DiffHunk, UnifiedDiffParser, iter_diff_hunks, parse_patch_hunks,
+)
+
+
+def test_parse_patch_hunks():
+    """Test that the file patch is split into hunks."""
+    patch = (
+        '@@ -1,3 +1,4 @@ def main():\n'
+        ' a\n'
+        '-b\n'
+        '+B\n'
+        '+C\n'
+        ' d\n'
+        '@@ -10 +11 @@\n'
+        '-x\n'
+        '\\ No newline at end of file\n'
+    )
+
+    first_hunk, second_hunk = parse_patch_hunks(patch)
+
+    assert first_hunk == DiffHunk(
+        old_start=1, old_count=3, new_start=1, new_count=4,
+        section='def main():', lines=(' a', '-b', '+B', '+C', ' d'),
+    )
+    assert list(first_hunk.iter_added_lines()) == [(2, 'B'), (3, 'C')]
+    assert (second_hunk.old_start, second_hunk.old_count) == (10, 1)
+    assert not list(second_hunk.iter_added_lines())
+
+
+def test_parse_patch_hunks_rejects_garbage():
+    """Test that patches must start with a hunk header."""
+    with pytest.raises(ValueError):
+        list(parse_patch_hunks('+orphan line'))
+
+
+MULTI_FILE_DIFF = (
+    'diff --git a/setup.cfg b/setup.cfg\n'
+    'index 1111111..2222222 100644\n'
+    '--- a/setup.cfg\n'
+    '+++ b/setup.cfg\n'
+    '@@ -1,2 +1,2 @@ [metadata]\n'
+    '--- old dashes\n'
+    '+++ new pluses\n'
+    ' name = pkg\n'
+    '@@ -9 +9,2 @@\n'
+    ' x\n'
+    '+y\n'
+    '\\ No newline at end of file\n'
+    'diff --git a/logo.png b/logo.png\n'
+    'Binary files a/logo.png and b/logo.png differ\n'
+    'diff --git a/gone.txt b/gone.txt\n'
+    'deleted file mode 100644\n'
+    '--- a/gone.txt\n'
+    '+++ /dev/null\n'
+    '@@ -1 +0,0 @@\n'
+    '-bye\n'
+    'diff --git a/new.txt b/new.txt\n'
+    'new file mode 100644\n'
+    '--- /dev/null\n'
+    '+++ b/new.txt\n'
+    '@@ -0,0 +1 @@\n'
+    '+hi'
+).encode()
+
+
+@pytest.mark.parametrize('chunk_size', (1, 7, len(MULTI_FILE_DIFF)))
+def test_unified_diff_parser(chunk_size):
+    """Test that the diff is parsed the same way however it's chunked."""
+    diff_parser = UnifiedDiffParser()
+    file_hunks = [
+        file_hunk
+        for chunk_start in range(0, len(MULTI_FILE_DIFF), chunk_size)
+        for file_hunk in diff_parser.feed(
+            MULTI_FILE_DIFF[chunk_start:chunk_start + chunk_size],
+        )
+    ] + diff_parser.close()
+
+    assert [
+        (diff_file, diff_hunk.lines) for diff_file, diff_hunk in file_hunks
+    ] == [
+        (
+            DiffFile('setup.cfg', 'setup.cfg'),
+            ('--- old dashes', '+++ new pluses', ' name = pkg'),
+        ),
+        (DiffFile('setup.cfg', 'setup.cfg'), (' x', '+y')),
+        (DiffFile('gone.txt', None), ('-bye', )),
+        (DiffFile(None, 'new.txt'), ('+hi', )),
+    ]
+    assert file_hunks[1][1].section == ''
+    assert file_hunks[2][0].path == 'gone.txt'
+    assert list(file_hunks[0][1].iter_line_numbers()) == [
+        (1, None, '--- old dashes'),
+        (None, 1, '+++ new pluses'),
+        (2, 2, ' name = pkg'),
+    ]
+    assert list(file_hunks[1][1].iter_added_lines()) == [(10, 'y')]
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures('event_loop')
+async def test_iter_diff_hunks():
+    """Test that a streamed diff is parsed as it arrives."""
+    async def stream_diff():
+        for chunk_start in range(0, len(MULTI_FILE_DIFF), 10):
+            yield MULTI_FILE_DIFF[chunk_start:chunk_start + 10]
+
+    changed_paths = [
+        diff_file.path async for diff_file, _hunk
+        in iter_diff_hunks(stream_diff())
+    ]
+    assert changed_paths == ['setup.cfg', 'setup.cfg', 'gone.txt', 'new.txt']